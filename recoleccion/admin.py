@@ -6,6 +6,7 @@ from django.core.exceptions import ObjectDoesNotExist
 from recoleccion.models import (
     Authorship,
     DeputySeat,
+    LinkingResolution,
     Party,
     PartyDenomination,
     PartyLinkingDecision,
@@ -46,6 +47,7 @@ class PartyAdmin(admin.ModelAdmin):
         except Exception as e:
             self.message_user(request, f"Error: {e}", level="ERROR")
             return
+        LinkingResolution.objects.filter(party=party).delete()
 
     change_party_name.short_description = "Cambiar nombre"
 
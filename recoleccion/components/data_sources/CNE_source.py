@@ -1,4 +1,3 @@
-import requests
 import pandas as pd
 from rarfile import RarFile
 from io import BytesIO
@@ -41,7 +40,7 @@ class CNESource(DataSource):
 
     def get_resource(self, resource):
         url = f"{self.base_url}/{resource.key}"
-        response = requests.request("GET", url)
+        response = self.session.get(url)
         # Extract rar file and return file
         with RarFile(BytesIO(response.content)) as rf:
             for file in rf.infolist():
@@ -1,5 +1,4 @@
 import logging
-import requests
 import re
 import pandas as pd
 import zipfile
@@ -16,7 +15,6 @@ logger = logging.getLogger(__name__)
 
 class AffidavitsSource(DataSource):
     files_content = {}
-    session = requests.Session()
     ZIP_FOLDER_LOCAL_PATH = "recoleccion/files/declaraciones-juradas.zip"
     ZIP_FOLDER_URL = "http://datos.jus.gob.ar/dataset/4680199f-6234-4262-8a2a-8f7993bf784d/resource/43c3cf87-b78f-4dd5-a821-686999d42231/download/declaraciones-juradas-2022.zip"
     column_mappings = {
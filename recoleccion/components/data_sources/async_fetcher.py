@@ -0,0 +1,60 @@
+import asyncio
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from urllib.parse import urlsplit
+import requests
+
+
+class AsyncFetcher:
+    """
+    Fetches many urls concurrently with asyncio, the requests are made with the given session in worker threads,
+    so they share its keep-alive connections (and its HTTP cache)
+    The concurrency is bounded globally and per host, and the requests to the same host are spaced by host_delay
+    The responses are returned in the same order as the urls (None for empty urls or failed requests)
+    """
+
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        session: requests.Session,
+        max_concurrency: int = 16,
+        max_concurrency_per_host: int = 4,
+        host_delay: float = 0.1,
+    ):
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self.max_concurrency_per_host = max_concurrency_per_host
+        self.host_delay = host_delay
+
+    def fetch_all(self, urls: List[str | None]) -> List[requests.Response | None]:
+        return asyncio.run(self._fetch_all(urls))
+
+    async def _fetch_all(self, urls: List[str | None]) -> List[requests.Response | None]:
+        # The asyncio primitives are created here, as they are bound to the running loop
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.host_semaphores = defaultdict(lambda: asyncio.Semaphore(self.max_concurrency_per_host))
+        self.host_next_request = defaultdict(float)
+        with ThreadPoolExecutor(self.max_concurrency) as self.executor:
+            return await asyncio.gather(*(self.fetch(url) for url in urls))
+
+    async def fetch(self, url: str | None) -> requests.Response | None:
+        if not url:
+            return None
+        host = urlsplit(url).netloc
+        async with self.semaphore, self.host_semaphores[host]:
+            await self.wait_for_host(host)
+            try:
+                return await asyncio.get_running_loop().run_in_executor(self.executor, self.session.get, url)
+            except requests.RequestException as e:
+                self.logger.warning(f"Error while fetching {url}: {e}")
+                return None
+
+    async def wait_for_host(self, host: str):
+        """Politeness: waits until host_delay seconds have passed since the last request to the host started"""
+        now = asyncio.get_running_loop().time()
+        request_time = max(now, self.host_next_request[host])
+        self.host_next_request[host] = request_time + self.host_delay
+        await asyncio.sleep(request_time - now)
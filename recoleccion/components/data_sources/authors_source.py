@@ -1,7 +1,6 @@
 import re
 import datetime as dt
 from typing import List
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 import logging
@@ -23,7 +22,6 @@ logger = logging.getLogger(__name__)
 
 
 class DeputiesAuthorsSource(DataSource):
-    session = requests.Session()
     BASE_URL = "https://www.hcdn.gob.ar/proyectos/resultado.html"
     POST_HEADERS = {
         "Referer": "https://www.diputados.gov.ar/proyectos/index.html",
@@ -189,7 +187,7 @@ class DeputiesAuthorsSource(DataSource):
 
 class SenateAuthorsSource(DataSource):
     def __init__(self, threading=True):
-        self.session = requests.Session()
+        self.session = self.get_session()
         self.threading = threading
         self.logger = logging.getLogger(__name__)
 
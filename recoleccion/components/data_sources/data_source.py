@@ -1,5 +1,8 @@
 import logging
 
+# Project
+from recoleccion.components.data_sources.http_cache import CachedSession
+
 
 class DataSource:
     """
@@ -7,13 +10,25 @@ class DataSource:
     It has:
     - name: the name of the resource
     - key: the key of the resource (used to uniquely identify it)
+    Every subclass gets a CachedSession (unless it defines its own session), when the HTTP cache is enabled its
+    responses are cached for cache_ttl
     """
 
     name = None
     key = None
     column_mappings = {}
+    cache_ttl = None  # seconds, None uses the HTTP_CACHE_TTL setting
     logger = logging.getLogger(__name__)
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "session" not in cls.__dict__:
+            cls.session = cls.get_session()
+
+    @classmethod
+    def get_session(cls) -> CachedSession:
+        return CachedSession(ttl=cls.cache_ttl)
+
     def __str__(self):
         return self.name
 
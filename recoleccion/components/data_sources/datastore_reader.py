@@ -0,0 +1,77 @@
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List
+import pandas as pd
+import requests
+from pandas.api.types import union_categoricals
+
+
+class DatastoreReader:
+    """
+    Reads a CKAN datastore resource (like the ones of datos.hcdn.gob.ar) page by page, using offset and limit
+    Every page is yielded as a DataFrame with only the requested columns and the given dtypes,
+    so the whole resource (raw body, records and DataFrame) is never held in memory at once
+    """
+
+    BASE_URL = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search"
+    PAGE_SIZE = 10000
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        resource_id: str,
+        session: requests.Session,
+        columns: List[str] = None,
+        dtypes: Dict[str, str] = None,
+        page_size: int = PAGE_SIZE,
+        base_url: str = BASE_URL,
+    ):
+        self.resource_id = resource_id
+        self.session = session
+        self.columns = columns
+        self.dtypes = dtypes or {}
+        self.page_size = page_size
+        self.base_url = base_url
+
+    def get_page(self, offset: int) -> List[dict]:
+        # Without a sort the datastore has no stable order, and rows could repeat or be skipped between pages
+        params = {"resource_id": self.resource_id, "offset": offset, "limit": self.page_size, "sort": "_id"}
+        if self.columns:
+            params["fields"] = ",".join(self.columns)
+        response = self.session.get(self.base_url, params=params)
+        response.raise_for_status()
+        return response.json()["result"]["records"]
+
+    def build_chunk(self, records: List[dict]) -> pd.DataFrame:
+        chunk = pd.DataFrame.from_records(records, columns=self.columns)
+        if "_id" in chunk.columns and "_id" not in (self.columns or []):
+            chunk = chunk.drop(columns=["_id"])  # internal id of the datastore
+        return chunk.astype(self.dtypes)
+
+    def iter_chunks(self) -> Iterator[pd.DataFrame]:
+        offset = 0
+        while True:
+            records = self.get_page(offset)
+            if records:
+                yield self.build_chunk(records)
+            if len(records) < self.page_size:
+                break
+            offset += self.page_size
+        self.logger.info(f"Read {offset + len(records)} records from resource {self.resource_id}")
+
+    def read(self, chunk_filter: Callable[[pd.DataFrame], pd.DataFrame] = None) -> pd.DataFrame:
+        """Reads the whole resource, chunk_filter is applied to every chunk before keeping it"""
+        chunks = self.iter_chunks()
+        if chunk_filter:
+            chunks = (chunk_filter(chunk) for chunk in chunks)
+        return self.concat(chunks)
+
+    def concat(self, chunks: Iterable[pd.DataFrame]) -> pd.DataFrame:
+        chunks = list(chunks)
+        if not chunks:
+            return pd.DataFrame(columns=self.columns).astype(self.dtypes)
+        data = pd.concat(chunks, ignore_index=True)
+        # The categories of every chunk are different, so concat falls back to object columns
+        for column, dtype in self.dtypes.items():
+            if dtype == "category" and column in data.columns:
+                data[column] = union_categoricals([chunk[column] for chunk in chunks])
+        return data
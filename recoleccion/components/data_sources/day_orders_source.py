@@ -1,6 +1,5 @@
 import datetime as dt
 from typing import List
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 
@@ -10,7 +9,6 @@ from recoleccion.exceptions.custom import PageNotFound
 
 
 class DeputiesDayOrderSource(DataSource):
-    session = requests.Session()
     BASE_URL = "https://www2.hcdn.gob.ar/secparl/dcomisiones/s_od/buscador.html"
 
     @classmethod
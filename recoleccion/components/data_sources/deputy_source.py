@@ -1,5 +1,4 @@
 import io
-import requests
 import pandas as pd
 
 # Project
@@ -27,7 +26,7 @@ class DeputiesHistory(DataSource):
 
     @classmethod
     def get_raw_data(cls):
-        response = requests.get(cls.url)
+        response = cls.session.get(cls.url)
         csv_data = response.content
         df = pd.read_csv(io.StringIO(csv_data.decode("utf-8")))
         return df
@@ -68,7 +67,7 @@ class CurrentDeputies(DataSource):
 
     @classmethod
     def get_raw_data(cls):
-        req = requests.get(cls.csv_url)
+        req = cls.session.get(cls.csv_url)
         raw_content = req.content
         decoded_content = raw_content.decode("utf-8")
         return pd.read_csv(io.StringIO(decoded_content))
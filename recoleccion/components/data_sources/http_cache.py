@@ -0,0 +1,225 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+import requests
+from django.conf import settings
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Time to live of the cached responses, in seconds
+ONE_HOUR = 60 * 60
+ONE_DAY = 24 * ONE_HOUR
+ONE_WEEK = 7 * ONE_DAY
+ONE_MONTH = 30 * ONE_DAY
+
+
+class OfflineCacheMiss(requests.exceptions.ConnectionError):
+    """Raised in offline mode when a request was never cached"""
+
+
+class HTTPCache:
+    """
+    Disk cache for the responses of the data sources
+    The bodies are stored by their content hash (so repeated payloads are stored once) and the responses
+    metadata in a sqlite index, which is also used to evict the least recently used responses
+    """
+
+    CACHED_STATUS_CODES = {200}
+    _instance = None
+    _instance_lock = threading.Lock()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self, directory: str, max_size: int, default_ttl: int, offline: bool = False):
+        self.directory = Path(directory)
+        self.bodies_directory = self.directory / "bodies"
+        self.bodies_directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.sqlite3"
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self.offline = offline
+        self.lock = threading.Lock()
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                + "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, body_hash TEXT, size INTEGER, "
+                + "fetched_at REAL, accessed_at REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)")
+
+    @classmethod
+    def get_instance(cls) -> "HTTPCache":
+        with cls._instance_lock:
+            if not cls._instance:
+                cls._instance = cls(
+                    settings.HTTP_CACHE_DIR,
+                    settings.HTTP_CACHE_MAX_SIZE,
+                    settings.HTTP_CACHE_TTL,
+                    settings.HTTP_CACHE_OFFLINE,
+                )
+            return cls._instance
+
+    @classmethod
+    def set_offline(cls, offline: bool):
+        cls.get_instance().offline = offline
+
+    @classmethod
+    def is_offline(cls) -> bool:
+        # Checked without creating the cache, as it may be disabled
+        return cls._instance.offline if cls._instance else settings.HTTP_CACHE_OFFLINE
+
+    @contextmanager
+    def connect(self) -> Iterator[sqlite3.Connection]:
+        # One connection per operation, so the cache can be used from several threads
+        connection = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def get_key(self, request: requests.PreparedRequest) -> str:
+        body = request.body or b""
+        if isinstance(body, str):
+            body = body.encode()
+        return hashlib.sha256(f"{request.method} {request.url}\n".encode() + body).hexdigest()
+
+    def get_body_path(self, body_hash: str) -> Path:
+        return self.bodies_directory / body_hash[:2] / body_hash
+
+    def get(self, key: str) -> dict | None:
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT url, status, headers, body_hash, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                return None
+            url, status, headers, body_hash, fetched_at = row
+            body_path = self.get_body_path(body_hash)
+            if not body_path.exists():
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return {
+            "url": url,
+            "status": status,
+            "headers": json.loads(headers),
+            "body": body_path.read_bytes(),
+            "fetched_at": fetched_at,
+        }
+
+    def set(self, key: str, response: requests.Response):
+        body = response.content
+        body_hash = hashlib.sha256(body).hexdigest()
+        body_path = self.get_body_path(body_hash)
+        if not body_path.exists():
+            body_path.parent.mkdir(exist_ok=True)
+            temp_path = body_path.with_name(f"{body_hash}.{os.getpid()}.{threading.get_ident()}.tmp")
+            temp_path.write_bytes(body)
+            os.replace(temp_path, body_path)
+        now = time.time()
+        with self.lock, self.connect() as connection:
+            headers = json.dumps(dict(response.headers))
+            connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, response.url, response.status_code, headers, body_hash, len(body), now, now),
+            )
+            self.evict(connection)
+
+    def touch(self, key: str):
+        """Marks a cached response as fresh, used when the server answers 304 Not Modified"""
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute("UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+
+    def evict(self, connection: sqlite3.Connection):
+        """Removes the least recently used responses until the cache fits in its maximum size"""
+        total_size = connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        evicted_keys, evicted_hashes = [], set()
+        responses = connection.execute("SELECT key, body_hash, size FROM responses ORDER BY accessed_at").fetchall()
+        for key, body_hash, size in responses:
+            if total_size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            evicted_hashes.add(body_hash)
+            total_size -= size
+        connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        for body_hash in evicted_hashes:
+            # Bodies are shared between responses with the same content
+            if not connection.execute("SELECT 1 FROM responses WHERE body_hash = ?", (body_hash,)).fetchone():
+                self.get_body_path(body_hash).unlink(missing_ok=True)
+        self.logger.info(f"Evicted {len(evicted_keys)} responses from the HTTP cache")
+
+
+class CachedSession(requests.Session):
+    """
+    requests Session that answers from the HTTPCache while the cached responses are fresh (younger than the ttl)
+    Stale responses are revalidated with conditional requests (ETag / Last-Modified)
+    Only used when settings.HTTP_CACHE_ENABLED is set (e.g. while developing), so the scheduled loads always get
+    the current data
+    In offline mode every request is answered from the cache, no matter how old the response is
+    """
+
+    # POSTs are never cached, they are the search forms of the sources and their results change with every session
+    CACHED_METHODS = {"GET"}
+
+    def __init__(self, ttl: int = None):
+        super().__init__()
+        self.ttl = ttl
+
+    def send(self, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        offline = HTTPCache.is_offline()
+        if request.method not in self.CACHED_METHODS:
+            if offline:
+                raise OfflineCacheMiss(f"{request.method} requests are not cached", request=request)
+            return super().send(request, **kwargs)
+        if not settings.HTTP_CACHE_ENABLED and not offline:
+            return super().send(request, **kwargs)
+        cache = HTTPCache.get_instance()
+        key = cache.get_key(request)
+        cached = cache.get(key)
+        if cache.offline:
+            if not cached:
+                raise OfflineCacheMiss(f"{request.method} {request.url} is not cached", request=request)
+            return self.build_response(request, cached)
+        ttl = cache.default_ttl if self.ttl is None else self.ttl
+        if cached and time.time() - cached["fetched_at"] < ttl:
+            return self.build_response(request, cached)
+        if cached:
+            request = self.add_validators(request, cached)
+        response = super().send(request, **kwargs)
+        if cached and response.status_code == 304:
+            cache.touch(key)
+            return self.build_response(request, cached)
+        if response.status_code in cache.CACHED_STATUS_CODES:
+            cache.set(key, response)
+        return response
+
+    def add_validators(self, request: requests.PreparedRequest, cached: dict) -> requests.PreparedRequest:
+        headers = CaseInsensitiveDict(cached["headers"])
+        request = request.copy()
+        if headers.get("ETag"):
+            request.headers["If-None-Match"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            request.headers["If-Modified-Since"] = headers["Last-Modified"]
+        return request
+
+    def build_response(self, request: requests.PreparedRequest, cached: dict) -> requests.Response:
+        response = requests.Response()
+        response.status_code = cached["status"]
+        response.headers = CaseInsensitiveDict(cached["headers"])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = cached["url"]
+        response.request = request
+        response._content = cached["body"]
+        response._content_consumed = True
+        response.from_cache = True
+        return response
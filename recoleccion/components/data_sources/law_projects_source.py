@@ -2,7 +2,6 @@ import re
 import datetime as dt
 import time
 from typing import List
-import requests
 import pandas as pd
 import datetime as dt
 from bs4 import BeautifulSoup
@@ -11,15 +10,18 @@ from dateutil.parser import parse, ParserError
 # Project
 from recoleccion.components.utils import digitize_text
 from recoleccion.components.data_sources import DataSource
+from recoleccion.components.data_sources.datastore_reader import DatastoreReader
+from recoleccion.components.data_sources.http_cache import ONE_HOUR, ONE_WEEK
 import logging
 from recoleccion.utils.enums.project_chambers import ProjectChambers
 from recoleccion.utils.enums.project_status import ProjectStatus
 
 
 class HCDNLawProjects(DataSource):
+    cache_ttl = ONE_WEEK
     ATTEMPTS = 0
-    PROJECT_BASE_URL = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=22b2d52c-7a0e-426b-ac0a-a3326c388ba6&limit=100000000"
-    PROJECT_EXTRA_URL = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=daf0e90e-d94f-4186-b7cf-dfad5b6f9369&limit=100000000"
+    PROJECT_BASE_RESOURCE_ID = "22b2d52c-7a0e-426b-ac0a-a3326c388ba6"
+    PROJECT_EXTRA_RESOURCE_ID = "daf0e90e-d94f-4186-b7cf-dfad5b6f9369"
 
     column_mappings = {
         "expediente_diputados": "deputies_project_id",
@@ -53,19 +55,17 @@ class HCDNLawProjects(DataSource):
 
     @classmethod
     def get_projects_base_data(cls) -> pd.DataFrame:
-        response = requests.get(cls.PROJECT_BASE_URL)
-        data = response.json()["result"]["records"]
-        df = pd.DataFrame(data)
-        df = df[df["proyecto_tipo"] == "LEY"]
+        reader = DatastoreReader(cls.PROJECT_BASE_RESOURCE_ID, cls.session, dtypes={"proyecto_tipo": "category"})
+        # Only the law projects are kept, chunk by chunk
+        df = reader.read(chunk_filter=lambda chunk: chunk[chunk["proyecto_tipo"] == "LEY"])
         cls.logger.info(f"Base LAW projects data size: {len(df.shape)}")
         return df
 
     @classmethod
     def get_projects_extra_data(cls) -> pd.DataFrame:
-        response = requests.get(cls.PROJECT_EXTRA_URL)
-        data = response.json()["result"]["records"]
+        data = DatastoreReader(cls.PROJECT_EXTRA_RESOURCE_ID, cls.session).read()
         cls.logger.info(f"Extra projects data size: {len(data)}")
-        return pd.DataFrame(data)
+        return data
 
     @classmethod
     def get_raw_data(cls) -> pd.DataFrame:
@@ -102,7 +102,7 @@ class ExternalLawProjectsSource(DataSource):
         cls.logger.info(f"Requesting url: {url}")
         attempts = 0
         while True:
-            response = requests.get(url)
+            response = cls.session.get(url)
             if response.status_code == 200:
                 return response.content
             print(f"Request failed with status code: {response.status_code}")
@@ -240,7 +240,6 @@ class ExternalLawProjectsSource(DataSource):
 
 
 class DeputyLawProjectsSource(DataSource):
-    session = requests.Session()
     BASE_URL = "https://www.diputados.gov.ar/proyectos/resultado.html"
     POST_HEADERS = {
         "Referer": "https://www.diputados.gov.ar/proyectos/index.html",
@@ -355,7 +354,7 @@ class DeputyLawProjectsSource(DataSource):
 
 class SenateLawProjectsSource(DataSource):
     def __init__(self, threading=True):
-        self.session = requests.Session()
+        self.session = self.get_session()
         self.threading = threading
         self.logger = logging.getLogger(__name__)
         self.deputies_exp = re.compile(self.DEPUTIES_PROJECT_ID_PATTERN)
@@ -530,8 +529,9 @@ class SenateLawProjectsSource(DataSource):
 
 
 class LawProjectsStatusSource(DataSource):
-    BASE_PROJECTS_URL = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=22b2d52c-7a0e-426b-ac0a-a3326c388ba6&limit=1000000"
-    PROJECTS_RESULT_URL = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=daf0e90e-d94f-4186-b7cf-dfad5b6f9369&limit=1000000"
+    cache_ttl = ONE_HOUR  # used to update the projects status
+    BASE_PROJECTS_RESOURCE_ID = "22b2d52c-7a0e-426b-ac0a-a3326c388ba6"
+    PROJECTS_RESULT_RESOURCE_ID = "daf0e90e-d94f-4186-b7cf-dfad5b6f9369"
 
     column_mappings = {
         "exp_diputados": "project_id",
@@ -539,21 +539,27 @@ class LawProjectsStatusSource(DataSource):
     }
 
     def __init__(self):
-        self.session = requests.Session()
+        self.session = self.get_session()
 
     def _get_projects_base_data(self):
-        request = self.session.get(self.BASE_PROJECTS_URL)
-        data = request.json()["result"]["records"]
-        df = pd.DataFrame(data)
+        reader = DatastoreReader(
+            self.BASE_PROJECTS_RESOURCE_ID,
+            self.session,
+            columns=["proyecto_id", "exp_diputados", "tipo_proyecto"],
+            dtypes={"tipo_proyecto": "category"},
+        )
+        df = reader.read()
         self.logger.info(f"Projects base data size: {len(df)}")
-        df = df[["proyecto_id", "exp_diputados", "tipo_proyecto"]]
         return df
 
     def _get_projects_results_data(self):
-        request = self.session.get(self.PROJECTS_RESULT_URL)
-        data = request.json()["result"]["records"]
-        df = pd.DataFrame(data)
-        df = df[["expediente_id", "resultado"]]
+        reader = DatastoreReader(
+            self.PROJECTS_RESULT_RESOURCE_ID,
+            self.session,
+            columns=["expediente_id", "resultado"],
+            dtypes={"resultado": "category"},
+        )
+        df = reader.read()
         self.logger.info(f"Projects results data size: {len(df)}")
         df["resultado"] = df["resultado"].apply(lambda x: self._translate_project_status(x))
         df = df.loc[df["resultado"].notnull()]
@@ -1,4 +1,5 @@
 from recoleccion.components.data_sources import DataSource
+from recoleccion.components.data_sources.http_cache import CachedSession, ONE_MONTH
 from bs4 import BeautifulSoup
 import requests
 from recoleccion.utils.pdf_reader import Pdf
@@ -13,6 +14,7 @@ class LawProjectsText(DataSource):
     # Base class for law projects text sources
     # This class is not meant to be used directly
     # Contains common methods used for both deputies and senators law projects text sources
+    cache_ttl = ONE_MONTH  # the texts of the projects don't change
 
     @classmethod
     def _get_pdf_text(cls, url):
@@ -54,7 +56,7 @@ class LawProjectsText(DataSource):
 
 
 class DeputiesLawProjectsText(LawProjectsText):
-    session = requests.Session()
+    session = CachedSession(ttl=ONE_MONTH)
     retries = Retry(
         total=5,
         backoff_factor=0.1,
@@ -185,7 +187,6 @@ class DeputiesLawProjectsText(LawProjectsText):
 
 
 class SenateLawProjectsText(LawProjectsText):
-    session = requests.Session()
     domain = "https://www.senado.gob.ar"
     base_url = "https://www.senado.gob.ar/parlamentario/comisiones/verExp/{number}.{year}/{source}/PL"
 
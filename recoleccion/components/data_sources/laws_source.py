@@ -6,11 +6,14 @@ import logging
 
 # Project
 from recoleccion.components.data_sources import DataSource
+from recoleccion.components.data_sources.datastore_reader import DatastoreReader
+from recoleccion.components.data_sources.http_cache import ONE_WEEK
 
 logger = logging.getLogger(__name__)
 
 
 class LawSource(DataSource):
+    cache_ttl = ONE_WEEK
     column_mappings = {
         "ley": "law_number",
         "titulo": "title",
@@ -25,22 +28,16 @@ class LawSource(DataSource):
 
     @classmethod
     def get_publication_data(cls):
-        url = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=cbf78f72-1098-4e84-99e7-695d6d65a02a&limit=10000"
-        response = requests.get(url)
-        data = response.json()["result"]["records"]
-        return pd.DataFrame(data)
+        return DatastoreReader("cbf78f72-1098-4e84-99e7-695d6d65a02a", cls.session).read()
 
     @classmethod
     def get_laws_data(cls):
-        url = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=3dc4e8e1-2148-4bf0-b9c9-f19cafc6ff8e&limit=10000"
-        response = requests.get(url)
-        data = response.json()["result"]["records"]
-        return pd.DataFrame(data)
+        return DatastoreReader("3dc4e8e1-2148-4bf0-b9c9-f19cafc6ff8e", cls.session).read()
 
     @classmethod
     def get_sanction_data(cls):
         url = "https://datos.hcdn.gob.ar/dataset/5b1d2f38-e23f-412c-a286-02ab9dcf6082/resource/68dfd7f8-91f3-4ecf-aebf-a860d1ca1a98/download/leyes_sancionadas1.5.csv"
-        response = requests.get(url)
+        response = cls.session.get(url)
         data = response.content
         df = pd.read_csv(io.StringIO(data.decode("utf-8")))
         reduced_df = df[["ley", "expediente_inicial", "proyecto-id"]]
@@ -69,7 +66,6 @@ class LawSource(DataSource):
 
 
 class GovernmentLawSource(DataSource):
-    session = requests.Session()
     BASE_URL = (
         "https://www.argentina.gob.ar/normativa/buscar?jurisdiccion=nacional&tipo_norma=leyes&limit=50&offset={offset}"
     )
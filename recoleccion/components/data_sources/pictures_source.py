@@ -1,4 +1,3 @@
-import requests
 import pandas as pd
 from typing import List
 from bs4 import BeautifulSoup
@@ -23,7 +22,7 @@ class LegislatorsPictureSource(DataSource):
 
     @classmethod
     def _get_deputies_pictures(cls):
-        response = requests.get(cls.DEPUTIES_URL)
+        response = cls.session.get(cls.DEPUTIES_URL)
         deputies_pictures = []
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, "html.parser")
@@ -43,7 +42,7 @@ class LegislatorsPictureSource(DataSource):
 
     @classmethod
     def _get_senators_pictures(cls):
-        response = requests.get(cls.SENATORS_URL)
+        response = cls.session.get(cls.SENATORS_URL)
         senators_pictures = []
         if response.status_code == 200:
             soup = BeautifulSoup(response.text, "html.parser")
@@ -1,4 +1,3 @@
-import requests
 import pandas as pd
 from bs4 import BeautifulSoup
 
@@ -21,7 +20,7 @@ class SenateHistory(DataSource):
 
     @classmethod
     def get_raw_data(cls) -> pd.DataFrame:
-        response = requests.get(cls.url)
+        response = cls.session.get(cls.url)
         data = response.json()["table"]["rows"]
         cls.logger.info(f"{len(data)} senator seats were retrieved from {cls.url}")
         return pd.DataFrame(data)
@@ -61,7 +60,7 @@ class CurrentSenate(DataSource):
 
     @classmethod
     def get_raw_data(cls) -> pd.DataFrame:
-        response = requests.get(cls.url)
+        response = cls.session.get(cls.url)
         data = response.json()["table"]["rows"]
         cls.logger.info(f"{len(data)} senators were retrieved from {cls.url}")
         return pd.DataFrame(data)
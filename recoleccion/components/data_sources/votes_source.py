@@ -1,7 +1,6 @@
 import io
 import re
-from typing import List, Tuple
-import requests
+from typing import Iterator, List, Tuple
 import pandas as pd
 from bs4 import BeautifulSoup
 import PyPDF2
@@ -10,6 +9,9 @@ import datetime as dt
 
 # Project
 from recoleccion.components.data_sources import DataSource
+from recoleccion.components.data_sources.async_fetcher import AsyncFetcher
+from recoleccion.components.data_sources.datastore_reader import DatastoreReader
+from recoleccion.components.data_sources.http_cache import ONE_WEEK
 from recoleccion.components.utils import capitalize_text, trim_extra_spaces
 from recoleccion.utils.enums.project_chambers import ProjectChambers
 from recoleccion.utils.enums.vote_types import VoteTypes
@@ -18,10 +20,12 @@ from recoleccion.utils.enums.provinces import Provinces
 
 
 class DatasetVotesSource(DataSource):
+    cache_ttl = ONE_WEEK
     column_mappings = {
-        "expediente": "project_id",
+        "expediente": "deputies_project_id",
+        "fecha": "date",
         "diputado_nombre": "diputado_nombre",  # igual después se divide en name y last_name
-        "bloque": "party",
+        "bloque": "party_name",
         "distrito_nombre": "province",
         "voto": "vote",
         "titulo": "reference_description",
@@ -39,29 +43,30 @@ class DatasetVotesSource(DataSource):
         name, last_name = trim_extra_spaces(name), trim_extra_spaces(last_name)
         return name, last_name
 
+    @classmethod
+    def get_vote_details_reader(cls) -> DatastoreReader:
+        return DatastoreReader(
+            "f86728ed-d4b9-479e-b939-a9841fd6d8d3",
+            cls.session,
+            columns=["acta_id", "diputado_nombre", "bloque", "distrito_nombre", "voto"],
+            dtypes={"bloque": "category", "distrito_nombre": "category", "voto": "category"},
+        )
+
     @classmethod
     def get_vote_details_data(cls):
-        url = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=f86728ed-d4b9-479e-b939-a9841fd6d8d3&limit=1000000"
-        response = requests.get(url)
-        data = response.json()["result"]["records"]
-        df = pd.DataFrame(data)
-        return df[["acta_id", "diputado_nombre", "bloque", "distrito_nombre", "voto"]]
+        return cls.get_vote_details_reader().read()
 
     @classmethod
     def get_vote_header_data(cls):
-        url = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=59c05ba8-ad0a-4d55-803d-20e3fe464d0b&limit=1000000"
-        response = requests.get(url)
-        data = response.json()["result"]["records"]
-        df = pd.DataFrame(data)
-        return df[["acta_id", "fecha"]]
+        reader = DatastoreReader("59c05ba8-ad0a-4d55-803d-20e3fe464d0b", cls.session, columns=["acta_id", "fecha"])
+        return reader.read()
 
     @classmethod
     def get_file_info(cls):
-        url = "https://datos.hcdn.gob.ar:443/api/3/action/datastore_search?resource_id=f03e828b-c139-41ad-8063-f77f7ed3e009&limit=10000000"
-        response = requests.get(url)
-        data = response.json()["result"]["records"]
-        df = pd.DataFrame(data)
-        return df[["acta_id", "expediente", "titulo"]]
+        reader = DatastoreReader(
+            "f03e828b-c139-41ad-8063-f77f7ed3e009", cls.session, columns=["acta_id", "expediente", "titulo"]
+        )
+        return reader.read()
 
     @classmethod
     def add_reference_description(cls, reference_description: str):
@@ -98,27 +103,37 @@ class DatasetVotesSource(DataSource):
         return data
 
     @classmethod
-    def get_data(cls):
-        vote_details_data = cls.get_vote_details_data()
-        cls.logger.info(f"Vote details data size: {len(vote_details_data)}")
+    def iter_data(cls) -> Iterator[pd.DataFrame]:
+        """
+        Yields the votes in chunks, as the vote details are read from the datastore
+        Only the headers and the file info (one row per voting session) are read completely
+        """
         vote_header_data = cls.get_vote_header_data()
         cls.logger.info(f"Vote header data size: {len(vote_header_data)}")
-        data = vote_details_data.merge(vote_header_data, on="acta_id", how="left")
-        cls.logger.info(f"First merge data size: {len(data)}")
         file_info = cls.get_file_info()
         cls.logger.info(f"File info data size: {len(file_info)}")
-        data = data.merge(file_info, on="acta_id", how="left")
-        cls.logger.info(f"Second merge data size: {len(data)}")
-        data = cls.get_and_rename_relevant_columns(data)
-        data = cls.clean_data(data)
-        data["source"] = "HCDN"
-        data["chamber"] = ProjectChambers.DEPUTIES
+        for vote_details_data in cls.get_vote_details_reader().iter_chunks():
+            data = vote_details_data.merge(vote_header_data, on="acta_id", how="left")
+            data = data.merge(file_info, on="acta_id", how="left")
+            data = cls.get_and_rename_relevant_columns(data)
+            data = cls.clean_data(data)
+            data["source"] = "HCDN"
+            data["chamber"] = ProjectChambers.DEPUTIES
+            yield data
+
+    @classmethod
+    def get_data(cls):
+        data = pd.concat(cls.iter_data(), ignore_index=True)
+        cls.logger.info(f"Votes data size: {len(data)}")
         return data
 
 
 class DeputyVotesSource(DataSource):
     BASE_URL = "https://votaciones.hcdn.gob.ar/votaciones/search"
     ALTERNATIVE_URL = "http://host.docker.internal:8001/scrape-page/"
+    FETCH_CONCURRENCY = 16
+    FETCH_CONCURRENCY_PER_HOST = 4
+    FETCH_HOST_DELAY = 0.1  # seconds between the requests to the same host
     column_mappings = {
         "expediente": "project_id",
         "diputado_nombre": "diputado_nombre",  # igual después se divide en name y last_name
@@ -170,9 +185,8 @@ class DeputyVotesSource(DataSource):
         return vote_info
 
     @classmethod
-    def get_project_votes_info(cls, link: str) -> List[dict]:
-        response = requests.get(link)
-        soup = BeautifulSoup(response.text, "html.parser")
+    def parse_project_votes_info(cls, link: str, html: str) -> List[dict]:
+        soup = BeautifulSoup(html, "html.parser")
         try:
             project_info_box = soup.find_all("div", class_="white-box")[0]
         except Exception as e:
@@ -207,9 +221,8 @@ class DeputyVotesSource(DataSource):
                 second_column_values.append(title)
 
     @classmethod
-    def get_references_from_pdf(cls, pdf_link: str) -> str:
-        response = requests.get(pdf_link)
-        pdf_stream = io.BytesIO(response.content)
+    def parse_references_from_pdf(cls, pdf_link: str, pdf_content: bytes) -> dict:
+        pdf_stream = io.BytesIO(pdf_content)
         try:
             pdf_reader = PyPDF2.PdfReader(pdf_stream)
         except Exception as e:
@@ -305,6 +318,17 @@ class DeputyVotesSource(DataSource):
             details_links.append(detail_link)
         return projects_ids, pdf_links, details_links
 
+    @classmethod
+    def fetch_pages(cls, links: List[str | None]) -> list:
+        """Fetches the links concurrently, the responses come in the same order as the links (None if missing)"""
+        fetcher = AsyncFetcher(
+            cls.session,
+            max_concurrency=cls.FETCH_CONCURRENCY,
+            max_concurrency_per_host=cls.FETCH_CONCURRENCY_PER_HOST,
+            host_delay=cls.FETCH_HOST_DELAY,
+        )
+        return fetcher.fetch_all(links)
+
     @classmethod
     def get_year_info(cls, year: int):
         # Make the HTTP request
@@ -317,7 +341,7 @@ class DeputyVotesSource(DataSource):
             cls.logger.info(f"Requesting info for year {year}...")
             # response = requests.post(cls.BASE_URL, {"anoSearch": str(year)})
             body = {"year": str(year)}
-            response = requests.post(cls.ALTERNATIVE_URL, body)
+            response = cls.session.post(cls.ALTERNATIVE_URL, body)
             response_body = response.json()["content"]
             cls.last_retrieved_year = year
             cls.get_last_retrieved_body = response_body
@@ -325,14 +349,26 @@ class DeputyVotesSource(DataSource):
         soup = BeautifulSoup(response_body, "html.parser")
         table_data_element = soup.find(id="table-data")
         projects_ids, pdf_links, details_links = cls.get_rows_info(table_data_element)
-        all_links = zip(projects_ids, details_links, pdf_links)
+        # The detail pages are fetched concurrently, then the PDFs of the votes whose projects aren't in the table
+        details_responses = cls.fetch_pages(details_links)
+        projects_votes_info = [
+            cls.parse_project_votes_info(details_link, details_response.text) if details_response is not None else None
+            for details_link, details_response in zip(details_links, details_responses)
+        ]
+        needed_pdf_links = [
+            pdf_link if project_votes_info and not project_ids else None
+            for project_ids, pdf_link, project_votes_info in zip(projects_ids, pdf_links, projects_votes_info)
+        ]
+        pdf_responses = cls.fetch_pages(needed_pdf_links)
+        all_links = zip(projects_ids, needed_pdf_links, projects_votes_info, pdf_responses)
         year_votes_info = []
-        for project_ids, details_link, pdf_link in all_links:
-            project_votes_info = cls.get_project_votes_info(details_link)
+        for project_ids, pdf_link, project_votes_info, pdf_response in all_links:
             if project_ids:
                 references = {"project_ids": project_ids, "day_orders": []}
+            elif pdf_response is not None:
+                references = cls.parse_references_from_pdf(pdf_link, pdf_response.content)
             else:
-                references = cls.get_references_from_pdf(pdf_link)
+                references = None
             if not references or not project_votes_info:
                 cls.logger.warning(f"Skipping project {project_ids}...")
                 continue
@@ -377,7 +413,6 @@ class SenateVotesSource(DataSource):
         "voto": "vote",
         "titulo": "reference_description",
     }
-    session = requests.Session()
 
     @classmethod
     def make_base_request(cls):
@@ -433,7 +468,7 @@ class SenateVotesSource(DataSource):
     def get_project_ids_from_day_order(cls, link: str):
         base_url = "https://www.senado.gob.ar"
         url = base_url + link
-        response = requests.get(url)
+        response = cls.session.get(url)
         soup = BeautifulSoup(response.text, "html.parser")
         table = soup.find("table")
         if not table:  # algunas ordenes no tienen expedientes asociados
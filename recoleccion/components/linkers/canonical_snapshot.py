@@ -0,0 +1,140 @@
+import logging
+import threading
+from collections import OrderedDict
+from django.db.models import Count, Max, Model, QuerySet
+from django.db.models.signals import post_delete, post_save
+
+# Project
+from recoleccion.components.utils import unidecode_text
+from recoleccion.models import Person
+from recoleccion.models.party import PartyDenomination
+
+
+class CanonicalSnapshot:
+    """
+    Process-wide snapshot of the canonical data of a linker, shared by every linker instance and thread
+    It is loaded once with a single query and then kept fresh incrementally: the post_save and post_delete
+    signals of the model only mark the changed ids, which are reloaded (with one query) the next time it is read
+    Changes that do not send signals (bulk operations, other processes, rolled back transactions) are detected
+    when the records are read (get_records, once per linking) by comparing the amount of rows, the maximum id and
+    the last modified_at of the table with the ones of the snapshot, with a single aggregate, and in that case the
+    snapshot is loaded again
+    QuerySet.update() calls are only detected if they set modified_at (like the bulk writers do), the writers
+    that change the records in bulk also invalidate the snapshot
+    The records are never modified once they are returned, a new dict is built when there are changes
+    """
+
+    model: type[Model] = None
+    _instances = {}
+    _instances_lock = threading.Lock()
+    logger = logging.getLogger(__name__)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = None  # canonical index -> record, in the format used by the linker
+        self.indexes = {}  # model id -> canonical index
+        self.changed_ids = set()
+        self.next_index = 0
+        self.last_modified = None  # the last modified_at of the loaded records
+
+    @classmethod
+    def get_instance(cls) -> "CanonicalSnapshot":
+        with CanonicalSnapshot._instances_lock:
+            if cls not in CanonicalSnapshot._instances:
+                instance = cls()
+                post_save.connect(instance.mark_changed, sender=cls.model, weak=False, dispatch_uid=cls.__name__)
+                post_delete.connect(instance.mark_changed, sender=cls.model, weak=False, dispatch_uid=cls.__name__)
+                CanonicalSnapshot._instances[cls] = instance
+            return CanonicalSnapshot._instances[cls]
+
+    def get_queryset(self) -> QuerySet:
+        """Returns the rows needed to build the records, as tuples starting with the id and the modified_at"""
+        raise NotImplementedError
+
+    def build_record(self, row: tuple) -> dict:
+        raise NotImplementedError
+
+    def mark_changed(self, sender, instance: Model, **kwargs):
+        with self.lock:
+            self.changed_ids.add(instance.pk)
+
+    def invalidate(self):
+        with self.lock:
+            self.records = None
+
+    def get_records(self) -> OrderedDict:
+        with self.lock:
+            self.refresh()
+            return self.records
+
+    def refresh(self):
+        if self.records is not None and self.changed_ids:
+            self.apply_changes()
+        if self.records is None or not self.is_up_to_date():
+            self.load()
+
+    def is_up_to_date(self) -> bool:
+        stats = self.model.objects.aggregate(count=Count("id"), max_id=Max("id"), last_modified=Max("modified_at"))
+        return (
+            stats["count"] == len(self.indexes)
+            and stats["max_id"] == max(self.indexes, default=None)
+            and stats["last_modified"] == self.last_modified
+        )
+
+    def update_last_modified(self, modified_at):
+        if modified_at and (self.last_modified is None or modified_at > self.last_modified):
+            self.last_modified = modified_at
+
+    def load(self):
+        self.changed_ids = set()
+        self.records, self.indexes = OrderedDict(), {}
+        self.last_modified = None
+        for index, row in enumerate(self.get_queryset().order_by("id")):
+            self.records[index] = self.build_record(row)
+            self.indexes[row[0]] = index
+            self.update_last_modified(row[1])
+        self.next_index = len(self.records)
+        self.logger.info(f"Loaded {len(self.records)} canonical records for {self.__class__.__name__}")
+
+    def apply_changes(self):
+        changed_ids, self.changed_ids = self.changed_ids, set()
+        rows = {row[0]: row for row in self.get_queryset().filter(id__in=changed_ids)}
+        records, indexes = OrderedDict(self.records), dict(self.indexes)
+        for changed_id in sorted(changed_ids):
+            index = indexes.get(changed_id)
+            if changed_id not in rows:  # deleted
+                if index is not None:
+                    del records[index]
+                    del indexes[changed_id]
+                continue
+            if index is None:
+                index = indexes[changed_id] = self.next_index
+                self.next_index += 1
+            records[index] = self.build_record(rows[changed_id])
+            self.update_last_modified(rows[changed_id][1])
+        self.records, self.indexes = records, indexes
+        self.logger.info(f"Updated {len(changed_ids)} canonical records for {self.__class__.__name__}")
+
+
+class PersonCanonicalSnapshot(CanonicalSnapshot):
+    model = Person
+
+    def get_queryset(self) -> QuerySet:
+        return Person.objects.values_list("id", "modified_at", "normalized_full_name", "name", "last_name")
+
+    def build_record(self, row: tuple) -> dict:
+        person_id, _, normalized_full_name, name, last_name = row
+        # The name is only normalized here for persons written without save (like bulk_create)
+        return {"id": person_id, "full_name": normalized_full_name or Person.normalize_full_name(name, last_name)}
+
+
+class PartyCanonicalSnapshot(CanonicalSnapshot):
+    model = PartyDenomination
+
+    def get_queryset(self) -> QuerySet:
+        # party_id is read from the denomination row, instead of accessing the party of every denomination
+        return PartyDenomination.objects.values_list("id", "modified_at", "denomination", "party_id")
+
+    def build_record(self, row: tuple) -> dict:
+        _, _, denomination, party_id = row
+        return {"denomination": unidecode_text(denomination), "party_id": party_id}
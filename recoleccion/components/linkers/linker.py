@@ -1,13 +1,31 @@
-from typing import List
-from dedupe import Gazetteer, console_label
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+from io import BytesIO
+from typing import List, Tuple
+from dedupe import Gazetteer, StaticGazetteer, console_label, serializer
+import hashlib
+import json
+import math
+import multiprocessing
 import os
+import threading
 import pandas as pd
+from django.conf import settings
 
 # Project
+from recoleccion.components.linkers.trigram_matcher import TrigramMatcher
+from recoleccion.components.search_process import init_search_process, search_shard
+from recoleccion.components.utils import chunk
 from recoleccion.exceptions.custom import IncompatibleLinkingDatasets
+from recoleccion.models import LinkingResolution
+from recoleccion.utils.enums.linking_resolution_sources import LinkingResolutionSources
 from recoleccion.utils.enums.linking_decision_options import LinkingDecisionOptions
 import logging
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows, where only the threads of the process are synchronized
+    fcntl = None
 
 class Linker:
     DUBIOUS_LOWER_LIMIT = 0.1
@@ -15,7 +33,26 @@ class Linker:
     MIN_ACCEPTABLE_LOWER_LIMIT = 0.05
     MIN_ACCEPTABLE_UPPER_LIMIT = 0.6
     TRAINING_DIR = "recoleccion/components/linkers/training"
+    SETTINGS_VERSION = 1
+    LINKING_DECISIONS_BATCH_SIZE = 500
+    SEARCH_SHARD_MIN_SIZE = 2000  # smaller datasets are searched in the current process
+    linking_decision_model = None  # LinkingDecision subclass
+    canonical_id_field = None  # field of the decision with the canonical id
+    messy_field = None  # field of the decision with the messy value
     logger = logging.getLogger(__name__)
+    DEDUPE_ENGINE = "dedupe"
+    TRIGRAM_ENGINE = "trigram"
+    ENGINES = [DEDUPE_ENGINE, TRIGRAM_ENGINE]
+    default_engine = None  # set by the commands with --linker-engine, settings.LINKER_ENGINE is used otherwise
+    engine = None
+    # Indexed gazetteers (and trigram matchers) shared by every linker instance of the process, by linker class name
+    _indexed_gazetteers = {}
+    _indexed_matchers = {}
+    _indexed_gazetteers_lock = threading.Lock()
+    _training_lock = threading.Lock()
+
+    def get_engine(self) -> str:
+        return self.engine or Linker.default_engine or settings.LINKER_ENGINE
 
     def clean_record(self, record):
         # for any record, returns name, last_name and id (only if it exists)
@@ -41,10 +78,122 @@ class Linker:
         new_training_pairs = {"distinct": clean_distinct_records, "match": clean_match_records}
         gazetteer.training_pairs = new_training_pairs
 
-    def _save_training(self, gazetteer: Gazetteer):
-        with open(f"{self.TRAINING_DIR}/{self.__class__.__name__}.json", "w", encoding="utf-8-sig") as f:
-            self.clean_training_pairs(gazetteer)
-            gazetteer.write_training(f)
+    def get_training_pair_key(self, pair: tuple) -> tuple:
+        return tuple(tuple(sorted(record.items())) for record in pair)
+
+    def deduplicate_training_pairs(self, training_pairs: dict) -> dict:
+        """
+        Keeps only the first label of every pair of records, like the clean_linker_duplicates command
+        (the distinct pairs come first, so a pair labeled both ways stays distinct)
+        """
+        seen_pairs = set()
+        unique_pairs = {"distinct": [], "match": []}
+        for label in ["distinct", "match"]:
+            for pair in training_pairs.get(label, []):
+                key = self.get_training_pair_key(pair)
+                if key not in seen_pairs:
+                    seen_pairs.add(key)
+                    unique_pairs[label].append(pair)
+        return unique_pairs
+
+    def read_training(self) -> dict:
+        file_dir = self.get_training_file_path()
+        if not os.path.exists(file_dir):
+            return {"distinct": [], "match": []}
+        with open(file_dir, encoding="utf-8-sig") as f:
+            return serializer.read_training(f)
+
+    def save_training(self, gazetteer: Gazetteer) -> bool:
+        """
+        Adds the labeled pairs of the gazetteer to the training file, without repeated pairs
+        The file is only written if there are new labels: to a temporary file first, which then replaces
+        the training file, under a lock shared by the threads and (where available) the processes
+        Returns whether the training file was written
+        """
+        self.clean_training_pairs(gazetteer)
+        file_dir = self.get_training_file_path()
+        with Linker._training_lock, open(f"{file_dir}.lock", "w") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            stored_pairs = self.deduplicate_training_pairs(self.read_training())
+            training_pairs = self.deduplicate_training_pairs(
+                {label: stored_pairs[label] + gazetteer.training_pairs[label] for label in stored_pairs}
+            )
+            if training_pairs == stored_pairs:
+                self.logger.info("There are no new labeled pairs, the training file is not written")
+                return False
+            temp_file_dir = f"{file_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_file_dir, "w", encoding="utf-8-sig") as f:
+                serializer.write_training(training_pairs, f)
+            os.replace(temp_file_dir, file_dir)
+        labeled_pairs = sum(len(pairs) for pairs in training_pairs.values())
+        self.logger.info(f"Saved {labeled_pairs} labeled pairs in {file_dir}")
+        return True
+
+    def get_training_file_path(self) -> str:
+        return f"{self.TRAINING_DIR}/{self.__class__.__name__}.json"
+
+    def get_settings_file_path(self) -> str:
+        return f"{self.TRAINING_DIR}/{self.__class__.__name__}.settings"
+
+    def get_settings_metadata_file_path(self) -> str:
+        return f"{self.TRAINING_DIR}/{self.__class__.__name__}.settings.json"
+
+    def get_training_hash(self) -> str | None:
+        file_dir = self.get_training_file_path()
+        if not os.path.exists(file_dir):
+            return None
+        with open(file_dir, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def get_canonical_fingerprint(self, canonical_data: dict) -> str:
+        serialized_data = json.dumps(list(canonical_data.items()), sort_keys=True, default=str)
+        return hashlib.sha256(serialized_data.encode("utf-8")).hexdigest()
+
+    def get_settings_metadata(self, canonical_data: dict) -> dict:
+        """
+        Returns the metadata that identifies a trained model:
+        if any of these values changes, the stored settings can not be reused
+        """
+        return {
+            "version": self.SETTINGS_VERSION,
+            "dedupe_version": version("dedupe"),
+            "training_hash": self.get_training_hash(),
+            "canonical_fingerprint": self.get_canonical_fingerprint(canonical_data),
+        }
+
+    def read_settings(self, metadata: dict) -> bytes | None:
+        """Returns the stored settings, only if they were trained with the same metadata"""
+        settings_dir = self.get_settings_file_path()
+        metadata_dir = self.get_settings_metadata_file_path()
+        if not os.path.exists(settings_dir) or not os.path.exists(metadata_dir):
+            return None
+        with open(metadata_dir, encoding="utf-8") as f:
+            stored_metadata = json.load(f)
+        if stored_metadata != metadata:
+            self.logger.info("Stored linker settings are outdated")
+            return None
+        with open(settings_dir, "rb") as f:
+            return f.read()
+
+    def load_settings(self, metadata: dict) -> StaticGazetteer | None:
+        """Returns a StaticGazetteer from the stored settings, only if they were trained with the same metadata"""
+        settings_data = self.read_settings(metadata)
+        return StaticGazetteer(BytesIO(settings_data)) if settings_data else None
+
+    def save_settings(self, gazetteer: Gazetteer, metadata: dict):
+        # Written to temporary files first, so other processes never read half-written settings
+        settings_dir = self.get_settings_file_path()
+        metadata_dir = self.get_settings_metadata_file_path()
+        temp_settings_dir = f"{settings_dir}.{os.getpid()}.tmp"
+        temp_metadata_dir = f"{metadata_dir}.{os.getpid()}.tmp"
+        with open(temp_settings_dir, "wb") as f:
+            gazetteer.write_settings(f)
+        with open(temp_metadata_dir, "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        os.replace(temp_settings_dir, settings_dir)
+        os.replace(temp_metadata_dir, metadata_dir)
+        self.logger.info(f"Saved trained linker settings in {settings_dir}")
 
     def get_canonical_data(self, alternative_format=False):
         return self.canonical_data
@@ -54,12 +203,61 @@ class Linker:
         raise NotImplementedError
 
     def train(self, messy_data):
+        """
+        Leaves self.gazetteer ready to search, indexed with the canonical data
+        The trained settings are stored next to the training file and reused (as a StaticGazetteer) while
+        neither the training file nor the canonical data change. The indexed gazetteer is also shared
+        by every instance of the linker in the process, so it is only trained and indexed once.
+        """
+        canonical_data = self.get_canonical_data()
+        self.canonical_data = canonical_data  # the classification uses the same records that are indexed
+        if self.get_engine() == self.TRIGRAM_ENGINE:
+            self.gazetteer = self.get_trigram_matcher(canonical_data)
+            return
+        metadata = self.get_settings_metadata(canonical_data)
+        class_name = self.__class__.__name__
+        with Linker._indexed_gazetteers_lock:
+            indexed_metadata, indexed_gazetteer = Linker._indexed_gazetteers.get(class_name, (None, None))
+            if indexed_metadata == metadata:
+                self.logger.info(f"Reusing the indexed gazetteer of {class_name}")
+                self.gazetteer = indexed_gazetteer
+                return
+            if metadata["training_hash"] is None:
+                # Active learning is used, the labels are saved so the next trainings start from the file
+                self._train(messy_data, canonical_data)
+                self.save_training(self.gazetteer)
+                self.gazetteer.cleanup_training()
+                self.gazetteer.index(canonical_data)
+                return
+            static_gazetteer = self.load_settings(metadata)
+            if static_gazetteer:
+                self.logger.info(f"Loaded stored settings for {class_name}")
+                self.gazetteer = static_gazetteer
+            else:
+                self._train(messy_data, canonical_data)
+                self.save_settings(self.gazetteer, metadata)
+                self.gazetteer.cleanup_training()  # the training comes from the file, there is nothing new to save
+            self.gazetteer.index(canonical_data)
+            Linker._indexed_gazetteers[class_name] = (metadata, self.gazetteer)
+
+    def get_trigram_matcher(self, canonical_data: dict) -> TrigramMatcher:
+        """The trigram matcher needs no training, it is only indexed again when the canonical data changes"""
+        fingerprint = self.get_canonical_fingerprint(canonical_data)
+        class_name = self.__class__.__name__
+        with Linker._indexed_gazetteers_lock:
+            indexed_fingerprint, matcher = Linker._indexed_matchers.get(class_name, (None, None))
+            if indexed_fingerprint != fingerprint:
+                matcher = TrigramMatcher(self.fields[0]["field"])
+                matcher.index(canonical_data)
+                Linker._indexed_matchers[class_name] = (fingerprint, matcher)
+        return matcher
+
+    def _train(self, messy_data, canonical_data):
         # if len(messy_data) > len(self.canonical_data):
         #     raise LinkingException(
         #         f"There are more messy records ({len(messy_data)}) than canonical record ({len(self.canonical_data)})"
         #     )
-        file_dir = f"{self.TRAINING_DIR}/{self.__class__.__name__}.json"
-        canonical_data = self.get_canonical_data()
+        file_dir = self.get_training_file_path()
 
         if os.path.exists(file_dir):
             with open(file_dir, encoding="utf-8-sig") as f:
@@ -74,18 +272,138 @@ class Linker:
                 self.logger.info("Not enough data to train the Gazetteer, skipping linking...")
                 raise IncompatibleLinkingDatasets()
             raise e
-        self.gazetteer.index(canonical_data)
+
+    def search(self, messy_data: dict) -> List[tuple]:
+        """
+        Returns the best match of every messy record, as (messy index, ((canonical index, confidence),)) tuples
+        Big datasets are split in shards, searched by a pool of processes (settings.LINKER_SEARCH_PROCESSES)
+        The processes are spawned, not forked, so they are also safe inside the threaded pipelines and commands:
+        each one loads the stored settings of the gazetteer and indexes the canonical data once
+        The results are returned in the order of messy_data, no matter how they were searched
+        """
+        processes = min(settings.LINKER_SEARCH_PROCESSES, len(messy_data) // self.SEARCH_SHARD_MIN_SIZE)
+        process_args = self.get_search_process_args() if processes >= 2 else None
+        if process_args is None:
+            possible_mappings = list(self.gazetteer.search(messy_data, n_matches=1))
+        else:
+            possible_mappings = self.search_in_processes(messy_data, processes, process_args)
+        positions = {messy_data_index: position for position, messy_data_index in enumerate(messy_data)}
+        return sorted(possible_mappings, key=lambda mapping: positions[mapping[0]])
+
+    def get_search_process_args(self) -> tuple | None:
+        """Returns the arguments of init_search_process, or None if the gazetteer can't be loaded by the processes"""
+        field = self.fields[0]["field"]
+        if self.get_engine() == self.TRIGRAM_ENGINE:
+            return self.TRIGRAM_ENGINE, field, None, self.canonical_data
+        metadata, indexed_gazetteer = Linker._indexed_gazetteers.get(self.__class__.__name__, (None, None))
+        # A gazetteer trained with active learning has no stored settings
+        settings_data = self.read_settings(metadata) if indexed_gazetteer is self.gazetteer else None
+        if settings_data is None:
+            self.logger.info("The gazetteer has no stored settings, it is searched in the current process")
+            return None
+        return self.DEDUPE_ENGINE, field, settings_data, self.canonical_data
+
+    def search_in_processes(self, messy_data: dict, processes: int, process_args: tuple) -> List[tuple]:
+        shard_size = math.ceil(len(messy_data) / processes)
+        shards = [dict(shard) for shard in chunk(messy_data.items(), shard_size)]
+        self.logger.info(f"Searching {len(messy_data)} records in {len(shards)} processes")
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_search_process,
+            initargs=process_args,
+        ) as executor:
+            return [mapping for mappings in executor.map(search_shard, shards) for mapping in mappings]
 
     def no_real_matches(self, possible_mappings: List[tuple]):
         # If there is at least one match, then one of the tuples has, in its second element, a list with at least one
         return not any([len(x[1]) > 0 for x in possible_mappings])
 
-    def get_or_save_pending_linking_decision(self, canonical_record, messy_record):
+    def get_linking_decision_key(self, canonical_record: dict, messy_record: dict) -> tuple:
+        """Returns the (canonical id, messy value) pair that identifies the linking decision of the records"""
         raise NotImplementedError
 
+    def get_or_save_pending_linking_decisions(self, keys: set) -> dict:
+        """
+        Receives a set of linking decision keys (see get_linking_decision_key)
+        Fetches the existing decisions for the keys with one query (per batch of messy values)
+        and creates the missing ones, in PENDING state, with a single bulk_create
+        Returns a dict from every key to a tuple (decision, created)
+        """
+        model = self.linking_decision_model
+        canonical_ids = {canonical_id for canonical_id, _ in keys}
+        decisions = {}
+        for messy_values in chunk({messy_value for _, messy_value in keys}, self.LINKING_DECISIONS_BATCH_SIZE):
+            existing_decisions = model.objects.filter(
+                **{f"{self.canonical_id_field}__in": canonical_ids, f"{self.messy_field}__in": messy_values}
+            )
+            for decision in existing_decisions.order_by("id"):
+                key = (getattr(decision, self.canonical_id_field), getattr(decision, self.messy_field))
+                if key in keys and key not in decisions:
+                    decisions[key] = (decision, False)
+        new_decisions = [
+            model(**{self.canonical_id_field: canonical_id, self.messy_field: messy_value})
+            for canonical_id, messy_value in keys
+            if (canonical_id, messy_value) not in decisions
+        ]
+        for decision in model.objects.bulk_create(new_decisions, batch_size=self.LINKING_DECISIONS_BATCH_SIZE):
+            key = (getattr(decision, self.canonical_id_field), getattr(decision, self.messy_field))
+            decisions[key] = (decision, True)
+        self.logger.info(f"Found {len(keys) - len(new_decisions)} linking decisions, created {len(new_decisions)}")
+        return decisions
+
     def get_linking_key(self, canonical_data_index: int, messy_record: dict):
         raise NotImplementedError
 
+    def get_resolution_key(self, messy_record: dict) -> str:
+        """Returns the normalized messy value used as key of the stored resolutions"""
+        raise NotImplementedError
+
+    def load_resolved_matches(self, messy_data: dict) -> Tuple[pd.DataFrame, dict]:
+        """
+        Looks up the stored resolutions of the messy records (see save_resolutions), with one query per batch
+        Returns:
+            - A DF with the resolved records, with the canonical id in the canonical_id_field column
+            - A dict with the records that were never resolved (with the same format of messy_data)
+        """
+        keys = {index: self.get_resolution_key(record) for index, record in messy_data.items()}
+        resolved_ids = {}
+        for batch_keys in chunk(set(keys.values()), self.LINKING_DECISIONS_BATCH_SIZE):
+            resolutions = LinkingResolution.objects.filter(linker=self.__class__.__name__, messy_key__in=batch_keys)
+            resolved_ids.update(resolutions.values_list("messy_key", self.canonical_id_field))
+        resolved_data, unresolved_data = {}, {}
+        for index, messy_record in messy_data.items():
+            resolved_id = resolved_ids.get(keys[index])
+            if resolved_id is None:
+                unresolved_data[index] = messy_record
+            else:
+                resolved_data[index] = {**messy_record, self.canonical_id_field: resolved_id}
+        self.logger.info(f"Found {len(resolved_data)} previously resolved records")
+        return pd.DataFrame.from_dict(resolved_data, orient="index"), unresolved_data
+
+    def save_resolutions(self, messy_data: dict, resolutions: List[tuple]):
+        """Receives (messy index, canonical index, confidence, source) tuples and stores them as resolutions"""
+        if not resolutions:
+            return
+        new_resolutions = {}
+        for messy_data_index, canonical_data_index, confidence_score, resolved_by in resolutions:
+            key = self.get_resolution_key(messy_data[messy_data_index])
+            canonical_id = self.get_record_id(self.canonical_data[canonical_data_index])
+            new_resolutions[key] = LinkingResolution(
+                linker=self.__class__.__name__,
+                messy_key=key,
+                confidence=confidence_score,
+                resolved_by=resolved_by,
+                **{self.canonical_id_field: canonical_id},
+            )
+        LinkingResolution.objects.bulk_create(
+            new_resolutions.values(),
+            batch_size=self.LINKING_DECISIONS_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["linker", "messy_key"],
+            update_fields=[self.canonical_id_field, "confidence", "resolved_by", "modified_at"],
+        )
+
     def reset_index(self, data_as_dict: dict) -> dict:
         df = pd.DataFrame.from_dict(data_as_dict, orient="index")
         df = df.reset_index(drop=False)
@@ -104,7 +422,7 @@ class Linker:
         """
         if not messy_data:
             return [], [], []  # this means no linking, see the usage of this function
-        possible_mappings = self.gazetteer.search(messy_data, n_matches=1)
+        possible_mappings = self.search(messy_data)
         if self.no_real_matches(possible_mappings):
             return [], [], []  # this means no linking, see the usage of this function
         max_conf_pair = max(possible_mappings, key=lambda x: self.confidence(x))
@@ -119,50 +437,60 @@ class Linker:
         certain_matches = []
         dubious_matches = []
         distinct_matches = []
-        pending_decisions = {}
         created_linking_decisions = existent_linking_decisions = previously_used_decisions = 0
 
+        # The decisions of every dubious record are collected first, so they are fetched and created in bulk
+        classified_matches = []
+        decision_keys = {}  # linking key -> linking decision key, records with the same linking key share a decision
         for messy_data_index, possible_maps in possible_mappings:
             if len(possible_maps) == 0:
                 continue  # No matches
             canonical_data_index, confidence_score = possible_maps[0]  # Get the best match
+            messy_record = messy_data[messy_data_index]
+            canonical_record = self.canonical_data[canonical_data_index]
+            decision_key = None
+            if dubious_lower_limit < confidence_score < dubious_upper_limit:
+                if not self.are_the_same_record(messy_record, canonical_record):
+                    key = self.get_linking_key(canonical_data_index, messy_record)
+                    if key not in decision_keys:
+                        decision_keys[key] = self.get_linking_decision_key(canonical_record, messy_record)
+                    decision_key = decision_keys[key]
+            classified_matches.append((messy_data_index, canonical_data_index, confidence_score, decision_key))
+        pending_decisions = self.get_or_save_pending_linking_decisions(set(decision_keys.values()))
+
+        resolutions = []  # the certain matches, stored so the same messy values skip the Gazetteer next time
+        gazetteer, approved = LinkingResolutionSources.GAZETTEER, LinkingResolutionSources.APPROVED_DECISION
+
+        for messy_data_index, canonical_data_index, confidence_score, decision_key in classified_matches:
             messy_record = messy_data[messy_data_index]
             canonical_record = self.canonical_data[canonical_data_index]
             # hay que agregar este primer paso para que deje de preguntar por los que ya son iguales
             if self.are_the_same_record(messy_record, canonical_record):
                 certain_matches.append((messy_data_index, canonical_data_index))
+                resolutions.append((messy_data_index, canonical_data_index, confidence_score, gazetteer))
             elif confidence_score > dubious_upper_limit:
                 certain_matches.append((messy_data_index, canonical_data_index))
+                resolutions.append((messy_data_index, canonical_data_index, confidence_score, gazetteer))
             elif dubious_lower_limit < confidence_score < dubious_upper_limit:
-                key = self.get_linking_key(canonical_data_index, messy_record)
-                if key in pending_decisions:
-                    decision, created = pending_decisions[key]
-                    self.logger.info(f"Using existing pending linking decision (id {decision.pk}) for key {key}")
-                else:
-                    decision, created = self.get_or_save_pending_linking_decision(canonical_record, messy_record)
-                    self.logger.info(f"Pending linking decision created (id {decision.uuid}) for key {key}")
-                    pending_decisions[key] = (decision, created)
+                decision, created = pending_decisions[decision_key]
                 if created:  # If the decision was just created, it will always be in PENDING
                     created_linking_decisions += 1
                     dubious_matches.append((messy_data_index, canonical_data_index, decision.uuid))
                 else:
                     existent_linking_decisions += 1
                     if decision.decision == LinkingDecisionOptions.APPROVED:
-                        self.logger.info("Using existing approved linking decision to move record into certain matches")
                         certain_matches.append((messy_data_index, canonical_data_index))
+                        resolutions.append((messy_data_index, canonical_data_index, confidence_score, approved))
                         previously_used_decisions += 1
                     elif decision.decision == LinkingDecisionOptions.DENIED:
-                        self.logger.info("Using existing denied linking decision to move record into distinct matches")
                         distinct_matches.append((messy_data_index, canonical_data_index, confidence_score))
                         previously_used_decisions += 1
                     else:
-                        self.logger.info("Existing linking decision is pending")
                         dubious_matches.append((messy_data_index, canonical_data_index, decision.uuid))
             elif confidence_score < dubious_lower_limit:
                 distinct_matches.append((messy_data_index, canonical_data_index, confidence_score))
 
-        self._save_training(self.gazetteer)
-        self.gazetteer.cleanup_training()
+        self.save_resolutions(messy_data, resolutions)
         self.logger.info(f"{previously_used_decisions} previously used linking decisions were used")
         return certain_matches, dubious_matches, distinct_matches
 
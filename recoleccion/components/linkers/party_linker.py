@@ -2,40 +2,38 @@ from typing import Tuple
 from dedupe import Gazetteer
 import pandas as pd
 from django.apps import apps
-from collections import OrderedDict
 
 
 # Project
 from recoleccion.models.linking import DENIED_INDICATOR
 from recoleccion.exceptions.custom import IncompatibleLinkingDatasets
 from recoleccion.components.linkers import Linker
-from recoleccion.components.utils import unidecode_text
+from recoleccion.components.linkers.canonical_snapshot import PartyCanonicalSnapshot
+from recoleccion.components.utils import chunk, unidecode_text
 from recoleccion.models import PartyLinkingDecision
 from recoleccion.models.party import PartyDenomination
 import logging
-from recoleccion.utils.enums.linking_decision_options import LinkingDecisionOptions
 
 
 class PartyLinker(Linker):
     fields = [
         {"field": "denomination", "type": "String"},
     ]
+    EXACT_MATCHES_BATCH_SIZE = 500
+    linking_decision_model = PartyLinkingDecision
+    canonical_id_field = "party_id"
+    messy_field = "messy_denomination"
 
-    def __init__(self):
+    def __init__(self, engine: str = None):
         self.logger = logging.getLogger(__name__)
+        self.engine = engine
         self.gazetteer = Gazetteer(self.fields)
         self.canonical_data = self.get_canonical_data()
         self.denomination_mapping = {}
 
     def get_canonical_data(self) -> dict:
-        denominations = PartyDenomination.objects.all().order_by("id")
-        canonical_data = pd.DataFrame(
-            map(lambda x: (x.denomination, x.party.id), denominations),
-            columns=["denomination", "party_id"],
-        )
-        canonical_data[["denomination"]] = canonical_data[["denomination"]].applymap(lambda x: unidecode_text(x))
-        canonical_data = canonical_data.to_dict(orient="index")
-        return OrderedDict(canonical_data)
+        # Records with the unidecoded denomination and the party of every denomination (see PartyCanonicalSnapshot)
+        return PartyCanonicalSnapshot.get_instance().get_records()
 
     def convert_denomination(self, original_denomination: str) -> str:
         new_denomination = unidecode_text(original_denomination)
@@ -63,8 +61,8 @@ class PartyLinker(Linker):
             - A DF with columns: denomination, record_id, party_id
             - A dict with unmatched data (with the same format of messy_data)
         """
-        party_denominations = PartyDenomination.objects.all()
-        denominations_info = {pd.denomination.lower(): pd.party_id for pd in party_denominations}
+        messy_denominations = {record["denomination"].lower() for record in messy_data.values()}
+        denominations_info = self.get_exact_matches(messy_denominations)
         matched_data, unmatched_data = {}, {}
         md_index = ud_index = 0
         for id, messy_record in messy_data.items():
@@ -79,6 +77,14 @@ class PartyLinker(Linker):
         matched_df = pd.DataFrame.from_dict(matched_data, orient="index")
         return matched_df, unmatched_data
 
+    def get_exact_matches(self, messy_denominations: set) -> dict:
+        """Returns the party of every messy denomination that is exactly matched, resolved with the stored column"""
+        denominations_info = {}
+        for denominations in chunk(messy_denominations, self.EXACT_MATCHES_BATCH_SIZE):
+            matches = PartyDenomination.objects.filter(normalized_denomination__in=denominations)
+            denominations_info.update(matches.order_by("id").values_list("normalized_denomination", "party_id"))
+        return denominations_info
+
     def create_certain_mapping(self, undefined_df: pd.DataFrame, certain_matches: list) -> list:
         certain_mapping = [None for x in range(undefined_df.shape[0])]
         for messy_data_index, canonical_data_index in certain_matches:
@@ -109,16 +115,19 @@ class PartyLinker(Linker):
             messy_data: dict = self.get_messy_data(data, save_original_denominations)
             exactly_matched_data, undefined_data = self.load_exact_matches(messy_data)
             self.logger.info(f"Exactly matched {exactly_matched_data.shape[0]} parties")
+            resolved_data, undefined_data = self.load_resolved_matches(undefined_data)
+            if messy_data and not undefined_data:
+                return self.restore_denominations(
+                    self.merge_dataframes(exactly_matched_data, resolved_data), save_original_denominations
+                )
             undefined_data = self.reset_index(undefined_data)
             undefined_df = pd.DataFrame.from_dict(undefined_data, orient="index")
             try:
                 self.train(undefined_data)
             except IncompatibleLinkingDatasets as e:
                 undefined_df["party_id"] = None
-                merged_df = self.merge_dataframes(exactly_matched_data, undefined_df)
-                if save_original_denominations:
-                    merged_df["denomination"] = merged_df["denomination"].apply(lambda x: self.restore_denomination(x))
-                return merged_df
+                merged_df = self.merge_dataframes(exactly_matched_data, resolved_data, undefined_df)
+                return self.restore_denominations(merged_df, save_original_denominations)
             certain, dubious, distinct = self.classify(undefined_data)
             self.logger.info(f"{len(dubious)} records entered in the dubious range")
             certain_mapping = self.create_certain_mapping(undefined_df, certain)
@@ -133,7 +142,10 @@ class PartyLinker(Linker):
                 self.logger.info("Linked 0 parties")
             else:
                 raise e
-        merged_df = self.merge_dataframes(exactly_matched_data, undefined_df)
+        merged_df = self.merge_dataframes(exactly_matched_data, resolved_data, undefined_df)
+        return self.restore_denominations(merged_df, save_original_denominations)
+
+    def restore_denominations(self, merged_df: pd.DataFrame, save_original_denominations: bool) -> pd.DataFrame:
         if save_original_denominations:
             merged_df["denomination"] = merged_df["denomination"].apply(lambda x: self.restore_denomination(x))
         return merged_df
@@ -155,24 +167,6 @@ class PartyLinker(Linker):
     def get_record_id(self, record: dict):
         return record["party_id"]
 
-    def approved_linking(self, canonical_id: int, messy_denomination: str) -> Tuple[bool, int]:
-        party_link = PartyLinkingDecision.objects.filter(
-            messy_denomination__iexact=messy_denomination, party_id=canonical_id
-        ).first()
-        if party_link:
-            if party_link.decision == LinkingDecisionOptions.APPROVED:
-                return True, party_link.party_id
-        return False, None
-
-    def rejected_linking(self, canonical_id: int, messy_denomination: str) -> bool:
-        party_link = PartyLinkingDecision.objects.filter(
-            messy_denomination__iexact=messy_denomination, party_id=canonical_id
-        ).first()
-        if party_link:
-            if party_link.decision == LinkingDecisionOptions.DENIED:
-                return True
-        return False
-
     def _set_record_id(self, party_denomination_id: int, record_linking_id: int):
         party_id = PartyDenomination.objects.get(id=party_denomination_id).party_id
         classes = ["Authorship", "DeputySeat", "SenateSeat", "Vote"]
@@ -184,24 +178,11 @@ class PartyLinker(Linker):
             party_id=party_id
         ).denomination  # OJO: Denomination id != party id
 
-    def get_or_save_pending_linking_decision(
-        self, canonical_record: dict, messy_record: dict
-    ) -> Tuple[PartyLinkingDecision, bool]:
-        """
-        Receives a canonical record and a messy record
-        Checks if there is a pending decision for the pair, using canonical_record_id and messy_denomination
-        If there is one, returns the decision and False
-        If there isn't, creates a new decision and returns it with True
-        """
-        party_id = self.get_record_id(canonical_record)
-        messy_denomination = messy_record["denomination"]
-        existing_decision = PartyLinkingDecision.objects.filter(
-            party_id=party_id, messy_denomination=messy_denomination
-        ).first()
-        if existing_decision:
-            return existing_decision, False
-        new_decision = PartyLinkingDecision.objects.create(party_id=party_id, messy_denomination=messy_denomination)
-        return new_decision, True
+    def get_linking_decision_key(self, canonical_record: dict, messy_record: dict) -> Tuple[int, str]:
+        return self.get_record_id(canonical_record), messy_record["denomination"]
+
+    def get_resolution_key(self, messy_record: dict) -> str:
+        return messy_record["denomination"].lower()
 
     def get_linking_key(self, canonical_data_index: int, messy_record: dict):
         messy_denomination = messy_record["denomination"]
@@ -1,4 +1,4 @@
-from collections import defaultdict, OrderedDict
+from collections import defaultdict
 from datetime import date
 from dedupe import Gazetteer
 from typing import List, Tuple
@@ -10,51 +10,39 @@ from uuid import UUID
 from recoleccion.models.linking import DENIED_INDICATOR
 from recoleccion.exceptions.custom import IncompatibleLinkingDatasets
 from recoleccion.components.linkers import Linker
-from recoleccion.components.utils import normalize_name, unidecode_text
-from recoleccion.models import Person
+from recoleccion.components.linkers.canonical_snapshot import PersonCanonicalSnapshot
+from recoleccion.components.utils import capitalize_text, chunk, normalize_name, unidecode_text
+from recoleccion.models import Authorship, DeputySeat, Person, Vote
 import logging
 from recoleccion.models import PersonLinkingDecision
-from recoleccion.utils.enums.linking_decision_options import LinkingDecisionOptions
 
 
 class PersonLinker(Linker):
     fields = [
         {"field": "full_name", "type": "String"},
     ]
+    EXACT_MATCHES_BATCH_SIZE = 500
+    # Models whose linked rows are known persons, with the fields of the linked name (see get_known_persons)
+    KNOWN_NAME_FIELDS = [
+        (Vote, "person_name", "person_last_name"),
+        (Authorship, "person_name", "person_last_name"),
+        (DeputySeat, "person__name", "person__last_name"),
+    ]
+    linking_decision_model = PersonLinkingDecision
+    canonical_id_field = "person_id"
+    messy_field = "messy_name"
 
-    def __init__(self, use_alternative_names=False):
+    def __init__(self, use_alternative_names=False, engine: str = None, known_persons: dict = None):
         self.logger = logging.getLogger(__name__)
+        self.engine = engine
+        self.known_persons = known_persons or {}  # see get_known_persons
         self.gazetteer = Gazetteer(self.fields)
         self.use_alternative_names = use_alternative_names
         self.canonical_data = self.get_canonical_data()
 
     def get_canonical_data(self) -> dict:
-        if self.use_alternative_names or True:
-            return self._get_canonical_data_alternative_format()
-
-    def _get_canonical_data(self) -> dict:
-        all_persons = Person.objects.all().order_by("id")
-        canonical_data = pd.DataFrame(
-            map(lambda x: (x.name, x.last_name, x.id), all_persons), columns=["name", "last_name", "id"]
-        )
-        canonical_data[["name", "last_name"]] = canonical_data[["name", "last_name"]].applymap(
-            lambda x: normalize_name(x)
-        )
-        canonical_data = canonical_data.to_dict(orient="index")
-        return OrderedDict(canonical_data)
-
-    def _get_canonical_data_alternative_format(self) -> dict:
-        all_persons = Person.objects.all().order_by("id")
-        canonical_data = pd.DataFrame(
-            map(lambda x: (x.name, x.last_name, x.id), all_persons), columns=["name", "last_name", "id"]
-        )
-        canonical_data[["name", "last_name"]] = canonical_data[["name", "last_name"]].applymap(
-            lambda x: normalize_name(x)
-        )
-        canonical_data["full_name"] = canonical_data["last_name"] + " " + canonical_data["name"]
-        canonical_data = canonical_data.drop(columns=["name", "last_name"])
-        canonical_data = canonical_data.to_dict(orient="index")
-        return OrderedDict(canonical_data)
+        # Records with the normalized full name of every person (see PersonCanonicalSnapshot)
+        return PersonCanonicalSnapshot.get_instance().get_records()
 
     def get_messy_data(self, original_data: pd.DataFrame):
         if self.use_alternative_names or True:
@@ -107,8 +95,8 @@ class PersonLinker(Linker):
             - A DF with columns: denomination, record_id, party_id
             - A dict with unmatched data (with the same format of messy_data)
         """
-        canonical_data = self.get_canonical_data()
-        canonical_info = {self.get_record_full_name(record): record["id"] for record in canonical_data.values()}
+        messy_full_names = {self.get_record_full_name(messy_record) for messy_record in messy_data.values()}
+        canonical_info = self.get_exact_matches(messy_full_names)
         matched_data, unmatched_data = {}, {}
         for id, messy_record in messy_data.items():
             messy_full_name = self.get_record_full_name(messy_record)
@@ -120,6 +108,53 @@ class PersonLinker(Linker):
         matched_df = pd.DataFrame.from_dict(matched_data, orient="index")
         return matched_df, unmatched_data
 
+    def get_exact_matches(self, messy_full_names: set) -> dict:
+        """Returns the person of every messy full name that is exactly matched, resolved with the stored column"""
+        # The messy full names are lowercase and the stored ones are capitalized (see Person.normalize_full_name)
+        full_names_info = {}
+        for full_names in chunk(messy_full_names, self.EXACT_MATCHES_BATCH_SIZE):
+            stored_full_names = [capitalize_text(full_name) for full_name in full_names]
+            matches = Person.objects.filter(normalized_full_name__in=stored_full_names)
+            for full_name, person_id in matches.order_by("id").values_list("normalized_full_name", "id"):
+                full_names_info[full_name.lower()] = person_id
+        return full_names_info
+
+    @staticmethod
+    def get_known_persons() -> dict:
+        """
+        Returns the names that were already linked in previous runs, from the votes and authorships that keep
+        the name of the source next to their person, as a dict from the normalized full name to the person id
+        The deputy seats don't keep the name of the source, the name of the person of the seat is used instead
+        Names linked to more than one person are left out, so they are linked again
+        """
+        person_ids = defaultdict(set)
+        for model, name_field, last_name_field in PersonLinker.KNOWN_NAME_FIELDS:
+            linked_rows = model.objects.filter(
+                person__isnull=False, **{f"{name_field}__isnull": False, f"{last_name_field}__isnull": False}
+            )
+            linked_names = linked_rows.values_list(name_field, last_name_field, "person_id").order_by()
+            for name, last_name, person_id in linked_names.distinct():
+                person_ids[Person.normalize_full_name(name, last_name).lower()].add(person_id)
+        return {full_name: ids.pop() for full_name, ids in person_ids.items() if len(ids) == 1}
+
+    def load_known_matches(self, messy_data: dict) -> Tuple[pd.DataFrame, dict]:
+        """
+        Links the records whose names were already linked in previous runs (see get_known_persons)
+        Returns:
+            - A DF with the known records, with their person_id
+            - A dict with the rest of the records (with the same format of messy_data)
+        """
+        known_data, unknown_data = {}, {}
+        for index, messy_record in messy_data.items():
+            person_id = self.known_persons.get(self.get_record_full_name(messy_record))
+            if person_id is None:
+                unknown_data[index] = messy_record
+            else:
+                known_data[index] = {**messy_record, "person_id": person_id}
+        if self.known_persons:
+            self.logger.info(f"Found {len(known_data)} records linked in previous runs")
+        return pd.DataFrame.from_dict(known_data, orient="index"), unknown_data
+
     def create_certain_mapping(self, undefined_df: pd.DataFrame, certain_matches: list) -> List[int]:
         certain_mapping = [None for x in range(undefined_df.shape[0])]
         for messy_data_index, canonical_data_index in certain_matches:
@@ -134,25 +169,75 @@ class PersonLinker(Linker):
         self.logger.info(f"Linked {len(dubious_matches)} persons")
         return dubious_mapping
 
-    def link_persons(self, data: pd.DataFrame, skip_manual_linking=False):
+    def get_name_columns(self, data: pd.DataFrame) -> List[str]:
+        if "full_name" in data.columns:
+            return ["full_name"]
+        return ["name", "last_name"]
+
+    def get_unique_names(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Receives the original DF and returns one row per distinct name (as it comes in the original data)
+        The returned DF has the name columns, plus a "full_name" column in the format expected by the linker
+        """
+        name_columns = self.get_name_columns(data)
+        unique_names = data[name_columns].dropna().drop_duplicates().reset_index(drop=True)
+        if "full_name" not in name_columns:
+            unique_names["full_name"] = unique_names["last_name"] + " " + unique_names["name"]
+        unique_names["unique_name_index"] = unique_names.index
+        return unique_names
+
+    def link_unique_persons(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Same contract as link_persons, but only the distinct names of the data are linked
+        The results are then joined back to every row of the original DF, so the linking cost
+        depends on the number of distinct persons instead of the number of rows
+        The original rows (and their order) are kept as they are, only person_id and linking_id are added
+        """
+        name_columns = self.get_name_columns(data)
+        unique_names = self.get_unique_names(data)
+        self.logger.info(f"Linking {len(unique_names)} unique names out of {len(data)} records...")
+        linked_names = self.link_persons(unique_names[["full_name", "unique_name_index"]])
+        linked_names = linked_names.reindex(columns=["unique_name_index", "person_id", "linking_id"])
+        unique_names = unique_names.drop(columns=["full_name"], errors="ignore")
+        unique_names = unique_names.merge(linked_names, on="unique_name_index", how="left")
+        unique_names = unique_names.drop(columns=["unique_name_index"])
+
+        original_index = data.index
+        data = data.drop(columns=["person_id", "linking_id"], errors="ignore")
+        linked_data = data.merge(unique_names, on=name_columns, how="left")
+        linked_data.index = original_index
+        person_ids = [int(x) if pd.notnull(x) else None for x in linked_data["person_id"]]
+        linked_data["person_id"] = pd.Series(person_ids, index=original_index, dtype=object)
+        linking_ids = linked_data["linking_id"].astype(object)
+        linked_data["linking_id"] = linking_ids.where(linking_ids.notnull(), None)
+        return linked_data
+
+    def link_persons(self, data: pd.DataFrame, skip_manual_linking=False, unique_names=False):
         """
         Receives a DF with columns: name, last_name, district, party, start_of_term, end_of_term, is_active
         Returns a DF with columns: name, last_name, district, party, start_of_term, end_of_term, is_active, person_id, linking_id
         person_id is the id of the linked person if the linking was made, None otherwise
         linking_id is the id of the pending linking decision that has to be made, if linking entered in the dubious range
+        If unique_names is True, only the distinct names are linked (see link_unique_persons)
         """
+        if unique_names:
+            return self.link_unique_persons(data)
         self.logger.info(f"Linking {len(data)} persons...")
         try:
             messy_data: dict = self.get_messy_data(data)
-            exactly_matched_data, undefined_data = self.load_exact_matches(messy_data)
+            known_data, undefined_data = self.load_known_matches(messy_data)
+            exactly_matched_data, undefined_data = self.load_exact_matches(undefined_data)
+            self.logger.info(f"Found {exactly_matched_data.shape[0]} exact matches")
+            resolved_data, undefined_data = self.load_resolved_matches(undefined_data)
+            if messy_data and not undefined_data:
+                return self.merge_dataframes(known_data, exactly_matched_data, resolved_data)
             undefined_data = self.reset_index(undefined_data)
             undefined_df = pd.DataFrame.from_dict(undefined_data, orient="index")
-            self.logger.info(f"Found {exactly_matched_data.shape[0]} exact matches")
             try:
                 self.train(messy_data)
             except IncompatibleLinkingDatasets as e:
                 undefined_df["party_id"] = None
-                return self.merge_dataframes(exactly_matched_data, undefined_df)
+                return self.merge_dataframes(known_data, exactly_matched_data, resolved_data, undefined_df)
             certain, dubious, distinct = self.classify(undefined_data)
             self.logger.info(f"{len(dubious)} records entered in the dubious range")
             certain_mapping = self.create_certain_mapping(undefined_df, certain)
@@ -166,7 +251,7 @@ class PersonLinker(Linker):
                 self.logger.info("Linked 0 persons")
             else:
                 raise e
-        return self.merge_dataframes(exactly_matched_data, undefined_df)
+        return self.merge_dataframes(known_data, exactly_matched_data, resolved_data, undefined_df)
 
     def _convert_dates_to_str(self, data: pd.DataFrame) -> pd.DataFrame:
         # Convert datetime
@@ -214,41 +299,15 @@ class PersonLinker(Linker):
     def get_record_id(self, record: dict):
         return record["id"]
 
-    def approved_linking(self, canonical_id: int, messy_name: str) -> Tuple[bool, int]:
-        person_link = PersonLinkingDecision.objects.filter(messy_name=messy_name, person_id=canonical_id).first()
-        if person_link:
-            if person_link.decision == LinkingDecisionOptions.APPROVED:
-                return True, person_link.person_id
-        return False, None
-
-    def rejected_linking(self, canonical_id: int, messy_name: str) -> bool:
-        person_link = PersonLinkingDecision.objects.filter(messy_name=messy_name, person_id=canonical_id).first()
-        if person_link:
-            if person_link.decision == LinkingDecisionOptions.DENIED:
-                return True
-        return False
-
-    def get_or_save_pending_linking_decision(
-        self, canonical_record: dict, messy_record: dict
-    ) -> Tuple[PersonLinkingDecision, bool]:
-        """
-        Receives a canonical record and a messy record
-        Checks if there is a pending decision for the pair, using canonical_record_id and messy_denomination
-        If there is one, returns the decision and False
-        If there isn't, creates a new decision and returns it with True
-        """
-        person_id = canonical_record["id"]
+    def get_linking_decision_key(self, canonical_record: dict, messy_record: dict) -> Tuple[int, str]:
         if "name" in messy_record:
             messy_name = messy_record["name"] + " " + messy_record["last_name"]
         else:
             messy_name = messy_record["full_name"]
-        existing_decision = PersonLinkingDecision.objects.filter(
-            person_id=person_id, messy_name=messy_name
-        ).first()
-        if existing_decision:
-            return existing_decision, False
-        new_decision = PersonLinkingDecision.objects.create(person_id=person_id, messy_name=messy_name)
-        return new_decision, True
+        return canonical_record["id"], messy_name
+
+    def get_resolution_key(self, messy_record: dict) -> str:
+        return self.get_record_full_name(messy_record)
 
     def get_linking_key(self, canonical_data_index: int, messy_record: dict):
         messy_full_name = self.get_record_full_name(messy_record)
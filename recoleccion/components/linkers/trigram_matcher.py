@@ -0,0 +1,95 @@
+from collections import defaultdict
+from typing import Dict, Hashable, List, Set, Tuple
+import numpy as np
+
+
+def get_trigrams(text: str) -> Set[str]:
+    # Padded like pg_trgm, so the start and the end of the text get their own trigrams
+    padded_text = f"  {' '.join(text.lower().split())} "
+    return {padded_text[position : position + 3] for position in range(len(padded_text) - 2)}
+
+
+def jaro_winkler_similarity(text_1: str, text_2: str, prefix_scale: float = 0.1) -> float:
+    if text_1 == text_2:
+        return 1.0
+    if not text_1 or not text_2:
+        return 0.0
+    match_distance = max(max(len(text_1), len(text_2)) // 2 - 1, 0)
+    matched_1, matched_2 = [False] * len(text_1), [False] * len(text_2)
+    matches = 0
+    for position_1, char in enumerate(text_1):
+        start, end = max(0, position_1 - match_distance), min(position_1 + match_distance + 1, len(text_2))
+        for position_2 in range(start, end):
+            if not matched_2[position_2] and text_2[position_2] == char:
+                matched_1[position_1] = matched_2[position_2] = True
+                matches += 1
+                break
+    if not matches:
+        return 0.0
+    matched_chars_1 = [char for char, matched in zip(text_1, matched_1) if matched]
+    matched_chars_2 = [char for char, matched in zip(text_2, matched_2) if matched]
+    transpositions = sum(char_1 != char_2 for char_1, char_2 in zip(matched_chars_1, matched_chars_2)) / 2
+    jaro = (matches / len(text_1) + matches / len(text_2) + (matches - transpositions) / matches) / 3
+    prefix = 0
+    for char_1, char_2 in zip(text_1[:4], text_2[:4]):
+        if char_1 != char_2:
+            break
+        prefix += 1
+    return jaro + prefix * prefix_scale * (1 - jaro)
+
+
+class TrigramMatcher:
+    """
+    Linking engine for a single name field, an alternative to the dedupe Gazetteer with the same index/search interface
+    The candidates of a messy name are the canonical names that share character trigrams with it (inverted index),
+    the MAX_CANDIDATES with the highest trigram cosine similarity (computed for every candidate at once) are ranked
+    by the mean of that similarity and the Jaro-Winkler similarity of the lowercase names
+    It needs no training nor sampling, so it starts fast and always gives the same results
+    """
+
+    MAX_CANDIDATES = 20
+
+    def __init__(self, field: str):
+        self.field = field
+
+    def index(self, canonical_data: Dict[Hashable, dict]):
+        self.canonical_keys = list(canonical_data.keys())
+        self.canonical_names = [str(record[self.field]).lower() for record in canonical_data.values()]
+        postings = defaultdict(list)
+        trigram_counts = []
+        for position, name in enumerate(self.canonical_names):
+            trigrams = get_trigrams(name)
+            trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                postings[trigram].append(position)
+        self.postings = {trigram: np.array(positions) for trigram, positions in postings.items()}
+        self.trigram_counts = np.array(trigram_counts, dtype=float)
+
+    def get_candidates(self, name: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the positions of the best candidates and their trigram cosine similarity"""
+        trigrams = get_trigrams(name)
+        postings = [self.postings[trigram] for trigram in trigrams if trigram in self.postings]
+        if not postings:
+            return np.array([], dtype=int), np.array([])
+        shared_trigrams = np.bincount(np.concatenate(postings), minlength=len(self.canonical_names))
+        positions = np.flatnonzero(shared_trigrams)
+        cosine = shared_trigrams[positions] / np.sqrt(self.trigram_counts[positions] * len(trigrams))
+        if len(positions) > self.MAX_CANDIDATES:
+            best = np.argpartition(-cosine, self.MAX_CANDIDATES)[: self.MAX_CANDIDATES]
+            positions, cosine = positions[best], cosine[best]
+        return positions, cosine
+
+    def search(self, messy_data: Dict[Hashable, dict], n_matches: int = 1) -> List[Tuple[Hashable, tuple]]:
+        results = []
+        for messy_key, record in messy_data.items():
+            name = str(record[self.field]).lower()
+            positions, cosine = self.get_candidates(name)
+            scores = [
+                (position, (similarity + jaro_winkler_similarity(name, self.canonical_names[position])) / 2)
+                for position, similarity in zip(positions, cosine)
+            ]
+            # Ties are broken by the canonical position, so the results do not depend on the index order
+            scores.sort(key=lambda score: (-score[1], score[0]))
+            matches = tuple((self.canonical_keys[position], float(score)) for position, score in scores[:n_matches])
+            results.append((messy_key, matches))
+        return results
@@ -0,0 +1,152 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Iterator
+import pandas as pd
+from django.db import connection, transaction
+
+
+class PipelineStopped(Exception):
+    """Raised in a stage when another stage failed"""
+
+
+@dataclass
+class StageStats:
+    rows: int = 0
+    chunks: int = 0
+    seconds: float = 0
+
+    @property
+    def throughput(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0
+
+
+class Pipeline:
+    """
+    Streams the data of a source through the linking and writing stages in chunks of at most chunk_size rows
+    Every stage runs in its own thread and the stages are connected by queues of at most queue_size chunks,
+    so the memory stays bounded and linking a chunk overlaps with writing the previous one
+    Every chunk is written in its own transaction
+    """
+
+    CHUNK_SIZE = 5000
+    END = object()
+    QUEUE_TIMEOUT = 0.1
+    logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        source: Iterable[pd.DataFrame],
+        link: Callable[[pd.DataFrame], pd.DataFrame],
+        write: Callable[[pd.DataFrame], Any],
+        chunk_size: int = CHUNK_SIZE,
+        queue_size: int = 2,
+    ):
+        self.source = source
+        self.link = link
+        self.write = write
+        self.chunk_size = chunk_size
+        self.queue_size = queue_size
+        self.stats = {"read": StageStats(), "link": StageStats(), "write": StageStats()}
+
+    def get_chunks(self) -> Iterator[pd.DataFrame]:
+        for data in self.source:
+            for start in range(0, len(data), self.chunk_size):
+                yield data.iloc[start : start + self.chunk_size]
+
+    def run(self) -> Dict[str, StageStats]:
+        self.stopped = threading.Event()
+        self.errors = []
+        read_queue, linked_queue = queue.Queue(self.queue_size), queue.Queue(self.queue_size)
+        threads = [
+            threading.Thread(name="Pipeline read", target=self.run_stage, args=("read", self.read, read_queue)),
+            threading.Thread(
+                name="Pipeline link",
+                target=self.run_stage,
+                args=("link", self.process, "link", self.link, read_queue, linked_queue),
+            ),
+        ]
+        for thread in threads:
+            thread.start()
+        # Writing in the caller's thread, so the chunks are written with the caller's database connection
+        self.run_stage("write", self.process, "write", self.write_chunk, linked_queue)
+        for thread in threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+        self.log_stats()
+        return self.stats
+
+    def run_stage(self, name: str, stage: Callable, *args):
+        try:
+            stage(*args)
+        except PipelineStopped:
+            pass
+        except Exception as e:
+            self.logger.error(f"Pipeline stopped, error in the {name} stage: {e}")
+            self.errors.append(e)
+            self.stopped.set()
+        finally:
+            if name != "write":
+                # Every thread uses its own database connection, it must be closed when the thread ends
+                connection.close()
+
+    def read(self, output_queue: queue.Queue):
+        chunks = self.get_chunks()
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            self.update_stats("read", chunk, start)
+            self.put(output_queue, chunk)
+        self.put(output_queue, self.END)
+
+    def process(self, name: str, function: Callable, input_queue: queue.Queue, output_queue: queue.Queue = None):
+        while True:
+            chunk = self.get(input_queue)
+            if chunk is self.END:
+                break
+            start = time.perf_counter()
+            result = function(chunk)
+            self.update_stats(name, chunk, start)
+            if output_queue:
+                self.put(output_queue, result)
+        if output_queue:
+            self.put(output_queue, self.END)
+
+    def write_chunk(self, chunk: pd.DataFrame):
+        with transaction.atomic():
+            return self.write(chunk)
+
+    def update_stats(self, name: str, chunk: pd.DataFrame, start: float):
+        stats = self.stats[name]
+        stats.rows += len(chunk)
+        stats.chunks += 1
+        stats.seconds += time.perf_counter() - start
+
+    def put(self, output_queue: queue.Queue, item):
+        # The timeout avoids blocking forever when another stage failed
+        while not self.stopped.is_set():
+            try:
+                return output_queue.put(item, timeout=self.QUEUE_TIMEOUT)
+            except queue.Full:
+                continue
+        raise PipelineStopped()
+
+    def get(self, input_queue: queue.Queue):
+        while not self.stopped.is_set():
+            try:
+                return input_queue.get(timeout=self.QUEUE_TIMEOUT)
+            except queue.Empty:
+                continue
+        raise PipelineStopped()
+
+    def log_stats(self):
+        for name, stats in self.stats.items():
+            self.logger.info(
+                f"Pipeline {name} stage: {stats.rows} rows in {stats.chunks} chunks, {stats.seconds:.1f}s "
+                + f"({stats.throughput:.0f} rows/s)"
+            )
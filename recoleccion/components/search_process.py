@@ -0,0 +1,29 @@
+from io import BytesIO
+from dedupe import StaticGazetteer
+import django
+
+TRIGRAM_ENGINE = "trigram"  # same as Linker.TRIGRAM_ENGINE, the linkers can't be imported before django.setup()
+
+search_matcher = None  # the gazetteer (or trigram matcher) of the search process, see Linker.search
+
+
+def init_search_process(engine: str, field: str, settings_data: bytes, canonical_data: dict):
+    """
+    Prepares the matcher of a search process, once per process
+    The processes are spawned, so they share nothing with the linker: the gazetteer is loaded from its stored
+    settings (or the trigram matcher is built) and indexed with the canonical data here
+    """
+    global search_matcher
+    if engine == TRIGRAM_ENGINE:
+        django.setup()  # the matcher is part of the linkers package, which needs the apps
+        from recoleccion.components.linkers.trigram_matcher import TrigramMatcher
+
+        search_matcher = TrigramMatcher(field)
+    else:
+        # A single core, the shards are already searched in parallel, dedupe must not start its own pool
+        search_matcher = StaticGazetteer(BytesIO(settings_data), num_cores=1)
+    search_matcher.index(canonical_data)
+
+
+def search_shard(messy_shard: dict) -> list:
+    return list(search_matcher.search(messy_shard, n_matches=1))
@@ -1 +1,2 @@
-from .writer import Writer
\ No newline at end of file
+from .writer import Writer
+from .bulk_writer import BulkWriter
@@ -3,8 +3,10 @@ import pandas as pd
 from datetime import datetime as dt
 
 # Project
-from recoleccion.models import Authorship, LawProject, Person
+from recoleccion.models import Authorship, Person
 from recoleccion.components.writers import Writer
+from recoleccion.components.writers.project_index import ProjectIndex
+from recoleccion.utils.enums.project_chambers import ProjectChambers
 from recoleccion.models.linking import DENIED_INDICATOR
 
 
@@ -16,25 +18,29 @@ class AuthorsWriter(Writer):
         return cls.model.objects.filter(source=data_source).exists()
 
     @classmethod
-    def write(cls, data: pd.DataFrame):
+    def write(cls, data: pd.DataFrame, project_index: ProjectIndex = None):
+        """
+        The project index can be shared between calls (e.g. one per thread) to avoid reloading it for every page
+        """
+        project_index = project_index or ProjectIndex()
         data_source = data["source"].iloc[0]
         if cls.existing_data(data_source):
             cls.logger.info("There are already authors in the database, writing with existing data...")
-            cls._write_with_existing_data(data)
+            cls._write_with_existing_data(data, project_index)
         else:
             cls.logger.info("There are no authors in the database, writing from scratch...")
-            cls._write_from_scratch(data)
+            cls._write_from_scratch(data, project_index)
 
     @classmethod
-    def _get_authorship_from_row(cls, row: pd.Series) -> Authorship:
+    def _get_authorship_from_row(cls, row: pd.Series, project_index: ProjectIndex) -> Authorship:
         row = row.drop(["index"], errors="ignore")
-        row = cls._format_row(row)
+        row = cls._format_row(row, project_index)
         row_data = row.to_dict()
         authorship = Authorship(**row_data)
         return authorship
 
     @classmethod
-    def _write_from_scratch(cls, data: pd.DataFrame):
+    def _write_from_scratch(cls, data: pd.DataFrame, project_index: ProjectIndex):
         """
         Will be used only when there is not a single author in the database
         It will optimize the process by not checking for duplicates and performing bulk inserts
@@ -42,7 +48,7 @@ class AuthorsWriter(Writer):
         BATCH_SIZE = 500
         data_to_write = []
         for index, row in data.iterrows():
-            authorship: Authorship = cls._get_authorship_from_row(row)
+            authorship: Authorship = cls._get_authorship_from_row(row, project_index)
             data_to_write.append(authorship)
             if len(data_to_write) == BATCH_SIZE:
                 cls.model.objects.bulk_create(data_to_write, ignore_conflicts=True)
@@ -51,7 +57,7 @@ class AuthorsWriter(Writer):
             cls.model.objects.bulk_create(data_to_write, ignore_conflicts=True)
 
     @classmethod
-    def _write_with_existing_data(cls, data: pd.DataFrame):
+    def _write_with_existing_data(cls, data: pd.DataFrame, project_index: ProjectIndex):
         """
         Will be used when there are already authors in the database
         It will be the regular way of writing authors, like other objects
@@ -60,7 +66,7 @@ class AuthorsWriter(Writer):
         cls.associated_projects = 0
         for i in data.index:
             row = data.loc[i]
-            element, was_created = cls.update_or_create_element(row)
+            element, was_created = cls.update_or_create_element(row, project_index)
             if was_created:
                 written += 1
             else:
@@ -68,30 +74,23 @@ class AuthorsWriter(Writer):
         cls.logger.info(f"{written} authors were created and {updated} were updated")
 
     @classmethod
-    def get_project(cls, row: pd.Series):
+    def get_project_id(cls, row: pd.Series, project_index: ProjectIndex) -> int | None:
         deputies_project_id = row.get("deputies_project_id", None)
         if deputies_project_id:
-            number, year = LawProject.get_project_year_and_number(deputies_project_id)
-            law_project = LawProject.objects.filter(deputies_year=year, deputies_number=number).first()
-            if law_project:
-                cls.logger.info(f"Law project with id {deputies_project_id} found")
-            else:
-                cls.logger.info(f"Law project with deputies year {year} and number {number} not found...")
-            return law_project
+            law_project_id = project_index.get_project_id(deputies_project_id, ProjectChambers.DEPUTIES)
+            if not law_project_id:
+                cls.logger.info(f"Law project with deputies id {deputies_project_id} not found...")
+            return law_project_id
         senate_project_id = row.get("senate_project_id", None)
         if senate_project_id:
-            senate_project_id = senate_project_id.replace("/", "-")  # some ids have a slash instead of a dash
-            number, year = LawProject.get_project_year_and_number(senate_project_id)
-            law_project = LawProject.objects.filter(senate_year=year, senate_number=number).first()
-            if law_project:
-                cls.logger.info(f"Law project with id {senate_project_id} found")
-            else:
-                cls.logger.info(f"Law project with senate year {year} and number {number} not found...")
-            return law_project
+            law_project_id = project_index.get_project_id(senate_project_id, ProjectChambers.SENATORS)
+            if not law_project_id:
+                cls.logger.info(f"Law project with senate id {senate_project_id} not found...")
+            return law_project_id
         return None
 
     @classmethod
-    def _format_row(cls, row: pd.Series) -> pd.Series:
+    def _format_row(cls, row: pd.Series, project_index: ProjectIndex) -> pd.Series:
         """
         Formats the row so that it can be correctly inserted into the database
         """
@@ -99,9 +98,9 @@ class AuthorsWriter(Writer):
         if not row.get("deputies_project_id", None) and not row.get("senate_project_id", None):
             cls.logger.info("No project id found in row, skipping...")
             return None, False
-        project = cls.get_project(row)
-        if project:
-            row["project"] = project
+        project_id = cls.get_project_id(row, project_index)
+        if project_id:
+            row["project_id"] = project_id
         else:
             row["reference"] = row.get("deputies_project_id", row.get("senate_project_id"))
         row = row.drop(["deputies_project_id", "senate_project_id"], errors="ignore")
@@ -109,22 +108,22 @@ class AuthorsWriter(Writer):
         return row
 
     @classmethod
-    def update_or_create_element(cls, row: pd.Series):
+    def update_or_create_element(cls, row: pd.Series, project_index: ProjectIndex):
         row = row.drop(["index"], errors="ignore")
-        row = cls._format_row(row)
-        project = row.get("project")
+        row = cls._format_row(row, project_index)
+        project_id = row.get("project_id")
         reference = row.get("reference")
         person = Person.objects.get(id=row["person_id"]) if row.get("person_id") else None
         if person:
             return Authorship.objects.update_or_create(
-                project=project,
+                project_id=project_id,
                 person=person,
                 reference=reference,
                 defaults=row.to_dict(),
             )
         else:
             return Authorship.objects.update_or_create(
-                project=project,
+                project_id=project_id,
                 reference=reference,
                 person_name=row["person_name"],
                 person_last_name=row["person_last_name"],
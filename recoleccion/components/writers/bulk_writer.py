@@ -0,0 +1,228 @@
+from typing import Dict, List, Tuple
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+from pandas import DataFrame
+
+# Project
+from recoleccion.components.writers.values_table import quote
+from recoleccion.components.writers.writer import Writer
+
+
+class BulkWriter(Writer):
+    """
+    Writes a DataFrame in chunks: the rows are prepared for the whole DataFrame at once, every chunk fetches its
+    existing records with a single query and is written with a bulk_create and a bulk_update
+    Subclasses only declare the model, its natural key (the fields that identify a record) and the mapping from the
+    columns of the data to the fields of the model (columns that are not fields of the model are ignored)
+    """
+
+    model = None
+    natural_key: Tuple[str, ...] = ()
+    field_mapping: Dict[str, str] = {}
+    batch_size = 500
+    # When False, null values are not written, so they don't overwrite the values of existing records
+    update_nulls = False
+
+    @classmethod
+    def write(cls, data: DataFrame, batch_size: int = None) -> list:
+        cls.logger.info(f"Received {len(data)} {cls.model.__name__}s to write...")
+        rows = cls.get_rows(cls.prepare_data(data))
+        created, updated = cls.write_rows(rows, cls.natural_key, batch_size)
+        cls.logger.info(f"{len(created)} {cls.model.__name__}s were created and {len(updated)} were updated")
+        return created
+
+    @classmethod
+    def prepare_data(cls, data: DataFrame) -> DataFrame:
+        """Vectorized transformations of the data, before it is converted to rows"""
+        return data.rename(columns=cls.field_mapping)
+
+    @classmethod
+    def get_rows(cls, data: DataFrame) -> List[dict]:
+        """Returns the rows of the data with the model fields (by attname) as keys and python values"""
+        fields = {}
+        for column in data.columns:
+            try:
+                field = cls.model._meta.get_field(column)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.primary_key:
+                fields[column] = field
+        data = data[list(fields.keys())]
+        data = data.astype(object).where(data.notnull(), None)
+        rows = []
+        for record in data.to_dict(orient="records"):
+            row = {}
+            for column, value in record.items():
+                if value is None and not cls.update_nulls:
+                    continue
+                row[fields[column].attname] = cls.to_python(fields[column], value)
+            rows.append(row)
+        return rows
+
+    @classmethod
+    def to_python(cls, field, value):
+        # The values are converted like the database would, so they can be compared with the existing ones
+        if value is None:
+            return None
+        try:
+            return field.to_python(value)
+        except ValidationError:
+            return value
+
+    @classmethod
+    def get_attnames(cls, fields: Tuple[str, ...]) -> Tuple[str, ...]:
+        return tuple(cls.model._meta.get_field(field).attname for field in fields)
+
+    @classmethod
+    def write_rows(cls, rows: List[dict], natural_key: Tuple[str, ...], batch_size: int = None) -> Tuple[list, list]:
+        """Writes the rows in chunks and returns the created and the updated records"""
+        batch_size = batch_size or cls.batch_size
+        natural_key = cls.get_attnames(natural_key)
+        created, updated = [], []
+        for start in range(0, len(rows), batch_size):
+            batch_created, batch_updated = cls.write_batch(rows[start : start + batch_size], natural_key)
+            created.extend(batch_created)
+            updated.extend(batch_updated)
+        return created, updated
+
+    @classmethod
+    def get_rows_by_key(cls, rows: List[dict], natural_key: Tuple[str, ...]) -> Dict[tuple, dict]:
+        rows_by_key = {}
+        skipped = 0
+        for row in rows:
+            key = tuple(row.get(field) for field in natural_key)
+            if None in key:
+                skipped += 1
+                continue
+            # Repeated keys are merged, the last row wins
+            rows_by_key.setdefault(key, {}).update(row)
+        if skipped:
+            cls.logger.warning(f"{skipped} {cls.model.__name__}s were skipped, their natural key is incomplete")
+        return rows_by_key
+
+    @classmethod
+    def write_batch(cls, rows: List[dict], natural_key: Tuple[str, ...]) -> Tuple[list, list]:
+        rows_by_key = cls.get_rows_by_key(rows, natural_key)
+        if not rows_by_key:
+            return [], []
+
+        existing_records = cls.get_existing_records(list(rows_by_key.keys()), natural_key)
+        new_records, updated_records, updated_fields = [], [], set()
+        for key, row in rows_by_key.items():
+            record = existing_records.get(key)
+            if not record:
+                new_records.append(cls.model(**row))
+                continue
+            changed_fields = {field for field, value in row.items() if getattr(record, field) != value}
+            if changed_fields:
+                for field in changed_fields:
+                    setattr(record, field, row[field])
+                updated_records.append(record)
+                updated_fields.update(changed_fields)
+
+        if updated_records:
+            now = timezone.now()
+            for record in updated_records:
+                record.modified_at = now
+            updated_fields.add("modified_at")
+        try:
+            with transaction.atomic():
+                cls.model.objects.bulk_create(new_records)
+                if updated_records:
+                    cls.model.objects.bulk_update(updated_records, list(updated_fields))
+        except (IntegrityError, DataError) as e:
+            cls.logger.warning(f"The batch of {cls.model.__name__}s could not be written at once ({e}), retrying...")
+            return cls.write_individually(new_records, updated_records, list(updated_fields))
+        return new_records, updated_records
+
+    @classmethod
+    def get_existing_records(cls, keys: List[tuple], natural_key: Tuple[str, ...]) -> dict:
+        """
+        Fetches, with a single query, the existing records of the keys, filtering each field of the natural key
+        by its values (so it works in every database) and keeping only the records whose whole key was requested
+        """
+        filters = {f"{field}__in": {key[position] for key in keys} for position, field in enumerate(natural_key)}
+        requested_keys = set(keys)
+        existing_records = {}
+        for record in cls.model.objects.filter(**filters).order_by("id"):
+            key = tuple(getattr(record, field) for field in natural_key)
+            if key in requested_keys:
+                existing_records.setdefault(key, record)
+        return existing_records
+
+    @classmethod
+    def write_individually(cls, new_records: list, updated_records: list, updated_fields: List[str]):
+        """Fallback of a batch with an invalid record: every record is written on its own, the invalid ones skipped"""
+        created, updated = [], []
+        for records, written, save_kwargs in [
+            (new_records, created, {}),
+            (updated_records, updated, {"update_fields": updated_fields}),
+        ]:
+            for record in records:
+                try:
+                    with transaction.atomic():
+                        record.save(**save_kwargs)
+                    written.append(record)
+                except (IntegrityError, DataError) as e:
+                    cls.logger.warning(f"{record} could not be written: {e}")
+        return created, updated
+
+    @classmethod
+    def upsert_rows(cls, rows: List[dict], natural_key: Tuple[str, ...], batch_size: int = None) -> Dict[tuple, int]:
+        """
+        Writes the rows with INSERT ... ON CONFLICT (natural key) DO UPDATE, so the natural key needs a unique
+        constraint, and returns the ids of the written records by their key
+        Only the fields that a row has are updated, so the rows are upserted in groups with the same fields
+        """
+        batch_size = batch_size or cls.batch_size
+        natural_key = cls.get_attnames(natural_key)
+        rows_by_fields = {}
+        for key, row in cls.get_rows_by_key(rows, natural_key).items():
+            rows_by_fields.setdefault(frozenset(row.keys()), []).append(row)
+        ids = {}
+        for row_fields, grouped_rows in rows_by_fields.items():
+            update_fields = sorted(row_fields.difference(natural_key)) + ["modified_at"]
+            for start in range(0, len(grouped_rows), batch_size):
+                batch = grouped_rows[start : start + batch_size]
+                try:
+                    with transaction.atomic():
+                        ids.update(cls.upsert_batch(batch, natural_key, update_fields))
+                except (IntegrityError, DataError) as e:
+                    cls.logger.warning(
+                        f"The batch of {cls.model.__name__}s could not be upserted at once ({e}), retrying..."
+                    )
+                    for row in batch:
+                        try:
+                            with transaction.atomic():
+                                ids.update(cls.upsert_batch([row], natural_key, update_fields))
+                        except (IntegrityError, DataError) as e:
+                            cls.logger.warning(f"{cls.model.__name__} {row} could not be upserted: {e}")
+        return ids
+
+    @classmethod
+    def upsert_batch(cls, rows: List[dict], natural_key: Tuple[str, ...], update_fields: List[str]) -> Dict[tuple, int]:
+        # The records are built like bulk_create does, so the fields get their defaults and auto values
+        fields = [field for field in cls.model._meta.concrete_fields if not field.primary_key]
+        key_fields = [cls.model._meta.get_field(field) for field in natural_key]
+        params = []
+        for row in rows:
+            record = cls.model(**row)
+            params += [field.get_db_prep_save(field.pre_save(record, True), connection) for field in fields]
+        placeholders = ", ".join(["%s"] * len(fields))
+        columns = ", ".join(quote(field.column) for field in fields)
+        key_columns = ", ".join(quote(field.column) for field in key_fields)
+        update_columns = [quote(cls.model._meta.get_field(field).column) for field in update_fields]
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in update_columns)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(cls.model._meta.db_table)} ({columns}) "
+                + f"VALUES {', '.join([f'({placeholders})'] * len(rows))} "
+                + f"ON CONFLICT ({key_columns}) DO UPDATE SET {updates} RETURNING id, {key_columns}",
+                params,
+            )
+            written = cursor.fetchall()
+        return {
+            tuple(field.to_python(value) for field, value in zip(key_fields, key_values)): record_id
+            for record_id, *key_values in written
+        }
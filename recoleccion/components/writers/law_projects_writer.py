@@ -1,140 +1,248 @@
+from typing import Dict, List, Tuple
+from django.db import DataError, IntegrityError, transaction
+from django.db.models import Q
 import pandas as pd
 
 
 # Project
 from recoleccion.models import LawProject
-from recoleccion.components.writers import Writer
+from recoleccion.components.writers import BulkWriter
+from recoleccion.components.writers.values_table import get_unmatched_values, update_from_values
 from recoleccion.models.law import Law
-import re
 
 
-class LawProjectsWriter(Writer):
+class LawProjectsWriter(BulkWriter):
     model = LawProject
+    DEPUTIES_KEY = ("deputies_year", "deputies_source", "deputies_number")
+    SENATE_KEY = ("senate_year", "senate_source", "senate_number")
+    # number-source-year (3042-D-21) or number-year (70-21)
+    PROJECT_ID_PATTERN = r"^(?P<number>\d+)-(?:(?P<source>[^-]+)-)?(?P<year>\d+)$"
 
     @classmethod
-    def write(cls, data: pd.DataFrame, update_existing=True):
+    def write(cls, data: pd.DataFrame, batch_size: int = None):
+        """
+        The projects are matched by any of their files (see write_projects_batch), the new ones are inserted:
+        the ones that come from the senate upserted on their senate file, the rest on their deputies file
+        """
         cls.logger.info(f"Received {len(data)} law projects to write...")
-        written, updated = [], []
-        for i in data.index:
-            row = data.loc[i]
-            element, was_created = cls.update_or_create_element(row, update_existing)
-            if was_created:
-                cls.logger.info(f"Created law project {element.project_id}")
-                written.append(element)
-            elif element:
-                cls.logger.info(f"Updated law project {element.project_id}")
-                updated.append(element)
+        batch_size = batch_size or cls.batch_size
+        data = cls.prepare_data(data)
+        written, updated = [], 0
+        for start in range(0, len(data), batch_size):
+            batch_written, batch_updated = cls.write_projects_batch(data.iloc[start : start + batch_size])
+            written.extend(batch_written)
+            updated += batch_updated
         cls.logger.info(f"Created {len(written)} law projects")
-        cls.logger.info(f"Updated {len(updated)} law projects")
+        cls.logger.info(f"Updated {updated} law projects")
         return written
 
     @classmethod
-    def update_law(cls, law_number: str, law_project: LawProject):
-        law = Law.objects.filter(law_number=law_number).first()
-        if law:
-            law.law_project = law_project
-            law.save()
-        else:
-            cls.logger.warning(
-                f"Law with number {law_number} not found, project {law_project.project_id} not associated"
-            )
+    def get_file(cls, row: dict, natural_key: Tuple[str, ...]) -> tuple | None:
+        """Returns the file of the row in a chamber, if it has one (the source is optional, like in 70-21)"""
+        year, source, number = (row.get(field) for field in natural_key)
+        return (year, source, number) if year is not None and number is not None else None
+
+    @classmethod
+    def write_projects_batch(cls, batch: pd.DataFrame):
+        """
+        Every row is matched to an existing project by the file of its chamber or, if there is none, by the file of
+        the other chamber (a project that comes from one chamber can already exist with the file of the other one),
+        with the single query of get_existing_ids, and those projects are updated by id
+        The rest are inserted on the file of their chamber
+        """
+        existing_ids = cls.get_existing_ids(batch)
+        is_senate_project = batch["source"].fillna("").str.lower().str.contains("senado")
+        rows_by_id, new_rows, row_laws, skipped = {}, {cls.DEPUTIES_KEY: {}, cls.SENATE_KEY: {}}, [], 0
+        for chamber_batch, natural_key, other_key in [
+            (batch[~is_senate_project], cls.DEPUTIES_KEY, cls.SENATE_KEY),
+            (batch[is_senate_project], cls.SENATE_KEY, cls.DEPUTIES_KEY),
+        ]:
+            laws = chamber_batch["law"] if "law" in chamber_batch else pd.Series(None, index=chamber_batch.index)
+            for row, law in zip(cls.get_rows(chamber_batch), pd.to_numeric(laws, errors="coerce")):
+                file, other_file = cls.get_file(row, natural_key), cls.get_file(row, other_key)
+                project_id = existing_ids[natural_key].get(file)
+                other_project_id = existing_ids[other_key].get(other_file)
+                if project_id and other_project_id and project_id != other_project_id:
+                    cls.logger.warning(f"The files {file} and {other_file} belong to different projects")
+                    row = {field: value for field, value in row.items() if field not in other_key}
+                project_id = project_id or other_project_id
+                # Repeated projects keep their last values
+                if project_id:
+                    rows_by_id.setdefault(project_id, {}).update(row)
+                elif file:
+                    new_rows[natural_key].setdefault(file, {}).update(row)
+                else:
+                    skipped += 1
+                    continue
+                if not pd.isna(law):
+                    row_laws.append((natural_key, file, project_id, int(law)))
+        if skipped:
+            cls.logger.warning(f"{skipped} law projects were skipped, they have no file")
+        updated = cls.update_projects(rows_by_id)
+        written, law_projects = [], {}
+        for natural_key, rows_by_file in new_rows.items():
+            project_ids = cls.insert_rows(rows_by_file, natural_key)
+            existing_ids[natural_key].update(project_ids)
+            written += [LawProject(id=project_id, **rows_by_file[file]) for file, project_id in project_ids.items()]
+        for natural_key, file, project_id, law in row_laws:
+            project_id = project_id or existing_ids[natural_key].get(file)
+            if project_id:
+                law_projects[law] = project_id
+        if law_projects:
+            cls.update_laws(law_projects)
+        return written, updated
+
+    @classmethod
+    def insert_rows(cls, rows_by_file: Dict[tuple, dict], natural_key: Tuple[str, ...]) -> Dict[tuple, int]:
+        """
+        Inserts the rows of new projects and returns their ids by file
+        The files with source are upserted on the file (so a project inserted meanwhile is updated), the files
+        without source (70-21) can't be, NULLs never conflict with the unique constraints, so they are created
+        """
+        rows = [row for file, row in rows_by_file.items() if file[1] is not None]
+        project_ids = cls.upsert_rows(rows, natural_key, batch_size=len(rows) or None)
+        sourceless_files = [file for file in rows_by_file if file[1] is None]
+        sourceless_projects = [LawProject(**rows_by_file[file]) for file in sourceless_files]
+        for file, project in zip(sourceless_files, LawProject.objects.bulk_create(sourceless_projects)):
+            project_ids[file] = project.id
+        return project_ids
+
+    @classmethod
+    def update_projects(cls, rows_by_id: Dict[int, dict]) -> int:
+        """
+        Updates the projects by id, with an UPDATE ... FROM (VALUES) per group of rows with the same fields
+        (only the fields that a row has are updated, like in the upserts)
+        If a group can't be updated at once, its projects are updated one by one and the invalid ones skipped
+        """
+        rows_by_fields = {}
+        for project_id, row in rows_by_id.items():
+            rows_by_fields.setdefault(tuple(sorted(row.keys())), []).append((project_id, row))
+        updated = 0
+        for fields, grouped_rows in rows_by_fields.items():
+            values = [(project_id, *(row[field] for field in fields)) for project_id, row in grouped_rows]
+            try:
+                with transaction.atomic():
+                    updated += update_from_values(LawProject, ["id"], list(fields), values)
+            except (IntegrityError, DataError) as e:
+                cls.logger.warning(f"The batch of law projects could not be updated at once ({e}), retrying...")
+                for project_values in values:
+                    try:
+                        with transaction.atomic():
+                            updated += update_from_values(LawProject, ["id"], list(fields), [project_values])
+                    except (IntegrityError, DataError) as e:
+                        cls.logger.warning(f"Law project {project_values[0]} could not be updated: {e}")
+        return updated
+
+    @classmethod
+    def get_existing_ids(cls, batch: pd.DataFrame) -> Dict[tuple, Dict[tuple, int]]:
+        """
+        Fetches, with a single query, the existing projects of the files of both chambers of the batch
+        Returns the ids of the projects by their file, for each chamber
+        """
+        query = Q()
+        for year, _, number in [cls.DEPUTIES_KEY, cls.SENATE_KEY]:
+            if year in batch and number in batch:
+                years, numbers = set(batch[year].dropna().tolist()), set(batch[number].dropna().tolist())
+                query |= Q(**{f"{year}__in": years, f"{number}__in": numbers})
+        existing_ids = {cls.DEPUTIES_KEY: {}, cls.SENATE_KEY: {}}
+        if not query:
+            return existing_ids
+        projects = LawProject.objects.filter(query).order_by("id")
+        for project_id, *files in projects.values_list("id", *cls.DEPUTIES_KEY, *cls.SENATE_KEY):
+            for natural_key, file in [(cls.DEPUTIES_KEY, tuple(files[:3])), (cls.SENATE_KEY, tuple(files[3:]))]:
+                if file[0] is not None and file[2] is not None:
+                    existing_ids[natural_key].setdefault(file, project_id)
+        return existing_ids
+
+    @classmethod
+    def prepare_data(cls, data: pd.DataFrame):
+        data = super().prepare_data(data)
+        if "source" not in data:
+            data["source"] = None
+        for column, prefix in [("deputies_project_id", "deputies"), ("senate_project_id", "senate")]:
+            if column not in data:
+                continue
+            files = cls.split_project_ids(data[column])
+            number, source, year = files["number"], files["source"], files["year"]
+            data[f"{prefix}_number"], data[f"{prefix}_source"], data[f"{prefix}_year"] = number, source, year
+            formatted_ids = number.astype("Int64").astype("string") + "-"
+            formatted_ids += (source + "-").fillna("") + year.astype("Int64").astype("string")
+            data[column] = formatted_ids.where(number.notnull())
+        return data
 
     @classmethod
-    def update_or_create_element(cls, row: pd.Series, update_existing: bool):
-        row = row.dropna()  # Important, because the writer will try to update or create with null values
-        deputies_project_id = row.get("deputies_project_id", None)
-        senate_project_id = row.get("senate_project_id", None)
-        senate_project_id = senate_project_id.replace("/", "-") if senate_project_id else None
-        row["senate_project_id"] = senate_project_id  # fix for senate projects with wrong format
-        law = row.get("law", None)
-        row = row.drop("law", errors="ignore")
-        deputies_number, deputies_source, deputies_year = LawProject.split_id(deputies_project_id)
-        deputies_year = LawProject.format_year(deputies_project_id)
-        senate_number, senate_source, senate_year = LawProject.split_id(senate_project_id)
-        if not deputies_number and not senate_number:
-            # We skip
-            return None, False
-        senate_year = LawProject.format_year(senate_project_id)
-        row.update(
+    def split_project_ids(cls, project_ids: pd.Series) -> pd.DataFrame:
+        """Vectorized LawProject.split_id, returns the number, the source and the year of every project id"""
+        # fix for senate projects with wrong format
+        project_ids = project_ids.astype("string").str.replace("/", "-", regex=False).str.strip()
+        parts = project_ids.str.extract(cls.PROJECT_ID_PATTERN)
+        return pd.DataFrame(
             {
-                "deputies_project_id": f"{deputies_number}-{deputies_source}-{deputies_year}"
-                if deputies_project_id
-                else None,
-                "senate_project_id": f"{senate_number}-{senate_source}-{senate_year}" if senate_project_id else None,
-                "deputies_number": deputies_number,
-                "deputies_source": deputies_source,
-                "deputies_year": deputies_year,
-                "senate_number": senate_number,
-                "senate_source": senate_source,
-                "senate_year": senate_year,
-            }
+                "number": pd.to_numeric(parts["number"], errors="coerce"),
+                "source": parts["source"].str.upper(),
+                "year": cls.format_years(pd.to_numeric(parts["year"], errors="coerce")),
+            },
+            index=project_ids.index,
         )
-        try:
-            source = row.get("source", "")
-            if "senado" in source.lower():
-                law_project, was_created = LawProject.objects.update_or_create(
-                    senate_year=senate_year,
-                    senate_source=senate_source,
-                    senate_number=senate_number,
-                    defaults=row.to_dict(),
-                )
-            else:
-                law_project, was_created = LawProject.objects.update_or_create(
-                    deputies_year=deputies_year,
-                    deputies_source=deputies_source,
-                    deputies_number=deputies_number,
-                    defaults=row.to_dict(),
-                )
-            if law:
-                cls.update_law(law, law_project)
-        except Exception as e:
-            project_id = deputies_project_id or senate_project_id
-            cls.logger.warning(f"An error occurred while updating or creating law project with id {project_id}: {e}")
-            law_project, was_created = None, False
-        return law_project, was_created
+
+    @classmethod
+    def format_years(cls, years: pd.Series) -> pd.Series:
+        """Vectorized LawProject.format_year"""
+        return years.where(years >= 100, years + 1900).where((years >= 50) | years.isnull(), years + 2000)
+
+    @classmethod
+    def update_laws(cls, law_projects: Dict[int, int]):
+        """Associates the laws, by their number, to the written projects with a single UPDATE"""
+        associated = update_from_values(Law, ["law_number"], ["associated_project"], list(law_projects.items()))
+        cls.logger.info(f"{associated} laws were associated to projects")
+        if associated < len(law_projects):
+            cls.logger.warning(f"{len(law_projects) - associated} laws were not found, their projects not associated")
 
     @classmethod
     def update_day_orders(cls, data: pd.DataFrame):
         cls.logger.info(f"Received {len(data)} day orders to update...")
-        updated, not_found = [], []
-        for i in data.index:
-            row = data.loc[i]
-            project_id = row.get("project_id")
-            day_order = row.get("day_order")
-            deputies_number, deputies_source, deputies_year = LawProject.split_id(project_id)
-            project = LawProject.objects.filter(
-                deputies_number=deputies_number, deputies_source=deputies_source, deputies_year=deputies_year
-            ).first()
-            if project:
-                project.deputies_day_order = day_order
-                project.save()
-                cls.logger.info(f"Updated day order for project {project_id}")
-                updated.append(project)
-            else:
-                cls.logger.warning(f"Project {project_id} not found, day order {day_order} not updated")
-                not_found.append(project_id)
-        cls.logger.info(f"Updated {len(updated)} day orders")
+        updated, not_found = cls.update_by_deputies_file(data, "day_order", "deputies_day_order")
+        cls.logger.info(f"Updated {updated} day orders")
         cls.logger.info(f"{len(not_found)} day orders not found")
 
     @classmethod
     def update_projects_status(cls, data: pd.DataFrame):
         cls.logger.info(f"Received {len(data)} status to update...")
-        updated, not_found = [], []
-        for i in data.index:
-            row: pd.Series = data.loc[i]
-            project_id = row.get("project_id")
-            project_status = row.get("project_status")
-            deputies_number, deputies_source, deputies_year = LawProject.split_id(project_id)
-            project = LawProject.objects.filter(
-                deputies_number=deputies_number, deputies_source=deputies_source, deputies_year=deputies_year
-            ).first()
-            if project:
-                project.status = project_status
-                project.save()
-                cls.logger.info(f"Updated status for project {project_id} to {project_status}")
-                updated.append(project)
-            else:
-                cls.logger.warning(f"Project {project_id} not found, status {project_status} not updated")
-                not_found.append(project_id)
-        cls.logger.info(f"Updated {len(updated)} projects status")
+        updated, not_found = cls.update_by_deputies_file(data, "project_status", "status")
+        cls.logger.info(f"Updated {updated} projects status")
         cls.logger.info(f"{len(not_found)} projects status not found")
+
+    @classmethod
+    def update_by_deputies_file(cls, data: pd.DataFrame, column: str, field: str) -> Tuple[int, List[str]]:
+        """
+        Sets a field of the projects identified by the deputies files of the data (project_id column), with an
+        UPDATE ... FROM (VALUES) per batch, and returns the amount of updated projects and the ids not found
+        The ids not found are the invalid ones and the ones without project, fetched with a single anti-join
+        The files without source (70-21) are matched by their year and number, with a null source
+        """
+        files = cls.split_project_ids(data["project_id"])
+        is_valid = files[["year", "number"]].notnull().all(axis="columns")
+        values = data[column].astype(object).where(data[column].notnull(), None)
+        values_by_file = {}
+        for year, source, number, value in zip(
+            files.loc[is_valid, "year"], files.loc[is_valid, "source"], files.loc[is_valid, "number"], values[is_valid]
+        ):
+            # Repeated files keep their last value
+            values_by_file[(int(year), None if pd.isna(source) else source, int(number))] = value
+        year, source, number = cls.DEPUTIES_KEY
+        updated, not_found = 0, data.loc[~is_valid, "project_id"].tolist()
+        for has_source, key_fields, null_fields in [(True, cls.DEPUTIES_KEY, ()), (False, (year, number), (source,))]:
+            files_values = {
+                tuple(value for value, key_field in zip(file, cls.DEPUTIES_KEY) if key_field in key_fields): value
+                for file, value in values_by_file.items()
+                if (file[1] is not None) == has_source
+            }
+            rows = [(*file, value) for file, value in files_values.items()]
+            updated += update_from_values(LawProject, list(key_fields), [field], rows, null_fields=null_fields)
+            unmatched_files = get_unmatched_values(
+                LawProject, list(key_fields), list(files_values.keys()), null_fields=null_fields
+            )
+            not_found += ["-".join(str(part) for part in reversed(file)) for file in unmatched_files]
+        for project_id in not_found:
+            cls.logger.warning(f"Project {project_id} not found, its {field} was not updated")
+        return updated, not_found
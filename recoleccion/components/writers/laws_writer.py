@@ -1,29 +1,25 @@
-from django.db.models import Q
 import pandas as pd
 from datetime import datetime as dt
-import numpy as np
 
 # Project
 from recoleccion.models.law import Law
-from recoleccion.components.writers import Writer
+from recoleccion.components.writers import BulkWriter
 from recoleccion.models.law_project import LawProject
 
 
-class LawsWriter(Writer):
+class LawsWriter(BulkWriter):
     model = Law
-
-    def write(self, data: pd.DataFrame):
-        written = updated = 0
-        self.associated_projects = 0
-        for i in data.index:
-            row = data.loc[i]
-            element, was_created = self.update_or_create_element(row)
-            if was_created:
-                written += 1
-            else:
-                updated += 1
-        self.logger.info(f"{written} laws were created and {updated} were updated")
-        self.logger.info(f"{self.associated_projects} laws were associated to projects")
+    natural_key = ("law_number",)
+
+    @classmethod
+    def prepare_data(cls, data: pd.DataFrame):
+        data = super().prepare_data(data)
+        if "veto" in data:
+            data["vetoed"] = (data["veto"] != "NULL").where(data["veto"].notnull())
+            data = data.drop(columns="veto")
+        if "publication_date" in data:
+            data["publication_date"] = data["publication_date"].where(data["publication_date"] != "NUL")
+        return cls.associate_projects(data)
 
     def is_valid_date(self, date_str):
         date_format = "%Y-%m-%d"
@@ -33,28 +29,28 @@ class LawsWriter(Writer):
         except ValueError:
             return False
 
-    def has_initial_file(self, initial_file: str):
-        return initial_file and initial_file != "NULL" and not pd.isnull(initial_file)
-
-    def associate_project(self, row: pd.Series):
-        initial_file = row.get("initial_file", None)
-        if not initial_file:
-            row["project_id"] = None
-            return row
-        project = LawProject.objects.filter(deputies_project_id=initial_file).first()
-        row["associated_project"] = project
-        if project:
-            self.associated_projects += 1
-
-    def update_or_create_element(self, row: pd.Series):
-        row = row.dropna()
-        self.associate_project(row)
-        if "veto" in row:
-            row["vetoed"] = True if row["veto"] != "NULL" else False
-            row.pop("veto")
-        if row["publication_date"] == "NUL":
-            row["publication_date"] = None
-        return Law.objects.update_or_create(
-            law_number=row["law_number"],
-            defaults=row.to_dict(),
+    @classmethod
+    def has_initial_file(cls, initial_files: pd.Series) -> pd.Series:
+        return initial_files.notnull() & (initial_files != "NULL") & (initial_files != "")
+
+    @classmethod
+    def associate_projects(cls, data: pd.DataFrame):
+        """Associates the laws to the projects of their initial files, fetched with a single query"""
+        cls.associated_projects = 0
+        if "initial_file" not in data:
+            return data
+        initial_files = data["initial_file"][cls.has_initial_file(data["initial_file"])]
+        project_ids = dict(
+            LawProject.objects.filter(deputies_project_id__in=set(initial_files)).values_list(
+                "deputies_project_id", "id"
+            )
         )
+        data["associated_project_id"] = initial_files.map(project_ids)
+        cls.associated_projects = int(data["associated_project_id"].notnull().sum())
+        return data
+
+    @classmethod
+    def write(cls, data: pd.DataFrame, batch_size: int = None):
+        written = super().write(data, batch_size)
+        cls.logger.info(f"{cls.associated_projects} laws were associated to projects")
+        return written
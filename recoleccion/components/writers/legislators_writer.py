@@ -1,11 +1,15 @@
 from pandas import DataFrame
 
 # Project
-from recoleccion.components.writers.writer import Writer
+from recoleccion.components.writers.bulk_writer import BulkWriter
 from .persons_writer import PersonsWriter
 
 
-class LegislatorsWriter(Writer):
+class LegislatorsWriter(BulkWriter):
+    natural_key = ("person_id", "start_of_term", "end_of_term")
+    field_mapping = {"party": "party_name"}
+    update_nulls = True
+
     @classmethod
     def write(cls, data: DataFrame, update_active_persons=False):
         cls.logger.info(f"Received {len(data)} legislators to write")
@@ -13,7 +17,7 @@ class LegislatorsWriter(Writer):
         non_duplicated_data = completed_data.drop_duplicates(
             subset=["person_id", "start_of_term", "end_of_term"], keep="last"
         )
-        super().write(non_duplicated_data)
+        return super().write(non_duplicated_data)
 
     @classmethod
     def add_missing_persons(cls, persons_data: DataFrame, update_active_persons):
@@ -25,11 +29,3 @@ class LegislatorsWriter(Writer):
                 "person_id",
             ] = person.id
         return persons_data
-
-    @classmethod
-    def get_key(cls, row):
-        return (
-            row["person_id"],
-            row["start_of_term"],
-            row["end_of_term"],
-        )
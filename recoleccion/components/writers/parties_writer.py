@@ -0,0 +1,52 @@
+from typing import Dict, Optional
+from django.db.models import Count, Model
+import pandas as pd
+
+# Project
+from recoleccion.components.writers.values_table import update_from_values
+from recoleccion.components.writers.writer import Writer
+from recoleccion.models.linking import DENIED_INDICATOR
+
+
+class PartiesWriter(Writer):
+    """
+    Assigns the linked parties to the records that reference them by name (votes, authorships and seats),
+    with a single UPDATE ... FROM (VALUES) per model instead of one query per party or per record
+    """
+
+    @classmethod
+    def count_by_party_name(cls, model: type[Model]) -> Dict[str, int]:
+        """Returns the amount of records without party of every party name, most frequent first (single GROUP BY)"""
+        records_by_name = (
+            model.objects.filter(party__isnull=True, party_name__isnull=False)
+            .values("party_name")
+            .annotate(records=Count("id"))
+            .order_by("-records", "party_name")
+        )
+        return {records["party_name"]: records["records"] for records in records_by_name}
+
+    @classmethod
+    def get_party_ids(cls, linked_data: pd.DataFrame, key_column: str = "denomination") -> Dict[object, Optional[int]]:
+        """
+        Receives the data of the PartyLinker and returns the party id of every key (denomination by default),
+        None for the denied ones. Records without a party are left out
+        """
+        linked_data = linked_data[linked_data["party_id"].notnull()]
+        return {
+            key: None if party_id == DENIED_INDICATOR else int(party_id)
+            for key, party_id in zip(linked_data[key_column], linked_data["party_id"])
+        }
+
+    @classmethod
+    def assign_parties(cls, model: type[Model], party_ids: Dict[str, Optional[int]]) -> int:
+        """Assigns the parties to every record of the model by its party name, returns the amount of updated records"""
+        updated = update_from_values(model, ["party_name"], ["party"], list(party_ids.items()))
+        cls.logger.info(f"{updated} {model.__name__}s were assigned to {len(party_ids)} party names")
+        return updated
+
+    @classmethod
+    def assign_parties_by_id(cls, model: type[Model], party_ids: Dict[int, Optional[int]]) -> int:
+        """Assigns the parties to the records of the model by their id, returns the amount of updated records"""
+        updated = update_from_values(model, ["id"], ["party"], list(party_ids.items()))
+        cls.logger.info(f"{updated} {model.__name__}s were assigned to a party")
+        return updated
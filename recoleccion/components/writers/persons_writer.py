@@ -1,16 +1,41 @@
+from typing import List
+from django.db import transaction
+from django.utils import timezone
 import pandas as pd
-import numpy as np
 import logging
 
 # Project
+from recoleccion.components.linkers.canonical_snapshot import PersonCanonicalSnapshot
 from recoleccion.models import Person, SocialData
+from .bulk_writer import BulkWriter
 from .writer import Writer
 
 logger = logging.getLogger(__name__)
 
 
+class SocialDataWriter(BulkWriter):
+    model = SocialData
+    natural_key = ("person",)
+    field_mapping = {"name": "person_name", "last_name": "person_last_name"}
+
+
 class PersonsWriter(Writer):
+    """
+    Writes persons in bulk: the new ones with a bulk_create (that returns their ids), the existing ones with a
+    bulk_update and the deactivation of the persons that are no longer active with a single UPDATE
+    As bulk operations don't call save(), the normalized full names are set here
+    """
+
     model = Person
+    # Column of the data -> field of the person
+    PERSON_FIELDS = {
+        "name": "name",
+        "last_name": "last_name",
+        "dni": "dni",
+        "gender": "sex",
+        "birthdate": "date_of_birth",
+    }
+    SOCIAL_DATA_FIELDS = ("twitter", "facebook", "instagram", "youtube", "email", "phone", "tiktok")
 
     @classmethod
     def get_missing_persons(cls, data: pd.DataFrame):
@@ -30,109 +55,102 @@ class PersonsWriter(Writer):
 
     @classmethod
     def update_active_persons(cls, modified_persons: list, seat_type: str):
-        deactivated_persons = 0
-        for person in Person.objects.filter(is_active=True, last_seat=seat_type):
-            if person not in modified_persons:
-                person.is_active = False
-                person.save()
-                deactivated_persons += 1
+        modified_ids = [person.id for person in modified_persons]
+        deactivated_persons = (
+            Person.objects.filter(is_active=True, last_seat=seat_type)
+            .exclude(id__in=modified_ids)
+            .update(is_active=False, modified_at=timezone.now())
+        )
         logger.info(f"{deactivated_persons} persons were deactivated")
 
     @classmethod
-    def write(cls, data: pd.DataFrame, add_social_data=False, update_active_persons=False):
+    def write(cls, data: pd.DataFrame, add_social_data=False, update_active_persons=False) -> List[Person]:
         logger.info(f"Received {len(data)} persons to write")
-        modified_persons = []
         missing_persons = cls.get_missing_persons(data)
         existing_persons = cls.get_existing_persons(data)
-        for _, row in missing_persons.iterrows():
-            person = cls.create_element(row, update_active_persons)
-            modified_persons.append(person)
+        with transaction.atomic():
+            created_persons = cls.create_persons(missing_persons, update_active_persons)
             if add_social_data:
-                cls.create_social_data(row, person)
-        for _, row in existing_persons.iterrows():
-            person = cls.update_element(row, update_active_persons)
-            modified_persons.append(person)
-        seat_type = data.iloc[0]["seat_type"]
-        if update_active_persons:
-            cls.update_active_persons(modified_persons, seat_type)
+                cls.create_social_data(missing_persons, created_persons)
+            updated_persons = cls.update_persons(existing_persons, update_active_persons)
+            modified_persons = created_persons + updated_persons
+            if update_active_persons:
+                seat_type = data.iloc[0]["seat_type"]
+                cls.update_active_persons(modified_persons, seat_type)
+        # The bulk updates send no signals, so the canonical persons of the linkers are reloaded
+        PersonCanonicalSnapshot.get_instance().invalidate()
         return modified_persons
 
     @classmethod
-    def get_existing_by_key(self, data):
-        if "dni" not in data.columns:
-            return {}
-        new_dnis = set(data.loc[data["dni"].notnull(), "dni"].unique())
-        repeated_persons = Person.query.filter(Person.dni.in_(new_dnis)).all()
-        return {person.dni: person for person in repeated_persons}
-
-    @classmethod
-    def get_key(self, row):
-        return row["dni"] if "dni" in row else None
+    def get_persons_info(cls, data: pd.DataFrame, update_active: bool, is_new: bool) -> List[dict]:
+        """Returns the fields of the persons of the data, prepared for the whole data at once"""
+        info = pd.DataFrame(index=data.index)
+        for column, field in cls.PERSON_FIELDS.items():
+            info[field] = data[column] if column in data else None
+        if is_new or update_active:
+            info["last_seat"] = data["seat_type"] if "seat_type" in data else None
+        info = info.astype(object).where(info.notnull(), None)
+        persons_info = info.to_dict(orient="records")
+        is_active = data["is_active"] if update_active and "is_active" in data else pd.Series(index=data.index)
+        for person_info, person_is_active in zip(persons_info, is_active):
+            if not pd.isna(person_is_active):
+                person_info["is_active"] = bool(person_is_active)
+            person_info["normalized_full_name"] = Person.normalize_full_name(
+                person_info["name"], person_info["last_name"]
+            )
+        return persons_info
 
     @classmethod
-    def create_social_data(self, row: pd.Series, person: Person):
-        SOCIAL_DATA_FIELDS = ("twitter", "facebook", "instagram", "youtube", "email", "phone", "tiktok")
-        social_data = {key: value for key, value in row.items() if key in SOCIAL_DATA_FIELDS}
-        social_data["person"] = person
-        SocialData.objects.create(**social_data)
+    def create_persons(cls, data: pd.DataFrame, update_active: bool) -> List[Person]:
+        persons = [Person(**info) for info in cls.get_persons_info(data, update_active, is_new=True)]
+        return Person.objects.bulk_create(persons)
 
     @classmethod
-    def create_element(self, row: pd.Series, update_active: bool):
-        row = row.replace({pd.NA: None, np.nan: None})
-        info = {
-            "name": row.get("name"),
-            "last_name": row.get("last_name"),
-            "dni": row.get("dni", None),
-            "sex": row.get("gender", None),
-            "date_of_birth": row.get("birthdate", None),
-            "last_seat": row.get("seat_type", None),
-        }
-        if update_active:
-            is_active = row.get("is_active", None)
-            if is_active is not None:
-                info["is_active"] = is_active
-            info["last_seat"] = row["seat_type"]
-        return Person.objects.create(**info)
+    def update_persons(cls, data: pd.DataFrame, update_active: bool) -> List[Person]:
+        persons_info = cls.get_persons_info(data, update_active, is_new=False)
+        person_ids = [int(person_id) for person_id in data["person_id"]]
+        persons = Person.objects.in_bulk(person_ids)
+        missing_ids = set(person_ids) - persons.keys()
+        if missing_ids:
+            raise Exception(f"Instances of Person not found: {sorted(missing_ids)}")
+        updated_fields = {"modified_at"}
+        now = timezone.now()
+        for person_id, person_info in zip(person_ids, persons_info):
+            person = persons[person_id]
+            for field, value in person_info.items():
+                setattr(person, field, value)
+            person.modified_at = now
+            updated_fields.update(person_info.keys())
+        updated_persons = [persons[person_id] for person_id in person_ids]
+        Person.objects.bulk_update(updated_persons, list(updated_fields))
+        return updated_persons
 
     @classmethod
-    def update_element(self, row: pd.Series, update_active: bool):
-        row = row.replace({pd.NA: None, np.nan: None})
-        info = {
-            "id": row.get("person_id"),
-            "name": row.get("name"),
-            "last_name": row.get("last_name"),
-            "dni": row.get("dni", None),
-            "sex": row.get("gender", None),
-            "date_of_birth": row.get("birthdate", None),
-        }
-        if update_active:
-            is_active = row.get("is_active", None)
-            if is_active is not None:
-                info["is_active"] = is_active
-            info["last_seat"] = row["seat_type"]
-        return Person.update_or_raise(**info)
+    def create_social_data(cls, data: pd.DataFrame, persons: List[Person]):
+        columns = [column for column in cls.SOCIAL_DATA_FIELDS if column in data]
+        social_data = data[columns].astype(object).where(data[columns].notnull(), None)
+        SocialData.objects.bulk_create(
+            SocialData(person=person, **person_social_data)
+            for person, person_social_data in zip(persons, social_data.to_dict(orient="records"))
+        )
 
     @classmethod
     def update_social_data(cls, data: pd.DataFrame):
+        """
+        The social data of the linked persons is upserted on the person (a single INSERT ... ON CONFLICT per batch),
+        the rest is created disassociated
+        """
         data = data.reset_index(drop=True)
-        data = data.replace({pd.NA: None, np.nan: None})
-        data = data.drop(columns="full_name")
-        data = data.rename(columns={"name": "person_name", "last_name": "person_last_name"})
-        created_associated = created_disassociated = updated = 0
-        for _, row in data.iterrows():
-            row_data = row.to_dict()
-            row_data.pop("index")
-            if not row_data["person_id"]:
-                SocialData.objects.create(**row_data)
-                created_disassociated += 1
-            else:
-                social_data = SocialData.objects.filter(person_id=row_data["person_id"]).first()
-                if social_data:
-                    social_data.update(**row_data)
-                    updated += 1
-                else:
-                    SocialData.objects.create(**row_data)
-                    created_associated += 1
-        logger.info(f"{created_associated} social data rows were created associated to a person")
-        logger.info(f"{created_disassociated} social data rows were created disassociated")
+        is_associated = data["person_id"].notnull()
+        associated_rows = SocialDataWriter.get_rows(SocialDataWriter.prepare_data(data[is_associated]))
+        disassociated_rows = SocialDataWriter.get_rows(SocialDataWriter.prepare_data(data[~is_associated]))
+        person_ids = [row["person_id"] for row in associated_rows]
+        existing_person_ids = set(
+            SocialData.objects.filter(person_id__in=person_ids).values_list("person_id", flat=True)
+        )
+        written = SocialDataWriter.upsert_rows(associated_rows, SocialDataWriter.natural_key)
+        SocialData.objects.bulk_create(SocialData(**row) for row in disassociated_rows)
+        updated = len([key for key in written if key[0] in existing_person_ids])
+        logger.info(f"{len(written) - updated} social data rows were created associated to a person")
+        logger.info(f"{len(disassociated_rows)} social data rows were created disassociated")
         logger.info(f"{updated} social data rows were updated")
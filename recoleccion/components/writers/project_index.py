@@ -0,0 +1,77 @@
+import logging
+
+# Project
+from recoleccion.models import Law, LawProject
+from recoleccion.utils.enums.project_chambers import ProjectChambers
+
+
+class ProjectIndex:
+    """
+    In-memory index used by the writers to resolve law projects and laws references without querying the database
+    Project keys (year and number) are packed into a single int to keep the index compact
+    It is built once per run, refresh() rebuilds it if the projects or laws change in the meantime
+    """
+
+    YEAR_MULTIPLIER = 1_000_000
+    ITERATOR_CHUNK_SIZE = 10000
+    logger = logging.getLogger(__name__)
+
+    def __init__(self):
+        self.refresh()
+
+    @classmethod
+    def pack_key(cls, year: int, number: int) -> int:
+        return year * cls.YEAR_MULTIPLIER + number
+
+    def refresh(self):
+        self.deputies_projects, self.senate_projects = {}, {}
+        self.deputies_day_orders, self.senate_day_orders = {}, {}
+        projects = LawProject.objects.order_by("-id").values_list(
+            "id",
+            "deputies_year",
+            "deputies_number",
+            "senate_year",
+            "senate_number",
+            "deputies_day_order",
+            "senate_day_order",
+        )
+        # From the newest to the oldest project, so the oldest one is kept when a key is repeated
+        for id, deputies_year, deputies_number, senate_year, senate_number, deputies_day_order, senate_day_order in (
+            projects.iterator(chunk_size=self.ITERATOR_CHUNK_SIZE)
+        ):
+            if deputies_year is not None and deputies_number is not None:
+                self.deputies_projects[self.pack_key(deputies_year, deputies_number)] = id
+            if senate_year is not None and senate_number is not None:
+                self.senate_projects[self.pack_key(senate_year, senate_number)] = id
+            if deputies_day_order is not None:
+                self.deputies_day_orders[deputies_day_order] = id
+            if senate_day_order is not None:
+                self.senate_day_orders[senate_day_order] = id
+        self.laws = dict(Law.objects.values_list("law_number", "id"))
+        self.logger.info(
+            f"Indexed {len(self.deputies_projects)} deputies projects, {len(self.senate_projects)} senate projects, "
+            + f"{len(self.deputies_day_orders) + len(self.senate_day_orders)} day orders and {len(self.laws)} laws"
+        )
+
+    def get_project_id(self, project_id: str, chamber: str) -> int | None:
+        """Receives a project id as it comes from the sources (e.g. 3042-D-21) and returns the LawProject id"""
+        try:
+            number, year = LawProject.get_project_year_and_number(project_id)
+        except ValueError:
+            self.logger.warning(f"Invalid project id: {project_id}")
+            return None
+        projects = self.deputies_projects if chamber == ProjectChambers.DEPUTIES else self.senate_projects
+        return projects.get(self.pack_key(year, number))
+
+    def get_project_id_from_day_order(self, day_order: int, chamber: str) -> int | None:
+        if not chamber:
+            return None
+        day_orders = self.deputies_day_orders if chamber == ProjectChambers.DEPUTIES else self.senate_day_orders
+        return day_orders.get(int(day_order))
+
+    def get_law_id(self, law_number: int | str) -> int | None:
+        try:
+            return self.laws.get(int(law_number))
+        except ValueError:
+            self.logger.warning(f"Invalid law number: {law_number}")
+            return None
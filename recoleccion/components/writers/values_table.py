@@ -0,0 +1,98 @@
+from typing import List, Sequence, Tuple
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connection
+from django.db.models import Field, Model
+from django.utils import timezone
+
+VALUES_ALIAS = "new_values"
+BATCH_SIZE = 1000
+
+
+def quote(name: str) -> str:
+    return connection.ops.quote_name(name)
+
+
+def get_values_table(fields: List[Field], rows: Sequence[tuple]) -> Tuple[str, list]:
+    """
+    Returns the SQL of a derived table with the rows, and its params, so the rows can be joined with a table
+    The columns are named like the columns of the fields and, on Postgres, casted to their types (VALUES are untyped)
+    """
+    placeholders = ", ".join(["%s"] * len(fields))
+    values = ", ".join([f"({placeholders})"] * len(rows))
+    columns = []
+    for position, field in enumerate(fields, start=1):
+        column = f"column{position}"
+        if connection.vendor == "postgresql":
+            column = f"CAST({column} AS {field.db_type(connection)})"
+        columns.append(f"{column} AS {quote(field.column)}")
+    params = [field.get_db_prep_save(value, connection) for row in rows for field, value in zip(fields, row)]
+    return f"(SELECT {', '.join(columns)} FROM (VALUES {values}) AS raw_values) AS {VALUES_ALIAS}", params
+
+
+def get_join_condition(model: type[Model], fields: List[Field], null_fields: Sequence[str] = ()) -> str:
+    # NULLs never match with "=", the null fields are the ones that have to be null in the records instead
+    table = quote(model._meta.db_table)
+    conditions = [f"{table}.{quote(field.column)} = {VALUES_ALIAS}.{quote(field.column)}" for field in fields]
+    conditions += [f"{table}.{quote(model._meta.get_field(field).column)} IS NULL" for field in null_fields]
+    return " AND ".join(conditions)
+
+
+def update_from_values(
+    model: type[Model],
+    key_fields: List[str],
+    value_fields: List[str],
+    rows: Sequence[tuple],
+    batch_size=BATCH_SIZE,
+    null_fields: Sequence[str] = (),
+) -> int:
+    """
+    Updates the value fields of the records that match the key fields of the rows (and have the null fields null),
+    with an UPDATE ... FROM (VALUES) per batch, and returns the amount of updated records
+    Each row has the values of the key fields followed by the values of the value fields
+    The modified_at of the records is updated too, like save() would do
+    """
+    key_fields = [model._meta.get_field(field) for field in key_fields]
+    value_fields = [model._meta.get_field(field) for field in value_fields]
+    assignments = ", ".join(f"{quote(field.column)} = {VALUES_ALIAS}.{quote(field.column)}" for field in value_fields)
+    assignment_params = []
+    try:
+        modified_at = model._meta.get_field("modified_at")
+        assignments += f", {quote(modified_at.column)} = %s"
+        assignment_params.append(modified_at.get_db_prep_save(timezone.now(), connection))
+    except FieldDoesNotExist:
+        pass
+    updated = 0
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            values_table, params = get_values_table(key_fields + value_fields, rows[start : start + batch_size])
+            cursor.execute(
+                f"UPDATE {quote(model._meta.db_table)} SET {assignments} FROM {values_table} "
+                + f"WHERE {get_join_condition(model, key_fields, null_fields)}",
+                assignment_params + params,
+            )
+            updated += cursor.rowcount
+    return updated
+
+
+def get_unmatched_values(
+    model: type[Model], key_fields: List[str], rows: Sequence[tuple], batch_size=BATCH_SIZE, null_fields=()
+) -> List[tuple]:
+    """
+    Returns the rows (values of the key fields) that match no record (with the null fields null),
+    with an anti-join per batch
+    """
+    key_fields = [model._meta.get_field(field) for field in key_fields]
+    columns = ", ".join(f"{VALUES_ALIAS}.{quote(field.column)}" for field in key_fields)
+    unmatched = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            values_table, params = get_values_table(key_fields, rows[start : start + batch_size])
+            cursor.execute(
+                f"SELECT {columns} FROM {values_table} WHERE NOT EXISTS "
+                + f"(SELECT 1 FROM {quote(model._meta.db_table)} "
+                + f"WHERE {get_join_condition(model, key_fields, null_fields)})",
+                params,
+            )
+            for values in cursor.fetchall():
+                unmatched.append(tuple(field.to_python(value) for field, value in zip(key_fields, values)))
+    return unmatched
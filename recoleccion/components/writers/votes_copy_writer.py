@@ -0,0 +1,182 @@
+import csv
+import io
+import uuid
+from typing import Dict, List, Tuple
+from django.db import connection, transaction
+import pandas as pd
+
+# Project
+from recoleccion.components.writers.project_index import ProjectIndex
+from recoleccion.components.writers.votes_writer import VotesWriter
+from recoleccion.utils.enums.vote_types import VoteTypes
+
+
+STAGING_TABLE = "recoleccion_vote_staging"
+STAGING_COLUMNS = [
+    "uuid",
+    "source",
+    "chamber",
+    "date",
+    "person_id",
+    "person_name",
+    "person_last_name",
+    "party_name",
+    "party_id",
+    "province",
+    "vote",
+    "project_id",
+    "law_id",
+    "reference",
+    "reference_description",
+    "vote_type",
+    "linking_id",
+]
+NULL_MARKER = "\\N"
+# Django casts reference to text in the constraint conditions, Postgres only infers the index with the same predicate
+HAS_VOTED_TARGET = "(project_id IS NOT NULL OR law_id IS NOT NULL OR reference::text IS NOT NULL)"
+HAS_NOT_VOTED_TARGET = "staged.project_id IS NULL AND staged.law_id IS NULL AND staged.reference IS NULL"
+VOTED_TARGET = "COALESCE(project_id, 0), COALESCE(law_id, 0), COALESCE(reference, '')"
+# The conflict targets must match the expressions and conditions of the Vote unique constraints
+CONFLICT_TARGETS = {
+    "with_person": (
+        f"(chamber, person_id, {VOTED_TARGET}) WHERE person_id IS NOT NULL AND {HAS_VOTED_TARGET}",
+        f"person_id IS NOT NULL AND {HAS_VOTED_TARGET}",
+    ),
+    "without_person": (
+        f"(chamber, COALESCE(person_name, ''), COALESCE(person_last_name, ''), {VOTED_TARGET}) "
+        + f"WHERE person_id IS NULL AND {HAS_VOTED_TARGET}",
+        f"person_id IS NULL AND {HAS_VOTED_TARGET}",
+    ),
+}
+
+
+class VotesCopyWriter(VotesWriter):
+    """
+    Loads full vote datasets (e.g. a historical rebuild) on Postgres: the resolved votes are streamed with COPY
+    into a temporary staging table and merged into the votes table with INSERT ... SELECT ... ON CONFLICT
+    Follows the same rules as VotesWriter: general votes are only overwritten by other general votes
+    """
+
+    COPY_CHUNK_SIZE = 100000
+
+    def write(self, data: pd.DataFrame) -> Dict[str, int]:
+        if connection.vendor != "postgresql":
+            raise RuntimeError("COPY loading is only available on Postgres, use VotesWriter instead")
+        self.logger.info(f"Received {len(data)} votes to load...")
+        votes_data = self.get_votes_data(data)
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                self.create_staging_table(cursor)
+                for start in range(0, len(votes_data), self.COPY_CHUNK_SIZE):
+                    self.copy_to_staging_table(cursor, votes_data[start : start + self.COPY_CHUNK_SIZE])
+                inserted, updated = self.merge_staging_table(cursor)
+                # Dropped right away in case the load is part of a longer transaction
+                cursor.execute(f"DROP TABLE {STAGING_TABLE}")
+        skipped = len(data) - inserted - updated
+        self.logger.info(f"Inserted {inserted} {self.model.__name__}s")
+        self.logger.info(f"Updated {updated} {self.model.__name__}s")
+        self.logger.info(f"Skipped {skipped} {self.model.__name__}s (repeated or general vote already exists)")
+        return {"inserted": inserted, "updated": updated, "skipped": skipped}
+
+    def get_votes_data(self, data: pd.DataFrame) -> List[dict]:
+        """Resolves the votes and keeps only one vote per unique key, as ON CONFLICT can't affect a row twice"""
+        if not self.project_index:
+            self.project_index = ProjectIndex()
+        rows = self.get_rows(data)
+        person_ids = self.get_existing_person_ids(rows)
+        votes_data = {}
+        for row in rows:
+            vote_data = self.build_vote_data(row, person_ids)
+            vote_data.setdefault("vote_type", VoteTypes.OTHER)
+            key = self.get_staging_key(vote_data)
+            existing_vote_data = votes_data.get(key)
+            if not existing_vote_data or self.should_update(
+                existing_vote_data.get("vote_type"), vote_data.get("vote_type")
+            ):
+                votes_data[key] = vote_data
+        return list(votes_data.values())
+
+    def get_staging_key(self, vote_data: dict) -> tuple:
+        # Same as the unique constraints: the names are coalesced to empty strings
+        if vote_data.get("person_id"):
+            person_key = (vote_data["person_id"], "", "")
+        else:
+            person_key = (None, vote_data.get("person_name") or "", vote_data.get("person_last_name") or "")
+        target_key = (vote_data.get("project_id"), vote_data.get("law_id"), vote_data.get("reference"))
+        return (vote_data.get("chamber"),) + person_key + target_key
+
+    def create_staging_table(self, cursor):
+        # Temporary tables are only visible to this connection and are dropped with the transaction
+        cursor.execute(
+            f"CREATE TEMP TABLE {STAGING_TABLE} ON COMMIT DROP AS "
+            + f"SELECT {', '.join(STAGING_COLUMNS)} FROM recoleccion_vote WITH NO DATA"
+        )
+
+    def copy_to_staging_table(self, cursor, votes_data: List[dict]):
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        for vote_data in votes_data:
+            vote_data = {**vote_data, "uuid": uuid.uuid4()}
+            csv_writer.writerow(self.format_copy_value(vote_data.get(column)) for column in STAGING_COLUMNS)
+        buffer.seek(0)
+        cursor.copy_expert(
+            f"COPY {STAGING_TABLE} ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv, NULL '{NULL_MARKER}')",
+            buffer,
+        )
+
+    def format_copy_value(self, value) -> str:
+        if value is None:
+            return NULL_MARKER
+        return str(value)
+
+    def merge_staging_table(self, cursor) -> Tuple[int, int]:
+        inserted = updated = 0
+        for conflict_target, condition in CONFLICT_TARGETS.values():
+            cursor.execute(self.get_upsert_query(conflict_target, condition))
+            target_inserted, target_updated = cursor.fetchone()
+            inserted += target_inserted
+            updated += target_updated
+        cursor.execute(self.get_untargeted_insert_query())
+        inserted += cursor.rowcount
+        return inserted, updated
+
+    def get_upsert_query(self, conflict_target: str, condition: str) -> str:
+        columns = ", ".join(STAGING_COLUMNS)
+        updated_columns = [column for column in STAGING_COLUMNS if column != "uuid"]
+        # Null values don't overwrite existing data, just like VotesWriter
+        updates = ", ".join(f"{column} = COALESCE(EXCLUDED.{column}, existing.{column})" for column in updated_columns)
+        # xmax is 0 only for the rows inserted by this statement
+        return f"""
+            WITH merged AS (
+                INSERT INTO recoleccion_vote AS existing ({columns}, created_at, modified_at)
+                SELECT {columns}, now(), now() FROM {STAGING_TABLE} WHERE {condition}
+                ON CONFLICT {conflict_target}
+                DO UPDATE SET {updates}, modified_at = EXCLUDED.modified_at
+                WHERE EXCLUDED.vote_type = '{VoteTypes.GENERAL}' OR existing.vote_type <> '{VoteTypes.GENERAL}'
+                RETURNING (xmax = 0) AS inserted
+            )
+            SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM merged
+        """
+
+    def get_untargeted_insert_query(self) -> str:
+        """Votes without project, law and reference are not covered by the constraints, so they are anti-joined"""
+        columns = ", ".join(STAGING_COLUMNS)
+        staged_columns = ", ".join(f"staged.{column}" for column in STAGING_COLUMNS)
+        return f"""
+            INSERT INTO recoleccion_vote ({columns}, created_at, modified_at)
+            SELECT {staged_columns}, now(), now() FROM {STAGING_TABLE} AS staged
+            WHERE {HAS_NOT_VOTED_TARGET}
+            AND NOT EXISTS (
+                SELECT 1 FROM recoleccion_vote AS existing
+                WHERE existing.chamber = staged.chamber
+                AND existing.project_id IS NULL AND existing.law_id IS NULL AND existing.reference IS NULL
+                AND existing.person_id IS NOT DISTINCT FROM staged.person_id
+                AND (
+                    staged.person_id IS NOT NULL
+                    OR (
+                        existing.person_name IS NOT DISTINCT FROM staged.person_name
+                        AND existing.person_last_name IS NOT DISTINCT FROM staged.person_last_name
+                    )
+                )
+            )
+        """
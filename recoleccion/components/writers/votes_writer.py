@@ -1,169 +1,202 @@
+from typing import Dict, List, Set, Tuple
+from django.db import transaction
 from django.db.models import Q
+from django.utils import timezone
 import pandas as pd
-from datetime import datetime as dt
-import numpy as np
 import logging
 
 # Project
-from recoleccion.models.linking import DENIED_INDICATOR
-from recoleccion.models import Law, LawProject, Party, Person, Vote
+from recoleccion.models import Person, Vote
 from recoleccion.components.writers import Writer
+from recoleccion.components.writers.parties_writer import PartiesWriter
+from recoleccion.components.writers.project_index import ProjectIndex
 from recoleccion.utils.enums.project_chambers import ProjectChambers
 from recoleccion.utils.enums.vote_choices import VOTE_CHOICE_TRANSLATION
 from recoleccion.utils.enums.vote_types import VoteTypes
 
 
 class VotesWriter(Writer):
+    """
+    Writes votes in batches: projects and laws are resolved with a ProjectIndex loaded once per writer,
+    every batch fetches its persons and existing votes with a couple of queries and writes everything
+    with bulk_create and bulk_update
+    """
+
     model = Vote
+    BATCH_SIZE = 2000
 
-    def __init__(self):
-        self.last_day_order = None
-        self.last_deputies_project_id = None
-        self.last_senate_project_id = None
-        self.last_deputies_project = None
-        self.last_senate_project = None
+    def __init__(self, batch_size: int = BATCH_SIZE, project_index: ProjectIndex = None):
+        self.batch_size = batch_size
+        self.project_index = project_index
         self.logger = logging.getLogger(__name__)
-        self.votes_to_be_updated = []
-        self.votes_to_be_created = []
+        self.vote_fields = {field.attname for field in Vote._meta.concrete_fields} - {"id"}
 
     def write(self, data: pd.DataFrame):
-        self.logger.info(f"Received {len(data)} law projects to write...")
-        written, updated = [], []
-        for i in data.index:
-            row = data.loc[i]
-            element, was_created = self.update_or_create_element(row)
-            if was_created:
-                written.append(element)
-            else:
-                updated.append(element)
+        self.logger.info(f"Received {len(data)} votes to write...")
+        if not self.project_index:
+            self.project_index = ProjectIndex()
+        written = []
+        total_updated = total_skipped = 0
+        for start in range(0, len(data), self.batch_size):
+            batch = data.iloc[start : start + self.batch_size]
+            created, updated, skipped = self.write_batch(batch)
+            written.extend(created)
+            total_updated += updated
+            total_skipped += skipped
         self.logger.info(f"Created {len(written)} {self.model.__name__}s")
-        self.logger.info(f"Updated {len(updated)} {self.model.__name__}s")
+        self.logger.info(f"Updated {total_updated} {self.model.__name__}s")
+        self.logger.info(
+            f"Skipped {total_skipped} {self.model.__name__}s (general vote already exists or written by another thread)"
+        )
         return written
 
-    def retrieve_project(self, project_id: str, chamber: str):
-        if pd.isnull(project_id) or not project_id:
-            return None
-        number, year = LawProject.get_project_year_and_number(project_id)
-        if chamber == ProjectChambers.DEPUTIES:
-            project = LawProject.objects.filter(deputies_year=year, deputies_number=number).first()
-            if project:
-                self.logger.info(f"Found deputies project with year {year} and number {number}")
-        else:
-            project = LawProject.objects.filter(senate_year=year, senate_number=number).first()
-            if project:
-                self.logger.info(f"Found senate project with year {year} and number {number}")
-        if not project:
-            self.logger.info(f"Project with year {year} and number {number} not found for chamber {chamber}")
-        return project
-
-    def retrieve_project_from_day_order(self, day_order: int, chamber: str) -> LawProject:
-        if pd.isnull(day_order) or not day_order:
-            return None
-        if not chamber:
-            return None
-        if chamber == ProjectChambers.DEPUTIES:
-            project = LawProject.objects.filter(deputies_day_order=day_order).first()
-        else:
-            project = LawProject.objects.filter(senate_day_order=day_order).first()
-        if project:
-            self.logger.info(f"Found project with day order {day_order}")
-        else:
-            self.logger.info(f"Project with day order {day_order} not found")
-        return project
-
-    def clean_person_data(self, row: pd.Series) -> pd.Series:
-        if row.get("person_id"):
-            person = Person.objects.get(id=row.get("person_id"))
-        else:
-            row["person_name"] = row.get("name")
-            row["person_last_name"] = row.get("last_name")
-            person = None
-        row = row.drop(["name", "last_name"], errors="ignore")
-        return row, person
-
-    def _get_vote_project(self, row: pd.Series, project_id: str, chamber: str) -> pd.Series:
-        if not project_id:
-            return row, None
-        if chamber == ProjectChambers.DEPUTIES:
-            row_var = "deputies_project_id"
-            last_id_var = "last_deputies_project_id"
-            last_project_var = "last_deputies_project"
-        else:
-            row_var = "senate_project_id"
-            last_id_var = "last_senate_project_id"
-            last_project_var = "last_senate_project"
+    def get_rows(self, batch: pd.DataFrame) -> List[dict]:
+        batch = batch.astype(object).where(batch.notnull(), None)
+        return batch.to_dict(orient="records")
+
+    def write_batch(self, batch: pd.DataFrame) -> Tuple[List[Vote], int, int]:
+        rows = self.get_rows(batch)
+        person_ids = self.get_existing_person_ids(rows)
+        votes_data = [self.build_vote_data(row, person_ids) for row in rows]
+        existing_votes = self.get_existing_votes(votes_data)
+
+        new_votes, updated_votes, updated_fields = {}, {}, set()
+        skipped = 0
+        for vote_data in votes_data:
+            key = self.get_vote_key(vote_data)
+            vote = new_votes.get(key) or existing_votes.get(key)
+            if not vote:
+                new_votes[key] = Vote(**vote_data)
+            elif self.should_update(vote.vote_type, vote_data.get("vote_type")):
+                for field, value in vote_data.items():
+                    setattr(vote, field, value)
+                if vote.pk:
+                    updated_votes[vote.pk] = vote
+                    updated_fields.update(vote_data.keys())
+            else:
+                skipped += 1
+
+        with transaction.atomic():
+            # Votes written in the meantime by other threads are left as they are (ON CONFLICT DO NOTHING)
+            Vote.objects.bulk_create(new_votes.values(), batch_size=self.batch_size, ignore_conflicts=True)
+            created = self.get_inserted_votes(list(new_votes.values()))
+            skipped += len(new_votes) - len(created)
+            if updated_votes:
+                now = timezone.now()
+                for vote in updated_votes.values():
+                    vote.modified_at = now
+                updated_fields.add("modified_at")
+                Vote.objects.bulk_update(updated_votes.values(), list(updated_fields), batch_size=self.batch_size)
+        return created, len(updated_votes), skipped
+
+    def get_inserted_votes(self, new_votes: List[Vote]) -> List[Vote]:
+        """
+        With ignore_conflicts the ids of the votes are not returned, and the votes that were skipped can't be told
+        apart, so the inserted ones are fetched again by their uuids (along the same indexed filters of the batch)
+        """
+        if not new_votes:
+            return []
+        votes_data = [{field: getattr(vote, field) for field in self.vote_fields} for vote in new_votes]
+        uuids = {vote.uuid for vote in new_votes}
+        return list(Vote.objects.filter(self.get_votes_query(votes_data), uuid__in=uuids).order_by("id"))
+
+    def get_existing_person_ids(self, rows: List[dict]) -> Set[int]:
+        person_ids = {int(row["person_id"]) for row in rows if row.get("person_id")}
+        if not person_ids:
+            return set()
+        return set(Person.objects.filter(id__in=person_ids).values_list("id", flat=True))
+
+    def build_vote_data(self, row: dict, person_ids: set):
+        """
+        Receives a row and the existing persons of its batch, and returns the data of the vote to write
+        The precedence of the references is: deputies project id, senate project id and day order
+        When a reference is not found, it is stored in the vote's reference field
+        """
+        vote_data = {key: value for key, value in row.items() if value is not None}
+        person_id = vote_data.pop("person_id", None)
+        # The names are kept even when the person is found, so the next runs know it (see get_known_persons)
+        vote_data["person_name"] = row.get("name")
+        vote_data["person_last_name"] = row.get("last_name")
+        if person_id and int(person_id) in person_ids:
+            vote_data["person_id"] = int(person_id)
+        elif person_id:
+            self.logger.warning(f"Person with id {person_id} not found")
+
+        project_id = None
+        for column, chamber in [
+            ("deputies_project_id", ProjectChambers.DEPUTIES),
+            ("senate_project_id", ProjectChambers.SENATORS),
+        ]:
+            raw_project_id = vote_data.get(column)
+            if not raw_project_id:
+                continue
+            project_id = self.project_index.get_project_id(raw_project_id, chamber)
+            if project_id:
+                break
+            self.logger.info(f"Project {raw_project_id} not found for chamber {chamber}")
+            vote_data["reference"] = raw_project_id
+        day_order = vote_data.get("day_order")
+        if not project_id and day_order:
+            project_id = self.project_index.get_project_id_from_day_order(day_order, vote_data.get("chamber"))
+            if not project_id:
+                self.logger.info(f"Project with day order {day_order} not found")
+                vote_data["reference"] = day_order
         if project_id:
-            if project_id == getattr(self, last_id_var):
-                self.logger.info(
-                    f"Project with deputies id {project_id} coincides, using last project: {getattr(self, last_id_var)}"
-                )
-                row["project"] = getattr(self, last_project_var)
-                return row, getattr(self, last_project_var)
-            project = self.retrieve_project(project_id, chamber)
-            if not project:
-                row["reference"] = row[row_var]
-                return row, None
-            setattr(self, last_id_var, project_id)
-            setattr(self, last_project_var, project)
-            row["project"] = project
-            return row, project
-
-    def get_vote_project(self, row: pd.Series) -> pd.Series:
-        deputies_project_id = row.get("deputies_project_id", None)
-        row, project = self._get_vote_project(row, deputies_project_id, ProjectChambers.DEPUTIES)
-        if project:
-            return row, project
-        senate_project_id = row.get("senate_project_id", None)
-        row, project = self._get_vote_project(row, senate_project_id, ProjectChambers.SENATORS)
-        if project:
-            return row, project
-
-        day_order = row.get("day_order", None)
-        if not day_order:
-            return row, None
-        if day_order == self.last_day_order:
-            self.logger.info(f"Day order {day_order} coincides, using last project: {self.last_project.project_id}")
-            row["project"] = self.last_project
-            return row, self.last_project
-        project = self.retrieve_project_from_day_order(day_order, row["chamber"])
-        if not project:
-            row["reference"] = row["day_order"]
-            return row, None
-        self.last_day_order = day_order
-        self.last_project = project
-        row["project"] = project
-        return row, project
-
-    def get_vote_law(self, row: pd.Series) -> pd.Series:
-        law_number = row.get("law", None)
-        law = Law.objects.filter(law_number=law_number).first()
-        if not law:
-            row["reference"] = row["law"]
-            row = row.drop(["law"], errors="ignore")
-            self.logger.warning(f"Law with number {law_number} not found")
-            return row, None
-        row["law"] = law
-        return row, law
-
-    def get_existing_vote(self, row, person, law_project, law, reference):
-        # If we have a person, we can use it to filter
+            vote_data["project_id"] = project_id
+
+        law_number = vote_data.get("law")
+        if law_number is not None:
+            law_id = self.project_index.get_law_id(law_number)
+            if law_id:
+                vote_data["law_id"] = law_id
+            else:
+                self.logger.warning(f"Law with number {law_number} not found")
+                vote_data["reference"] = law_number
+
+        if vote_data.get("reference") is not None:
+            vote_data["reference"] = str(vote_data["reference"])
+        vote_data["vote"] = self.format_vote(vote_data.get("vote"))
+        return {key: value for key, value in vote_data.items() if key in self.vote_fields}
+
+    def get_vote_key(self, vote_data: dict) -> tuple:
+        # If we have a person, we can use it to identify the vote
         # Else, we have to use the name and last name
-        if not person:
-            vote = Vote.objects.filter(
-                person_name=row.get("person_name"),
-                person_last_name=row.get("person_last_name"),
-                project=law_project,
-                law=law,
-                reference=reference,
-            ).first()
+        # The chamber is part of the key, like in the unique constraints of the votes
+        if vote_data.get("person_id"):
+            person_key = (vote_data["person_id"], None, None)
         else:
-            vote = Vote.objects.filter(
-                person=person,
-                project=law_project,
-                law=law,
-                reference=reference,
-            ).first()
-        return vote
+            person_key = (None, vote_data.get("person_name"), vote_data.get("person_last_name"))
+        target_key = (vote_data.get("project_id"), vote_data.get("law_id"), vote_data.get("reference"))
+        return (vote_data.get("chamber"),) + person_key + target_key
+
+    def get_existing_votes(self, votes_data: List[dict]) -> Dict[tuple, Vote]:
+        """Fetches, with a single query, every existing vote that may match the votes of the batch"""
+        existing_votes = {}
+        for vote in Vote.objects.filter(self.get_votes_query(votes_data)).order_by("id"):
+            vote_data = {field: getattr(vote, field) for field in self.vote_fields}
+            existing_votes.setdefault(self.get_vote_key(vote_data), vote)
+        return existing_votes
+
+    def get_votes_query(self, votes_data: List[dict]) -> Q:
+        project_ids = {data["project_id"] for data in votes_data if data.get("project_id")}
+        law_ids = {data["law_id"] for data in votes_data if data.get("law_id")}
+        references = {data["reference"] for data in votes_data if data.get("reference")}
+        query = Q(project_id__in=project_ids) | Q(law_id__in=law_ids) | Q(reference__in=references)
+        unreferenced_votes = [data for data in votes_data if not self.has_reference(data)]
+        if unreferenced_votes:
+            person_ids = {data["person_id"] for data in unreferenced_votes if data.get("person_id")}
+            last_names = {data["person_last_name"] for data in unreferenced_votes if data.get("person_last_name")}
+            query |= Q(project__isnull=True, law__isnull=True, reference__isnull=True) & (
+                Q(person_id__in=person_ids) | Q(person_last_name__in=last_names)
+            )
+        return query
+
+    def has_reference(self, vote_data: dict) -> bool:
+        return bool(vote_data.get("project_id") or vote_data.get("law_id") or vote_data.get("reference"))
+
+    def should_update(self, existing_vote_type: str, new_vote_type: str) -> bool:
+        # General votes can only be overwritten by other general votes
+        return new_vote_type == VoteTypes.GENERAL or existing_vote_type != VoteTypes.GENERAL
 
     def format_vote(self, vote: str) -> str:
         if not vote or vote.title() == "Sin votar":
@@ -171,62 +204,9 @@ class VotesWriter(Writer):
         vote = vote.title().upper()
         return VOTE_CHOICE_TRANSLATION.get(vote, vote)
 
-    def write_vote(self, row: pd.Series, person, law_project, law, reference):
-        existing_vote = self.get_existing_vote(row, person, law_project, law, reference)
-        row.update({"vote": self.format_vote(row.vote)})
-        if existing_vote:
-            this_vote_type = row.get("vote_type", None)
-            if this_vote_type == VoteTypes.GENERAL:
-                existing_vote.update(**row.to_dict())
-                vote = existing_vote
-                was_created = False
-            elif existing_vote.vote_type != VoteTypes.GENERAL:
-                # podemos actualizar si el existente no es general
-                vote = existing_vote.update(**row.to_dict())
-                was_created = False
-            else:
-                self.logger.info("General vote already exists, not updating")
-                vote, was_created = None, False
-        else:
-            row = row.drop(["index"], errors="ignore")
-            vote = Vote.objects.create(**row.to_dict())
-            was_created = True
-        return vote, was_created
-
-    def update_or_create_element(self, row: pd.Series):
-        row = row.dropna()
-        row, person = self.clean_person_data(row)
-        row, law_project = self.get_vote_project(row)
-        row = row.drop(["deputies_project_id", "senate_project_id", "day_order"], errors="ignore")
-        if row.get("law", None) is not None:
-            row, law = self.get_vote_law(row)
-        else:
-            law = None
-        reference = row.get("reference", None)
-
-        vote, was_created = self.write_vote(
-            row,
-            person,
-            law_project,
-            law,
-            reference,
-        )
-        return vote, was_created
-
     def update_vote_parties(self, updated_votes: pd.DataFrame):
-        """Receives a DF with cols: vote_id, party_id
-        Updates only the party_id of the votes with the given vote_id
+        """Receives a DF with cols: record_id (the vote id), party_id
+        Updates only the party_id of the votes with the given ids, with a single UPDATE
         """
-        votes_with_party = updated_votes[updated_votes["party_id"].notnull()]
-        # we keep only the votes that have a party_id
-        votes_with_party.loc[votes_with_party["party_id"] == DENIED_INDICATOR, "party_id"] = None
-        for i in votes_with_party.index:
-            party_id = votes_with_party.loc[i, "party_id"]
-            vote_info = votes_with_party.loc[i]
-            vote = Vote.objects.get(id=vote_info["record_id"])
-            if pd.isna(party_id):
-                party = None
-            else:
-                party = Party.objects.get(id=party_id)
-            vote.party = party
-            vote.save()
+        party_ids = PartiesWriter.get_party_ids(updated_votes, key_column="record_id")
+        return PartiesWriter.assign_parties_by_id(Vote, party_ids)
@@ -1,36 +1,28 @@
 # Base command
 from typing import List
-from django.db.models import Q
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 import pandas as pd
 from tqdm import tqdm
 
 # Project
-from recoleccion.models.linking import DENIED_INDICATOR
 import logging
 from recoleccion.components.linkers.party_linker import PartyLinker
+from recoleccion.components.writers.parties_writer import PartiesWriter
 from recoleccion.models import Authorship, Party, PartyDenomination
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     logger = logging.getLogger(__name__)
 
     def handle(self, *args, **options):
-        authors_without_party = Authorship.objects.filter(party__isnull=True)
-        unique_party_names = authors_without_party.values_list("party_name", flat=True).distinct()
-        if not unique_party_names:
+        # Sorted by the amount of authors, the most frequent parties are linked first
+        parties_authors = PartiesWriter.count_by_party_name(Authorship)
+        if not parties_authors:
             self.logger.info("All authors have a party, exiting...")
             return
-        self.logger.info(f"{len(unique_party_names)} unique parties found")
-        self.logger.info("Sorting parties...")
-        parties_authors = {
-            party_name: Authorship.objects.filter(Q(party_id__isnull=True) & Q(party_name=party_name)).count()
-            for party_name in unique_party_names
-        }
-        self.logger.info(f"Authors without party: {authors_without_party.count()}")
-        parties_to_link = sorted(parties_authors.items(), key=lambda x: x[1], reverse=True)
-        parties_to_link = [party_name for party_name, _ in parties_to_link]
-        linked_authors = self.link_parties(parties_to_link)
+        self.logger.info(f"{len(parties_authors)} unique parties found")
+        self.logger.info(f"Authors without party: {sum(parties_authors.values())}")
+        linked_authors = self.link_parties(list(parties_authors.keys()))
         self.logger.info(f"{linked_authors} authors have been updated from linking")
         self.check_actions_for_unlinked_parties()
         self.logger.info(f"{self.unlinked_authors} authors have been updated from linking")
@@ -45,13 +37,6 @@ class Command(BaseCommand):
             self.logger.info(f"{updated_authors} authors from {party_name} have been updated to have NULL party")
         return authors.count()
 
-    def load_party_to_linked_authors(self, party_row: pd.Series):
-        party_id = party_row["party_id"]
-        party = Party.objects.get(id=party_id) if party_id != DENIED_INDICATOR else None
-        party_name = party_row["denomination"]
-        linked_authors = self.load_party_to_authors(party_name, party)
-        return linked_authors
-
     def link_parties(self, parties_to_link: List[str]) -> pd.DataFrame:
         # Tries to link the parties, unlinked parties are returned
         parties_to_link = pd.DataFrame(parties_to_link, columns=["party_name"])
@@ -64,11 +49,7 @@ class Command(BaseCommand):
         linked_data = linker.link_parties(parties_to_link)
         linked_parties = linked_data[linked_data["party_id"].notnull()]
         self.unlinked_parties = linked_data[linked_data["party_id"].isnull()]
-        total_authors_linked = 0
-        for _, row in linked_parties.iterrows():
-            authors_linked = self.load_party_to_linked_authors(row)
-            total_authors_linked += authors_linked
-        return total_authors_linked
+        return PartiesWriter.assign_parties(Authorship, PartiesWriter.get_party_ids(linked_parties))
 
     def check_actions_for_unlinked_parties(self):
         self.unlinked_authors = 0
@@ -1,48 +1,35 @@
 # Base command
 from typing import List
-from django.db.models import Q
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 import pandas as pd
 
 # Project
 from recoleccion.models import DeputySeat, SenateSeat
-from recoleccion.models.linking import DENIED_INDICATOR
 import logging
 from recoleccion.components.linkers.party_linker import PartyLinker
+from recoleccion.components.writers.parties_writer import PartiesWriter
 from recoleccion.models.party import Party, PartyDenomination
 from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     logger = logging.getLogger(__name__)
 
     def handle(self, *args, **options):
-        deputy_seats_without_party = DeputySeat.objects.filter(party__isnull=True)
-        unique_party_names = deputy_seats_without_party.values_list("party_name", flat=True).distinct()
-        if not unique_party_names:
+        # Sorted by the amount of seats, the most frequent parties are linked first
+        parties_seats = PartiesWriter.count_by_party_name(DeputySeat)
+        if not parties_seats:
             self.logger.info("All deputy seats have a party, continuing...")
         else:
-            self._handle(unique_party_names, LegislatorSeats.DEPUTY)
-        senate_seats_without_party = SenateSeat.objects.filter(party__isnull=True)
-        unique_party_names = senate_seats_without_party.values_list("party_name", flat=True).distinct()
-        if not unique_party_names:
+            self._handle(list(parties_seats.keys()), LegislatorSeats.DEPUTY)
+        parties_seats = PartiesWriter.count_by_party_name(SenateSeat)
+        if not parties_seats:
             self.logger.info("All senate seats have a party, exiting...")
         else:
-            self._handle(unique_party_names, LegislatorSeats.SENATOR)
+            self._handle(list(parties_seats.keys()), LegislatorSeats.SENATOR)
 
-    def _handle(self, parties_names, seat_type):
-        self.logger.info(f"{len(parties_names)} unique parties found of type {seat_type}")
-        if seat_type == LegislatorSeats.DEPUTY:
-            parties_seats = {
-                party_name: DeputySeat.objects.filter(party_name=party_name).count() for party_name in parties_names
-            }
-        else:
-            parties_seats = {
-                party_name: SenateSeat.objects.filter(party_name=party_name).count() for party_name in parties_names
-            }
-        self.logger.info("Sorting parties...")
-        parties_to_link = sorted(parties_seats.items(), key=lambda x: x[1], reverse=True)
-        parties_to_link = [party_name for party_name, _ in parties_to_link]
+    def _handle(self, parties_to_link: List[str], seat_type):
+        self.logger.info(f"{len(parties_to_link)} unique parties found of type {seat_type}")
         linked_seats = self.link_parties(parties_to_link, seat_type)
         self.logger.info(f"{linked_seats} {seat_type} seats have been updated from linking")
         self.check_actions_for_unlinked_parties(seat_type)
@@ -65,13 +52,6 @@ class Command(BaseCommand):
             )
         return updated_seats
 
-    def load_party_to_linked_seats(self, party_row: pd.Series, seat_type: LegislatorSeats):
-        party_id = party_row["party_id"]
-        party = Party.objects.get(id=party_id) if party_id != DENIED_INDICATOR else None
-        party_name = party_row["denomination"]
-        linked_seats = self.load_party_to_seats(party_name, party, seat_type)
-        return linked_seats
-
     def link_parties(self, parties_to_link: List[str], seat_type: LegislatorSeats) -> pd.DataFrame:
         # Tries to link the parties, unlinked parties are returned
         if not parties_to_link:
@@ -84,11 +64,8 @@ class Command(BaseCommand):
         linked_data = linker.link_parties(parties_to_link, save_original_denominations=True)
         linked_parties = linked_data[linked_data["party_id"].notnull()]
         self.unlinked_parties = linked_data[linked_data["party_id"].isnull()]
-        total_seats_linked = 0
-        for _, row in linked_parties.iterrows():
-            seats_linked = self.load_party_to_linked_seats(row, seat_type)
-            total_seats_linked += seats_linked
-        return total_seats_linked
+        model = DeputySeat if seat_type == LegislatorSeats.DEPUTY else SenateSeat
+        return PartiesWriter.assign_parties(model, PartiesWriter.get_party_ids(linked_parties))
 
     def check_actions_for_unlinked_parties(self, seat_type: LegislatorSeats):
         self.unlinked_seats = 0
@@ -1,36 +1,28 @@
 # Base command
 from typing import List
-from django.db.models import Q
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 import pandas as pd
 
 # Project
-from recoleccion.models.linking import DENIED_INDICATOR
 import logging
 from recoleccion.components.linkers.party_linker import PartyLinker
+from recoleccion.components.writers.parties_writer import PartiesWriter
 from recoleccion.models.party import Party, PartyDenomination
 from recoleccion.models.vote import Vote
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     logger = logging.getLogger(__name__)
 
     def handle(self, *args, **options):
-        votes_without_party = Vote.objects.filter(party__isnull=True)
-        unique_party_names = votes_without_party.values_list("party_name", flat=True).distinct()
-        if not unique_party_names:
+        # Sorted by the amount of votes, the most frequent parties are linked first
+        parties_votes = PartiesWriter.count_by_party_name(Vote)
+        if not parties_votes:
             self.logger.info("All votes have a party, exiting...")
             return
-        self.logger.info(f"{len(unique_party_names)} unique parties found")
-        self.logger.info("Sorting parties...")
-        parties_votes = {
-            party_name: Vote.objects.filter(Q(party_id__isnull=True) & Q(party_name=party_name)).count()
-            for party_name in unique_party_names
-        }
-        self.logger.info(f"Votes without party: {votes_without_party.count()}")
-        parties_to_link = sorted(parties_votes.items(), key=lambda x: x[1], reverse=True)
-        parties_to_link = [party_name for party_name, _ in parties_to_link]
-        linked_votes = self.link_parties(parties_to_link)
+        self.logger.info(f"{len(parties_votes)} unique parties found")
+        self.logger.info(f"Votes without party: {sum(parties_votes.values())}")
+        linked_votes = self.link_parties(list(parties_votes.keys()))
         self.logger.info(f"{linked_votes} votes have been updated from linking")
         self.check_actions_for_unlinked_parties()
         self.logger.info(f"{self.unlinked_votes} votes have been updated from linking")
@@ -45,13 +37,6 @@ class Command(BaseCommand):
             self.logger.info(f"{updated_votes} votes from {party_name} have been updated to have NULL party")
         return votes.count()
 
-    def load_party_to_linked_votes(self, party_row: pd.Series):
-        party_id = party_row["party_id"]
-        party = Party.objects.get(id=party_id) if party_id != DENIED_INDICATOR else None
-        party_name = party_row["denomination"]
-        linked_votes = self.load_party_to_votes(party_name, party)
-        return linked_votes
-
     def link_parties(self, parties_to_link: List[str]) -> pd.DataFrame:
         # Tries to link the parties, unlinked parties are returned
         if not parties_to_link:
@@ -64,11 +49,7 @@ class Command(BaseCommand):
         linked_data = linker.link_parties(parties_to_link)
         linked_parties = linked_data[linked_data["party_id"].notnull()]
         self.unlinked_parties = linked_data[linked_data["party_id"].isnull()]
-        total_votes_linked = 0
-        for _, row in linked_parties.iterrows():
-            votes_linked = self.load_party_to_linked_votes(row)
-            total_votes_linked += votes_linked
-        return total_votes_linked
+        return PartiesWriter.assign_parties(Vote, PartiesWriter.get_party_ids(linked_parties))
 
     def check_actions_for_unlinked_parties(self):
         self.unlinked_votes = 0
@@ -15,7 +15,7 @@ from recoleccion.models import Person, Vote
 
 
 class Command(BaseCommand):
-    logger = l
+    logger = logging.getLogger(__name__)
 
     def add_arguments(self, parser):
         parser.add_argument("--starting-year", type=int, default=2023)
@@ -24,16 +24,19 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         votes_without_person = Vote.objects.filter(person_id__isnull=True)
         unique_person_names = votes_without_person.values_list("person_name", "person_last_name", flat=False).distinct()
-        for name, last_name in unique_person_names:
-            # another command may have already created the person, so we check if it exists
-            person = Person.objects.filter(name=name, last_name=last_name).first()
+        # another command may have already created the persons, they are looked up by their normalized name
+        normalized_names = {
+            (name, last_name): Person.normalize_full_name(name, last_name) for name, last_name in unique_person_names
+        }
+        existing_persons = Person.objects.filter(normalized_full_name__in=set(normalized_names.values()))
+        persons_by_name = {person.normalized_full_name: person for person in existing_persons.order_by("-id")}
+        for (name, last_name), normalized_name in normalized_names.items():
+            person = persons_by_name.get(normalized_name)
             if not person:
                 self.logger.info(f"Creating person {name} {last_name}")
-                person = Person.objects.create(name=name, last_name=last_name)
+                person = persons_by_name[normalized_name] = Person.objects.create(name=name, last_name=last_name)
             else:
                 self.logger.info(f"Person {name} {last_name} already exists")
             person_votes = votes_without_person.filter(person_name=name, person_last_name=last_name)
-            for vote in person_votes:
-                vote.person_id = person.id
-                vote.save()
-            self.logger.info(f"Updated {len(person_votes)} votes with person {name} {last_name} (id {person.id})")
+            updated_votes = person_votes.update(person_id=person.id)
+            self.logger.info(f"Updated {updated_votes} votes with person {name} {last_name} (id {person.id})")
@@ -0,0 +1,158 @@
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+from django.db import transaction
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+# Project
+from recoleccion.components.linkers import Linker, PartyLinker, PersonLinker
+from recoleccion.components.linkers.canonical_snapshot import PartyCanonicalSnapshot, PersonCanonicalSnapshot
+from recoleccion.models import Party, Person
+from recoleccion.tests.test_helpers import faker
+from recoleccion.utils.custom_command import LinkingCommand
+
+
+class StageTimer:
+    """Accumulates the time spent in some methods of a linker, by replacing them in the instance"""
+
+    def __init__(self):
+        self.times = defaultdict(float)
+
+    def wrap(self, linker: Linker, method_name: str, stage: str):
+        method = getattr(linker, method_name)
+
+        def timed_method(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.times[stage] += time.perf_counter() - start
+
+        setattr(linker, method_name, timed_method)
+
+
+class Command(LinkingCommand):
+    help = "Measures the throughput and accuracy of the linkers with synthetic persons and parties"
+    STAGES = {
+        "normalize": ["get_messy_data"],
+        "exact match": ["load_known_matches", "load_exact_matches", "load_resolved_matches"],
+        "train": ["train"],
+        "search": ["search"],
+        "classify": ["classify"],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument("--persons", type=int, default=1000, help="Amount of canonical persons")
+        parser.add_argument("--person-variants", type=int, default=3, help="Messy records per canonical person")
+        parser.add_argument("--parties", type=int, default=50, help="Amount of canonical parties")
+        parser.add_argument("--party-variants", type=int, default=10, help="Messy records per canonical party")
+        parser.add_argument(
+            "--unknown-ratio", type=float, default=0.1, help="Proportion of messy records without canonical record"
+        )
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        faker.fake.seed_instance(options["seed"])
+        # The linkers are trained with a copy of the training files, so the stored settings are not replaced
+        training_dir, original_training_dir = tempfile.mkdtemp(), Linker.TRAINING_DIR
+        for linker_class in [PersonLinker, PartyLinker]:
+            shutil.copy(f"{original_training_dir}/{linker_class.__name__}.json", training_dir)
+        Linker.TRAINING_DIR = training_dir
+        try:
+            # Everything written by the benchmark (canonical records, decisions, resolutions) is rolled back
+            with transaction.atomic():
+                self.benchmark_persons(options)
+                self.benchmark_parties(options)
+                transaction.set_rollback(True)
+        finally:
+            Linker.TRAINING_DIR = original_training_dir
+            shutil.rmtree(training_dir, ignore_errors=True)
+            PersonCanonicalSnapshot.get_instance().invalidate()
+            PartyCanonicalSnapshot.get_instance().invalidate()
+
+    def benchmark_persons(self, options: dict):
+        persons = [
+            Person(name=name, last_name=last_name, normalized_full_name=Person.normalize_full_name(name, last_name))
+            for name, last_name in faker.create_fake_person_names(options["persons"])
+        ]
+        persons = Person.objects.bulk_create(persons)
+        unknown_names = faker.create_fake_person_names(int(len(persons) * options["unknown_ratio"]))
+        messy_records = [
+            {"full_name": faker.create_messy_person_name(person.name, person.last_name), "expected_id": person.pk}
+            for person in persons
+            for _ in range(options["person_variants"])
+        ]
+        messy_records += [
+            {"full_name": faker.create_messy_person_name(name, last_name), "expected_id": None}
+            for name, last_name in unknown_names
+        ]
+        random.shuffle(messy_records)
+        linker = PersonLinker()
+        timer = self.get_stage_timer(linker)
+        start = time.perf_counter()
+        linked_data = linker.link_persons(pd.DataFrame(messy_records))
+        self.report(linker, linked_data, "person_id", time.perf_counter() - start, timer)
+
+    def benchmark_parties(self, options: dict):
+        party_names = faker.create_fake_party_names(options["parties"])
+        parties = [Party.objects.create(main_denomination=name) for name in party_names]
+        # The first names are the canonical ones, the rest are unknown parties
+        unknown_parties = faker.create_fake_party_names(len(parties) + int(len(parties) * options["unknown_ratio"]))
+        unknown_parties = unknown_parties[len(parties) :]
+        messy_records = [
+            {"denomination": faker.create_messy_party_denomination(party.main_denomination), "expected_id": party.pk}
+            for party in parties
+            for _ in range(options["party_variants"])
+        ]
+        messy_records += [{"denomination": name, "expected_id": None} for name in unknown_parties]
+        random.shuffle(messy_records)
+        for record_id, record in enumerate(messy_records):
+            record["record_id"] = record_id
+        linker = PartyLinker()
+        timer = self.get_stage_timer(linker)
+        start = time.perf_counter()
+        linked_data = linker.link_parties(pd.DataFrame(messy_records))
+        self.report(linker, linked_data, "party_id", time.perf_counter() - start, timer)
+
+    def get_stage_timer(self, linker: Linker) -> StageTimer:
+        timer = StageTimer()
+        for stage, method_names in self.STAGES.items():
+            for method_name in method_names:
+                if hasattr(linker, method_name):
+                    timer.wrap(linker, method_name, stage)
+        return timer
+
+    def get_peak_rss(self) -> float:
+        """Returns the peak resident memory of the process in MB (ru_maxrss is in KB on Linux)"""
+        if not resource:
+            return float("nan")
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    def get_accuracy(self, linked_data: pd.DataFrame, id_column: str) -> tuple:
+        """Returns the precision and recall of the certain matches, pending decisions count as not linked"""
+        expected_ids = pd.to_numeric(linked_data["expected_id"], errors="coerce")
+        linked_ids = pd.to_numeric(linked_data.get(id_column), errors="coerce")
+        correct_matches = (linked_ids.notna() & (linked_ids == expected_ids)).sum()
+        precision = correct_matches / linked_ids.notna().sum() if linked_ids.notna().any() else 0.0
+        recall = correct_matches / expected_ids.notna().sum() if expected_ids.notna().any() else 0.0
+        return precision, recall
+
+    def report(self, linker: Linker, linked_data: pd.DataFrame, id_column: str, total_time: float, timer: StageTimer):
+        times = dict(timer.times)
+        times["classify"] = times.get("classify", 0) - times.get("search", 0)  # the search is done by classify
+        precision, recall = self.get_accuracy(linked_data, id_column)
+        pending = linked_data["linking_id"].notna().sum() if "linking_id" in linked_data else 0
+        self.stdout.write(
+            f"{linker.__class__.__name__} ({linker.get_engine()}): {len(linked_data)} records in {total_time:.2f} s "
+            + f"({len(linked_data) / total_time:.1f} records/s), peak RSS {self.get_peak_rss():.1f} MB"
+        )
+        self.stdout.write("  " + " | ".join(f"{stage} {times.get(stage, 0):.2f} s" for stage in self.STAGES))
+        self.stdout.write(f"  precision {precision:.3f}, recall {recall:.3f}, {pending} records pending of a decision")
@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand
 
 # Components
 from recoleccion.models import (
+    LinkingResolution,
     Party,
     PartyDenomination,
 )
@@ -42,4 +43,6 @@ class Command(BaseCommand):
         except IntegrityError:
             pass
         party.main_denomination = new_party_name
+        # The denominations of the party changed, so the ones resolved to it are linked again
+        LinkingResolution.objects.filter(party=party).delete()
         logger.info(f"Party {party.main_denomination} has been updated")
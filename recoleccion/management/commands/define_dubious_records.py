@@ -1,5 +1,7 @@
 # Base command
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from typing import List
 import logging
 from pprint import pprint
 
@@ -11,6 +13,13 @@ logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch",
+            action="store_true",
+            help="Ask for every decision first and then save and apply all of them at once, in one transaction",
+        )
+
     def ask_for_user_decision(self, pending_decision: LinkingDecision) -> str:
         logger.info(f"Pending decision: {pending_decision}")
         while True:
@@ -36,17 +45,35 @@ class Command(BaseCommand):
         unlinked_records = pending_decision.unlink_related_records()
         logger.info(f"Unlinked {unlinked_records} records")
 
+    def save_decisions(self, decisions: List[LinkingDecision]):
+        """Saves the decisions made in batch mode and applies them to their related records, in one transaction"""
+        with transaction.atomic():
+            for model in [PartyLinkingDecision, PersonLinkingDecision]:
+                model_decisions = [decision for decision in decisions if isinstance(decision, model)]
+                model.objects.bulk_update(model_decisions, ["decision"], batch_size=model.BULK_UPDATE_BATCH_SIZE)
+                approved_decisions = [decision for decision in model_decisions if decision.is_approved()]
+                denied_decisions = [decision for decision in model_decisions if decision.is_denied()]
+                updated_records = model.apply_decisions(approved_decisions)
+                unlinked_records = model.unlink_decisions(denied_decisions)
+                logger.info(f"{model.__name__}: updated {updated_records} records, unlinked {unlinked_records} records")
+
     def handle(self, *args, **options):
         pending_party_decisions = PartyLinkingDecision.objects.filter(decision=LinkingDecisionOptions.PENDING).all()
         pending_person_decisions = PersonLinkingDecision.objects.filter(decision=LinkingDecisionOptions.PENDING).all()
         total_decisions = list(pending_party_decisions) + list(pending_person_decisions)
         logger.info(f"Pending decisions: {len(total_decisions)}")
         sorted_decisions = sorted(total_decisions, key=lambda x: x.id)
+        made_decisions = []
         for pending_decision in sorted_decisions:
             user_response = self.ask_for_user_decision(pending_decision)
-            if user_response == LinkingDecisionOptions.APPROVED:
+            if options.get("batch") and user_response != LinkingDecisionOptions.PENDING:
+                pending_decision.decision = user_response
+                made_decisions.append(pending_decision)
+            elif user_response == LinkingDecisionOptions.APPROVED:
                 self.save_accepted_decision(pending_decision)
             elif user_response == LinkingDecisionOptions.DENIED:
                 self.save_rejected_decision(pending_decision)
             else:
                 logger.info("Skipping decision...")
+        if made_decisions:
+            self.save_decisions(made_decisions)
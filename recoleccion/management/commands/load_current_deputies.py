@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 
 # Dates
 from datetime import datetime as dt, timezone
@@ -12,7 +12,7 @@ from recoleccion.models.person import Person
 from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     DEPUTIES_CAPACITY = 257
 
     def handle(self, *args, **options):
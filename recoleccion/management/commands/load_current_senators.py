@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 from django.db import transaction
 
 # Dates
@@ -13,7 +13,7 @@ from recoleccion.models.person import Person
 from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     SENATE_CAPACITY = 72
 
     def handle(self, *args, **options):
@@ -6,14 +6,15 @@ from tqdm import tqdm
 from django.db import transaction
 
 # Components
-from recoleccion.utils.custom_command import PageThreadedCommand
+from recoleccion.utils.custom_command import LinkingCommand, PageThreadedCommand
 from recoleccion.components.data_sources.authors_source import DeputiesAuthorsSource
 from recoleccion.components.linkers.person_linker import PersonLinker
 from recoleccion.components.writers.authors_writer import AuthorsWriter
+from recoleccion.components.writers.project_index import ProjectIndex
 import logging
 
 
-class Command(PageThreadedCommand):
+class Command(LinkingCommand, PageThreadedCommand):
     logger = logging.getLogger(__name__)
     help = "Load laws from the deputy source"
     denomination = "load_deputies_authors"
@@ -30,6 +31,7 @@ class Command(PageThreadedCommand):
 
     def main_function(self, starting_page: int, total_pages: int, step_size: int):
         source = DeputiesAuthorsSource()
+        project_index = ProjectIndex()
         for page in tqdm(range(starting_page, total_pages + 1, step_size)):
             attempts = 0
             while attempts < 5:
@@ -44,10 +46,11 @@ class Command(PageThreadedCommand):
                 self.save_missing_record(page)
             linker = PersonLinker()
             linked_data = linker.link_persons(data)
-            AuthorsWriter.write(linked_data)
+            AuthorsWriter.write(linked_data, project_index)
 
     def missing_only_function(self, step_size: int):
         source = DeputiesAuthorsSource()
+        project_index = ProjectIndex()
         missing_pages = self.get_missing_records()
         for index in tqdm(0, len(missing_pages), step_size):
             page = missing_pages[index].record_value
@@ -66,4 +69,4 @@ class Command(PageThreadedCommand):
                 continue
             linker = PersonLinker()
             linked_data = linker.link_persons(data)
-            AuthorsWriter.write(linked_data)
+            AuthorsWriter.write(linked_data, project_index)
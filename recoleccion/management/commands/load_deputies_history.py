@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 from django.db import transaction
 
 # Dates
@@ -16,7 +16,7 @@ from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 from recoleccion.exceptions.custom import DeputiesLoadingException
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     DEPUTIES_CAPACITY = 257
 
     def check_current_deputies(self):
@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import DataSourceCommand
 
 # Django
 from django.db import transaction
@@ -10,7 +10,7 @@ from recoleccion.components.writers.law_projects_writer import LawProjectsWriter
 import logging
 
 
-class Command(BaseCommand):
+class Command(DataSourceCommand):
     logger = logging.getLogger(__name__)
     help = "Load laws from the deputy source"
 
@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import DataSourceCommand
 from django.db import transaction
 
 # Dates
@@ -10,7 +10,7 @@ from recoleccion.components.writers.laws_writer import LawsWriter
 from recoleccion.components.data_sources.laws_source import LawSource
 
 
-class Command(BaseCommand):
+class Command(DataSourceCommand):
     help = "Load laws from the deputy source"
 
     @transaction.atomic
@@ -2,7 +2,8 @@ import pandas as pd
 from django.db import IntegrityError
 
 # Base command
-from django.core.management.base import BaseCommand, CommandParser
+from django.core.management.base import CommandParser
+from recoleccion.utils.custom_command import LinkingCommand, DataSourceCommand
 
 # Django
 
@@ -13,7 +14,7 @@ from recoleccion.components.linkers.person_linker import PersonLinker
 from recoleccion.components.writers.persons_writer import PersonsWriter
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand, DataSourceCommand):
     logger = logging.getLogger(__name__)
 
     def handle(self, *args, **options):
@@ -7,16 +7,17 @@ import threading
 from django.db import transaction
 
 # Components
-from recoleccion.utils.custom_command import YearThreadedCommand
+from recoleccion.utils.custom_command import LinkingCommand, YearThreadedCommand
 from recoleccion.components.data_sources.authors_source import SenateAuthorsSource
 from recoleccion.components.linkers.person_linker import PersonLinker
 from recoleccion.components.writers.authors_writer import AuthorsWriter
+from recoleccion.components.writers.project_index import ProjectIndex
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class Command(YearThreadedCommand):
+class Command(LinkingCommand, YearThreadedCommand):
     help = "Load laws from the deputy source"
     denomination = "load_senate_authors"
 
@@ -26,11 +27,12 @@ class Command(YearThreadedCommand):
     def main_function(self, starting_year: int, step_size: int):
         year = starting_year
         source = SenateAuthorsSource(threading=True)
+        project_index = ProjectIndex()
         while True:
             data = source.get_data(year)
             linker = PersonLinker()
             linked_data = linker.link_persons(data)
-            AuthorsWriter.write(linked_data)
+            AuthorsWriter.write(linked_data, project_index)
             year = year - step_size
             if year < 1983:
                 return  # Si pasás un año menor a 1983, en lugar de tirar un error, te da todos los proyectos de ley
@@ -1,5 +1,5 @@
 # Base command
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import LinkingCommand
 
 # Dates
 from datetime import datetime as dt, timezone
@@ -15,7 +15,7 @@ from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 from recoleccion.exceptions.custom import SenateLoadingException
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand):
     SENATE_CAPACITY = 72
 
     def check_current_senators(self):
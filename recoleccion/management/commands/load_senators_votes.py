@@ -1,30 +1,43 @@
 import pandas as pd
 
 # Project
-from recoleccion.utils.custom_command import YearThreadedCommand
+from recoleccion.utils.custom_command import LinkingCommand, YearThreadedCommand
 from recoleccion.components.data_sources.votes_source import SenateVotesSource
+from recoleccion.components.pipeline import Pipeline
 from recoleccion.components.writers.votes_writer import VotesWriter
 from recoleccion.components.linkers import PersonLinker
 import logging
 
 
-class Command(YearThreadedCommand):
+class Command(LinkingCommand, YearThreadedCommand):
     logger = logging.getLogger(__name__)
     denomination = "load_senators_votes"
 
     def add_arguments(self, parser):
         parser.add_argument("--starting-year", type=int, default=2023)
 
-    def main_function(self, starting_year: int, step_size: int):
-        self.logger.info(f"Writing votes for year {starting_year}...")
-        writer = VotesWriter()
+    def get_votes(self, starting_year: int, step_size: int):
         year = starting_year
         while year >= 1990:
             votes: pd.DataFrame = SenateVotesSource.get_data(year)
             if votes.empty:
                 return
-            linker = PersonLinker()
-            linked_data = linker.link_persons(votes)
-            writer.write(linked_data)
-            self.logger.info(f"Written votes for year {year}")
+            self.logger.info(f"Read votes for year {year}")
+            yield votes
             year -= step_size
+
+    def handle(self, *args, **options):
+        # Names linked in previous runs are shared by every thread, so they are not linked again
+        self.known_persons = PersonLinker.get_known_persons()
+        super().handle(*args, **options)
+
+    def main_function(self, starting_year: int, step_size: int):
+        self.logger.info(f"Writing votes for year {starting_year}...")
+        writer = VotesWriter()
+        linker = PersonLinker(known_persons=self.known_persons)
+        pipeline = Pipeline(
+            self.get_votes(starting_year, step_size),
+            lambda votes: linker.link_persons(votes, unique_names=True),
+            writer.write,
+        )
+        pipeline.run()
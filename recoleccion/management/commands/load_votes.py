@@ -1,20 +1,46 @@
 # Base command
-from django.core.management.base import BaseCommand
+import pandas as pd
+from django.core.management.base import CommandError
+from django.db import connection
+from recoleccion.utils.custom_command import LinkingCommand, DataSourceCommand
 
 # Dates
 from datetime import datetime as dt, timezone
 
 # Project
 from recoleccion.components.data_sources.votes_source import DatasetVotesSource
+from recoleccion.components.pipeline import Pipeline
+from recoleccion.components.writers.votes_copy_writer import VotesCopyWriter
 from recoleccion.components.writers.votes_writer import VotesWriter
 from recoleccion.components.linkers import PersonLinker
 
 
-class Command(BaseCommand):
+class Command(LinkingCommand, DataSourceCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--copy", action="store_true", help="Load the whole dataset with COPY (Postgres only, for full reloads)"
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=Pipeline.CHUNK_SIZE,
+            help="Amount of votes linked and written at once (ignored with --copy, that loads everything at once)",
+        )
+
     def handle(self, *args, **options):
-        votes = DatasetVotesSource.get_data()
-        linker = PersonLinker()
-        linked_data = linker.link_persons(votes)
-        VotesWriter.write(votes)
+        if options["copy"] and connection.vendor != "postgresql":
+            raise CommandError("--copy is only available on Postgres")
+        linker = PersonLinker(known_persons=PersonLinker.get_known_persons())
+
+        def link(votes: pd.DataFrame) -> pd.DataFrame:
+            return linker.link_persons(votes, unique_names=True)
+
+        if options["copy"]:
+            # COPY is meant for full reloads: the whole dataset is linked and loaded at once, with one staging table
+            data = pd.concat(DatasetVotesSource.iter_data(), ignore_index=True)
+            VotesCopyWriter().write(link(data))
+            return
+        pipeline = Pipeline(DatasetVotesSource.iter_data(), link, VotesWriter().write, chunk_size=options["chunk_size"])
+        pipeline.run()
 
-# TODO: Delete?
\ No newline at end of file
+# TODO: Delete?
@@ -7,6 +7,7 @@ import logging
 from recoleccion.models import (
     Authorship,
     DeputySeat,
+    LinkingResolution,
     Person,
     PersonLinkingDecision,
     SenateSeat,
@@ -59,6 +60,9 @@ class Command(BaseCommand):
         if confirmation:
             self.update_objects(all_objects, super_legislator)
             logger.info(f"Updated {self.updated} objects")
+            # The names resolved to the sub legislator are linked again, so they can be resolved to the super one
+            deleted_resolutions, _ = LinkingResolution.objects.filter(person=sub_legislator).delete()
+            logger.info(f"Invalidated {deleted_resolutions} linking resolutions")
             sub_legislator.delete()
             logger.info(f"Deleted legislator: {sub_legislator.full_name} with id {sub_legislator.id}")
         else:
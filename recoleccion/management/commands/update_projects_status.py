@@ -1,6 +1,6 @@
 import pandas as pd
 from tqdm import tqdm
-from django.core.management.base import BaseCommand
+from recoleccion.utils.custom_command import DataSourceCommand
 from datetime import datetime as dt, timezone
 
 # Project
@@ -10,7 +10,7 @@ from recoleccion.components.data_sources.law_projects_source import LawProjectsS
 # Utils
 
 
-class Command(BaseCommand):
+class Command(DataSourceCommand):
     def handle(self, *args, **options):
         source = LawProjectsStatusSource()
         status_data = source.get_data()
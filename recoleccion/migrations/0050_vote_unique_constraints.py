@@ -0,0 +1,45 @@
+# Generated by Django 4.2 on 2026-10-18 11:16
+
+from django.db import migrations, models
+import django.db.models.functions.comparison
+
+# Duplicated votes must be removed before creating the constraints, the oldest one is kept
+DELETE_DUPLICATED_VOTES = """
+DELETE FROM recoleccion_vote WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY
+                chamber,
+                person_id,
+                CASE WHEN person_id IS NULL THEN COALESCE(person_name, '') END,
+                CASE WHEN person_id IS NULL THEN COALESCE(person_last_name, '') END,
+                COALESCE(project_id, 0),
+                COALESCE(law_id, 0),
+                COALESCE(reference, '')
+            ORDER BY id
+        ) AS position
+        FROM recoleccion_vote
+        WHERE project_id IS NOT NULL OR law_id IS NOT NULL OR reference IS NOT NULL
+    ) AS ranked_votes
+    WHERE position > 1
+)
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recoleccion', '0049_person_name_corrected'),
+    ]
+
+    operations = [
+        migrations.RunSQL(DELETE_DUPLICATED_VOTES, reverse_sql=migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name='vote',
+            constraint=models.UniqueConstraint(models.F('chamber'), models.F('person'), django.db.models.functions.comparison.Coalesce(models.F('project'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('law'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('reference'), models.Value('')), condition=models.Q(('person__isnull', False), models.Q(('project__isnull', False), ('law__isnull', False), ('reference__isnull', False), _connector='OR')), name='unique_vote_with_person'),
+        ),
+        migrations.AddConstraint(
+            model_name='vote',
+            constraint=models.UniqueConstraint(models.F('chamber'), django.db.models.functions.comparison.Coalesce(models.F('person_name'), models.Value('')), django.db.models.functions.comparison.Coalesce(models.F('person_last_name'), models.Value('')), django.db.models.functions.comparison.Coalesce(models.F('project'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('law'), models.Value(0)), django.db.models.functions.comparison.Coalesce(models.F('reference'), models.Value('')), condition=models.Q(('person__isnull', True), models.Q(('project__isnull', False), ('law__isnull', False), ('reference__isnull', False), _connector='OR')), name='unique_vote_without_person'),
+        ),
+    ]
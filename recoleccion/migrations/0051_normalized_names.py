@@ -0,0 +1,77 @@
+# Generated by Django 4.2 on 2026-10-18 11:43
+
+import logging
+from django.db import migrations, models
+
+# Project
+from recoleccion.components.utils import normalize_name, unidecode_text
+
+BATCH_SIZE = 1000
+logger = logging.getLogger(__name__)
+
+# Trigram indexes are only supported by Postgres, they speed up similarity searches over the normalized names
+TRIGRAM_INDEXES = {
+    "recoleccion_person_normalized_full_name_trgm": ("recoleccion_person", "normalized_full_name"),
+    "recoleccion_partydenomination_normalized_denomination_trgm": (
+        "recoleccion_partydenomination",
+        "normalized_denomination",
+    ),
+}
+
+
+def backfill_normalized_names(apps, schema_editor):
+    # The historical models have no custom save, so the normalization is applied here
+    Person = apps.get_model("recoleccion", "Person")
+    PartyDenomination = apps.get_model("recoleccion", "PartyDenomination")
+    persons = list(Person.objects.only("id", "name", "last_name"))
+    for person in persons:
+        # The missing parts are skipped, so a person without name is not stored with a trailing space
+        parts = [normalize_name(part) for part in (person.last_name, person.name) if part]
+        person.normalized_full_name = " ".join(part for part in parts if part)
+    Person.objects.bulk_update(persons, ["normalized_full_name"], batch_size=BATCH_SIZE)
+    denominations = list(PartyDenomination.objects.only("id", "denomination"))
+    for denomination in denominations:
+        denomination.normalized_denomination = unidecode_text(denomination.denomination).lower()
+    PartyDenomination.objects.bulk_update(denominations, ["normalized_denomination"], batch_size=BATCH_SIZE)
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        if not cursor.fetchone():
+            logger.warning("pg_trgm is not available, the trigram indexes will not be created")
+            return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for index_name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} USING gin ({column} gin_trgm_ops)")
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for index_name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index_name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recoleccion', '0050_vote_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='partydenomination',
+            name='normalized_denomination',
+            field=models.CharField(db_index=True, editable=False, help_text='Lowercase denomination without accents', max_length=200, null=True),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='normalized_full_name',
+            field=models.CharField(db_index=True, editable=False, help_text='Normalized last name and name', max_length=201, null=True),
+        ),
+        migrations.RunPython(backfill_normalized_names, reverse_code=migrations.RunPython.noop),
+        migrations.RunPython(create_trigram_indexes, reverse_code=drop_trigram_indexes),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2 on 2026-10-18 11:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recoleccion', '0051_normalized_names'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LinkingResolution',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Date time on which the object was created.', verbose_name='created at')),
+                ('modified_at', models.DateTimeField(auto_now=True, help_text='Date time on which the object was last modified.', verbose_name='updated at')),
+                ('id', models.AutoField(editable=False, primary_key=True, serialize=False)),
+                ('uuid', models.UUIDField(default=uuid.uuid4, editable=False)),
+                ('linking_id', models.UUIDField(editable=False, null=True)),
+                ('source', models.CharField(max_length=150, null=True)),
+                ('linker', models.CharField(help_text='Name of the linker class', max_length=50)),
+                ('messy_key', models.CharField(help_text='Normalized messy value', max_length=255)),
+                ('confidence', models.FloatField(null=True)),
+                ('resolved_by', models.CharField(choices=[('GAZETTEER', 'Gazetteer'), ('APPROVED_DECISION', 'Decisión aprobada')], max_length=20)),
+                ('party', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='linking_resolutions', to='recoleccion.party')),
+                ('person', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='linking_resolutions', to='recoleccion.person')),
+            ],
+            options={
+                'unique_together': {('linker', 'messy_key')},
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2 on 2026-10-18 12:30
+
+from django.db import IntegrityError, migrations, models, transaction
+
+FILE_KEYS = [
+    ("deputies_year", "deputies_source", "deputies_number"),
+    ("senate_year", "senate_source", "senate_number"),
+]
+# Models that reference the projects, with the name of their foreign key
+RELATED_MODELS = [("Vote", "project"), ("Authorship", "project"), ("Law", "associated_project")]
+
+
+def merge_duplicated_projects(apps, schema_editor):
+    """
+    Projects with the same file must be merged before creating the constraints: the oldest one is kept and the
+    records of the others are moved to it (those it already has an equivalent of are deleted)
+    """
+    LawProject = apps.get_model("recoleccion", "LawProject")
+    for file_key in FILE_KEYS:
+        duplicated_files = (
+            LawProject.objects.filter(**{f"{field}__isnull": False for field in file_key})
+            .values(*file_key)
+            .annotate(projects=models.Count("id"))
+            .filter(projects__gt=1)
+            .order_by()
+        )
+        for duplicated_file in duplicated_files:
+            file_filter = {field: duplicated_file[field] for field in file_key}
+            project_ids = list(LawProject.objects.filter(**file_filter).order_by("id").values_list("id", flat=True))
+            kept_id, duplicated_ids = project_ids[0], project_ids[1:]
+            for model_name, field in RELATED_MODELS:
+                model = apps.get_model("recoleccion", model_name)
+                for record in model.objects.filter(**{f"{field}_id__in": duplicated_ids}):
+                    setattr(record, f"{field}_id", kept_id)
+                    try:
+                        with transaction.atomic():
+                            record.save(update_fields=[field])
+                    except IntegrityError:
+                        record.delete()
+            LawProject.objects.filter(id__in=duplicated_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recoleccion', '0052_linking_resolution'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicated_projects, reverse_code=migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='lawproject',
+            constraint=models.UniqueConstraint(fields=('deputies_year', 'deputies_source', 'deputies_number'), name='unique_deputies_file'),
+        ),
+        migrations.AddConstraint(
+            model_name='lawproject',
+            constraint=models.UniqueConstraint(fields=('senate_year', 'senate_source', 'senate_number'), name='unique_senate_file'),
+        ),
+    ]
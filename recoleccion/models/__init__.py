@@ -7,6 +7,7 @@ from .law_project import LawProject
 from .linking.linking_decision import LinkingDecision
 from .linking.person_linking import PersonLinkingDecision
 from .linking.party_linking import PartyLinkingDecision
+from .linking.linking_resolution import LinkingResolution
 from .missing_record import MissingRecord
 from .party import Party, PartyDenomination, PartyRelationTypes
 from .person import Person, PersonSex
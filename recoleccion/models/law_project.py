@@ -49,6 +49,13 @@ class LawProject(BaseModel):
 
     class Meta:
         unique_together = ("deputies_project_id", "senate_project_id")
+        constraints = [
+            # The projects are upserted on the file of their chamber (see LawProjectsWriter)
+            models.UniqueConstraint(
+                fields=["deputies_year", "deputies_source", "deputies_number"], name="unique_deputies_file"
+            ),
+            models.UniqueConstraint(fields=["senate_year", "senate_source", "senate_number"], name="unique_senate_file"),
+        ]
 
     @property
     def project_id(self):
@@ -1,11 +1,13 @@
 # Django
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, IntegerField, Value, When
 from typing import List
 from django.db.utils import IntegrityError
 from recoleccion.models.affidavit_entry import AffidavitEntry
 
 # Project
 from recoleccion.models.base import BaseModel
+from recoleccion.models.linking.linking_resolution import LinkingResolution
 from recoleccion.models.social_data import SocialData
 from recoleccion.utils.enums.linking_decision_options import LinkingDecisionOptions
 from recoleccion.models.vote import Vote
@@ -14,7 +16,14 @@ from recoleccion.models.senate_seat import SenateSeat
 from recoleccion.models.deputy_seat import DeputySeat
 
 
+# Models whose records keep, in linking_id, the decision that has to be made to link them
+RELATED_MODELS = [Vote, Authorship, SenateSeat, DeputySeat, AffidavitEntry, SocialData]
+
+
 class LinkingDecision(BaseModel):
+    BULK_UPDATE_BATCH_SIZE = 500
+    linker_name: str = None  # linker that stores the resolutions of the messy values (see LinkingResolution)
+
     class Meta:
         abstract = True
 
@@ -37,6 +46,10 @@ class LinkingDecision(BaseModel):
     def get_canonical_record(self) -> dict:
         raise NotImplementedError
 
+    def get_resolution_key(self) -> str:
+        """Returns the messy value normalized like the linker does in its resolution key"""
+        raise NotImplementedError
+
     def _get_related_records(self):
         related_votes = Vote.objects.filter(linking_id=self.uuid).all()
         related_authors = Authorship.objects.filter(linking_id=self.uuid).all()
@@ -47,69 +60,96 @@ class LinkingDecision(BaseModel):
         )
         return all_records
 
-    def update_related_records(self):
-        related_votes = Vote.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_votes)
-        related_authors = Authorship.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_authors)
-        related_senate_seats = SenateSeat.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_senate_seats)
-        related_deputy_seats = DeputySeat.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_deputy_seats)
-        related_affidavits = AffidavitEntry.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_affidavits)
-        related_social_data = SocialData.objects.filter(linking_id=self.uuid).all()
-        self._update_records(related_social_data)
-        total_updated = (
-            related_votes.count()
-            + related_authors.count()
-            + related_senate_seats.count()
-            + related_deputy_seats.count()
-            + related_affidavits.count()
-        )
+    @classmethod
+    def get_updatable_models(cls) -> list:
+        """Returns the related models that have the main attribute of the decision (not all of them have a party)"""
+        return [
+            model
+            for model in RELATED_MODELS
+            if any(field.name == cls.main_attribute for field in model._meta.concrete_fields)
+        ]
+
+    @classmethod
+    def get_batches(cls, decisions: List["LinkingDecision"]):
+        for start in range(0, len(decisions), cls.BULK_UPDATE_BATCH_SIZE):
+            yield decisions[start : start + cls.BULK_UPDATE_BATCH_SIZE]
+
+    @classmethod
+    def apply_decisions(cls, decisions: List["LinkingDecision"]) -> int:
+        """
+        Links the related records of the (approved) decisions to the main instance of their decision,
+        with one UPDATE ... SET <main attribute> = CASE linking_id ... WHERE linking_id IN (...) per related model
+        If an update violates a unique constraint, the records of that model are updated decision by decision
+        Returns the amount of updated records
+        """
+        main_field = f"{cls.main_attribute}_id"
+        total_updated = 0
+        for batch in cls.get_batches(list(decisions)):
+            main_ids = Case(
+                *[When(linking_id=decision.uuid, then=Value(getattr(decision, main_field))) for decision in batch],
+                output_field=IntegerField(),
+            )
+            uuids = [decision.uuid for decision in batch]
+            for model in cls.get_updatable_models():
+                try:
+                    with transaction.atomic():
+                        total_updated += model.objects.filter(linking_id__in=uuids).update(**{main_field: main_ids})
+                except IntegrityError as e:
+                    cls.logger.warning(f"Error updating {model.__name__} records: {e}")
+                    cls.logger.info("Updating records decision by decision...")
+                    for decision in batch:
+                        total_updated += decision._update_records(model.objects.filter(linking_id=decision.uuid))
         return total_updated
 
-    def unlink_related_records(self):
-        related_votes = Vote.objects.filter(linking_id=self.uuid).all()
-        related_votes.update(linking_id=None)
-        related_authors = Authorship.objects.filter(linking_id=self.uuid).all()
-        related_authors.update(linking_id=None)
-        related_senate_seats = SenateSeat.objects.filter(linking_id=self.uuid).all()
-        related_senate_seats.update(linking_id=None)
-        related_deputy_seats = DeputySeat.objects.filter(linking_id=self.uuid).all()
-        related_deputy_seats.update(linking_id=None)
-        related_affidavits = AffidavitEntry.objects.filter(linking_id=self.uuid).all()
-        related_affidavits.update(linking_id=None)
-        related_social_data = SocialData.objects.filter(linking_id=self.uuid).all()
-        related_social_data.update(linking_id=None)
-        total_updated = (
-            related_votes.count()
-            + related_authors.count()
-            + related_senate_seats.count()
-            + related_deputy_seats.count()
-            + related_affidavits.count()
-        )
+    @classmethod
+    def unlink_decisions(cls, decisions: List["LinkingDecision"]) -> int:
+        """
+        Removes the (denied) decisions from their related records, with one UPDATE per related model
+        The stored resolutions of their messy values are deleted too, so they are not linked without the decision
+        Returns the amount of updated records
+        """
+        total_updated = deleted_resolutions = 0
+        for batch in cls.get_batches(list(decisions)):
+            uuids = [decision.uuid for decision in batch]
+            for model in RELATED_MODELS:
+                total_updated += model.objects.filter(linking_id__in=uuids).update(linking_id=None)
+            resolution_keys = {decision.get_resolution_key() for decision in batch}
+            resolutions = LinkingResolution.objects.filter(linker=cls.linker_name, messy_key__in=resolution_keys)
+            deleted_resolutions += resolutions.delete()[0]
+        if deleted_resolutions:
+            cls.logger.info(f"Deleted {deleted_resolutions} resolutions of the unlinked decisions")
         return total_updated
 
-    def _update_records_individually(self, records: models.QuerySet):
+    def update_related_records(self):
+        return self.apply_decisions([self])
+
+    def unlink_related_records(self):
+        return self.unlink_decisions([self])
+
+    def _update_records_individually(self, records: models.QuerySet) -> int:
         main_attribute = self.main_attribute
         main_instance = getattr(self, main_attribute)
+        updated_records = 0
         for record in records:
             setattr(record, main_attribute, main_instance)
             try:
-                record.save()
+                with transaction.atomic():  # the savepoint keeps the transaction usable to delete the duplicate
+                    record.save()
+                updated_records += 1
             except IntegrityError as e:
                 self.logger.info(f"Error updating record {record.id}: {e}")
                 self.logger.info("The record is duplicated, deleting it...")
                 record.delete()
+        return updated_records
 
-    def _update_records(self, records: models.QuerySet):
+    def _update_records(self, records: models.QuerySet) -> int:
         main_attribute = self.main_attribute
         main_instance = getattr(self, main_attribute)
         update_data = {main_attribute: main_instance}
         try:
-            records.update(**update_data)
+            with transaction.atomic():
+                return records.update(**update_data)
         except IntegrityError as e:
             self.logger.warning(f"Error updating records: {e}")
             self.logger.info("Updating records one by one...")
-            self._update_records_individually(records)
+            return self._update_records_individually(records)
@@ -0,0 +1,26 @@
+# Django
+from django.db import models
+
+# Project
+from recoleccion.models.base import BaseModel
+from recoleccion.utils.enums.linking_resolution_sources import LinkingResolutionSources
+
+
+class LinkingResolution(BaseModel):
+    """
+    Memo of the messy values that were confidently linked by a linker, so they are not searched again
+    The rows are deleted with their person or party, and invalidated when it is merged or renamed
+    """
+
+    linker = models.CharField(max_length=50, help_text="Name of the linker class")
+    messy_key = models.CharField(max_length=255, help_text="Normalized messy value")
+    person = models.ForeignKey("Person", on_delete=models.CASCADE, related_name="linking_resolutions", null=True)
+    party = models.ForeignKey("Party", on_delete=models.CASCADE, related_name="linking_resolutions", null=True)
+    confidence = models.FloatField(null=True)
+    resolved_by = models.CharField(choices=LinkingResolutionSources.choices, max_length=20)
+
+    class Meta:
+        unique_together = ("linker", "messy_key")
+
+    def __str__(self):
+        return f"LinkingResolution ({self.linker}): {self.messy_key} -> {self.person_id or self.party_id}"
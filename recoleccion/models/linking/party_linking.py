@@ -7,6 +7,7 @@ from recoleccion.models.linking.linking_decision import LinkingDecision
 
 class PartyLinkingDecision(LinkingDecision):
     main_attribute = "party"
+    linker_name = "PartyLinker"
     party = models.ForeignKey("Party", on_delete=models.CASCADE, related_name="linking", null=True)
     messy_denomination = models.CharField(max_length=255, null=True, help_text="Messy denomination")
 
@@ -19,9 +20,11 @@ class PartyLinkingDecision(LinkingDecision):
     def get_canonical_record(self):
         return {"canonical_denomination": self.party.main_denomination}
 
-    def _update_records(self, records):
-        if records:
-            records.update(party=self.party)
+    def get_resolution_key(self):
+        return self.messy_denomination.lower() if self.messy_denomination else None
+
+    def _update_records(self, records) -> int:
+        return records.update(party=self.party)
 
     def __str__(self):
         if not self.party:
@@ -1,11 +1,13 @@
 # Django
 from django.db import models
 
+from recoleccion.components.utils import unidecode_text
 from recoleccion.models.linking.linking_decision import LinkingDecision
 
 
 class PersonLinkingDecision(LinkingDecision):
     main_attribute = "person"
+    linker_name = "PersonLinker"
     person = models.ForeignKey("Person", on_delete=models.CASCADE, related_name="linking", null=True)
     messy_name = models.CharField(max_length=255, null=True, help_text="Messy full name")
 
@@ -18,6 +20,9 @@ class PersonLinkingDecision(LinkingDecision):
     def get_canonical_record(self):
         return {"canonical_name": self.person.full_name}
 
+    def get_resolution_key(self):
+        return unidecode_text(self.messy_name.lower()) if self.messy_name else None
+
     def __str__(self):
         if not self.person:
             return f"PersonLinkingDecision ({self.decision}): {self.messy_name} - {self.decision}"
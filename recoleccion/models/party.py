@@ -3,6 +3,7 @@ from typing import List
 from django.db import models
 
 # Project
+from recoleccion.components.utils import unidecode_text
 from recoleccion.models.base import BaseModel
 from recoleccion.models.authorship import Authorship
 from recoleccion.models.deputy_seat import DeputySeat
@@ -88,3 +89,18 @@ class PartyDenomination(BaseModel):
         choices=PartyRelationTypes.choices,
         default=PartyRelationTypes.ALTERNATIVE_DENOMINATION,
     )
+    normalized_denomination = models.CharField(
+        max_length=200, null=True, db_index=True, editable=False, help_text="Lowercase denomination without accents"
+    )
+
+    @staticmethod
+    def normalize_denomination(denomination: str) -> str:
+        # Same format the PartyLinker uses for exact matches
+        return unidecode_text(denomination).lower()
+
+    def save(self, *args, **kwargs):
+        self.normalized_denomination = self.normalize_denomination(self.denomination)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "denomination" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "normalized_denomination"}
+        super().save(*args, **kwargs)
@@ -2,6 +2,7 @@
 from django.db import models
 from django.core.validators import MinLengthValidator
 from django.core.exceptions import ObjectDoesNotExist
+from pandas import isna
 
 # Base model
 from recoleccion.models.base import BaseModel
@@ -10,6 +11,7 @@ from recoleccion.models.law_project import LawProject
 from recoleccion.models.senate_seat import SenateSeat
 
 # Project
+from recoleccion.components.utils import normalize_name
 from recoleccion.utils.enums.legislator_seats import LegislatorSeats
 
 
@@ -32,6 +34,23 @@ class Person(BaseModel):
     is_active = models.BooleanField(default=False)
     news_search_terms = models.CharField(max_length=200, null=True, help_text="Search terms for news API")
     name_corrected = models.BooleanField(default=False)
+    normalized_full_name = models.CharField(
+        max_length=201, null=True, db_index=True, editable=False, help_text="Normalized last name and name"
+    )
+
+    @staticmethod
+    def normalize_full_name(name: str, last_name: str) -> str:
+        # Same format as the full names the PersonLinker compares ("Last Name Name", no accents nor punctuation)
+        # Missing parts are skipped, so a person without name is stored as "Last Name"
+        parts = [normalize_name(part) for part in (last_name, name) if not isna(part)]
+        return " ".join(part for part in parts if part)
+
+    def save(self, *args, **kwargs):
+        self.normalized_full_name = self.normalize_full_name(self.name, self.last_name)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"name", "last_name"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "normalized_full_name"}
+        super().save(*args, **kwargs)
 
     def get_last_seat(self) -> DeputySeat | SenateSeat | None:
         deputy_seats = DeputySeat.objects.filter(person=self).order_by("-end_of_term")
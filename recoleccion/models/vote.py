@@ -1,5 +1,7 @@
 # Django
-from django.db import models, IntegrityError
+from django.db import models, transaction
+from django.db.models import F, Q, Value
+from django.db.models.functions import Coalesce
 
 # Base model
 from recoleccion.models.base import BaseModel
@@ -10,12 +12,42 @@ from recoleccion.utils.enums.vote_choices import VoteChoices
 from recoleccion.utils.enums.vote_types import VoteTypes
 
 
+# Votes without project, law and reference can not be identified, so they are not checked
+HAS_VOTED_TARGET = Q(project__isnull=False) | Q(law__isnull=False) | Q(reference__isnull=False)
+# Nullable columns are coalesced because NULL values are always distinct in unique indexes
+VOTED_TARGET_EXPRESSIONS = (
+    Coalesce(F("project"), Value(0)),
+    Coalesce(F("law"), Value(0)),
+    Coalesce(F("reference"), Value("")),
+)
+
+
 class Vote(BaseModel):
+    class Meta:
+        app_label = "recoleccion"
+        constraints = [
+            models.UniqueConstraint(
+                F("chamber"),
+                F("person"),
+                *VOTED_TARGET_EXPRESSIONS,
+                name="unique_vote_with_person",
+                condition=Q(person__isnull=False) & HAS_VOTED_TARGET,
+            ),
+            models.UniqueConstraint(
+                F("chamber"),
+                Coalesce(F("person_name"), Value("")),
+                Coalesce(F("person_last_name"), Value("")),
+                *VOTED_TARGET_EXPRESSIONS,
+                name="unique_vote_without_person",
+                condition=Q(person__isnull=True) & HAS_VOTED_TARGET,
+            ),
+        ]
+
     chamber = models.CharField(choices=ProjectChambers.choices, max_length=10)
     date = models.DateField(null=True)
     person = models.ForeignKey("Person", on_delete=models.CASCADE, null=True, related_name="votes")
-    person_name = models.CharField(max_length=100, null=True)  # only in case of not finding the person
-    person_last_name = models.CharField(max_length=100, null=True)  # only in case of not finding the person
+    person_name = models.CharField(max_length=100, null=True)  # as it comes in the source
+    person_last_name = models.CharField(max_length=100, null=True)  # as it comes in the source
     party_name = models.CharField(max_length=200, null=True)
     party = models.ForeignKey("Party", on_delete=models.CASCADE, null=True, related_name="votes")
     province = models.CharField(max_length=200, null=True)
@@ -29,41 +61,6 @@ class Vote(BaseModel):
     vote_type = models.CharField(choices=VoteTypes.choices, max_length=10, default=VoteTypes.OTHER)
 
     def save(self, *args, **kwargs):
-        # Manual check is necessary because unique_together does not work with null values
-        if self._already_exists():
-            chamber = self.chamber
-            person_id = self.person.pk if self.person else ""
-            project_id = self.project.pk if self.project else ""
-            raise IntegrityError(
-                f"Unique constraint violated: (chamber: {chamber}, person_id: {person_id}, project_id: {project_id})"
-            )
-        else:
+        # The savepoint keeps the surrounding transaction usable if the unique constraints are violated
+        with transaction.atomic():
             super().save(*args, **kwargs)
-
-    def _already_exists(self):
-        if not self.law and not self.project and not self.reference:
-            return False  # no way to check
-        if not self.person:
-            return (
-                Vote.objects.filter(
-                    chamber=self.chamber,
-                    person_name=self.person_name,
-                    person_last_name=self.person_last_name,
-                    project=self.project,
-                    law=self.law,
-                    reference=self.reference,
-                )
-                .exclude(pk=self.pk)  # necessary for update
-                .exists()
-            )
-        return (
-            Vote.objects.filter(
-                chamber=self.chamber,
-                person=self.person,
-                project=self.project,
-                law=self.law,
-                reference=self.reference,
-            )
-            .exclude(pk=self.pk)  # necessary for update
-            .exists()
-        )
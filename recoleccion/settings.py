@@ -216,3 +216,16 @@ SUMMARIZER_URL = config.get("SUMMARIZER_URL")
 LEGISLATOR_NEWS_ENABLED = ast.literal_eval(config.get("LEGISLATOR_NEWS_ENABLED", "False"))
 GLOBAL_NEWS_PROVIDER_API_KEY = config.get("GLOBAL_NEWS_PROVIDER_API_KEY")
 LEGISLATOR_NEWS_PROVIDER_API_KEY = config.get("LEGISLATOR_NEWS_PROVIDER_API_KEY")
+
+# HTTP cache of the data sources, disabled by default so the scheduled loads always fetch the current data
+HTTP_CACHE_ENABLED = ast.literal_eval(config.get("HTTP_CACHE_ENABLED", "False"))
+HTTP_CACHE_DIR = config.get("HTTP_CACHE_DIR", BASE_DIR / ".http_cache")
+HTTP_CACHE_TTL = int(config.get("HTTP_CACHE_TTL", 24 * 60 * 60))  # seconds
+HTTP_CACHE_MAX_SIZE = int(config.get("HTTP_CACHE_MAX_SIZE", 2 * 1024**3))  # bytes
+HTTP_CACHE_OFFLINE = ast.literal_eval(config.get("HTTP_CACHE_OFFLINE", "False"))
+
+# Linking engine used by default by the linkers: "dedupe" (Gazetteer) or "trigram" (TrigramMatcher)
+LINKER_ENGINE = config.get("LINKER_ENGINE", "dedupe")
+
+# Processes used to search the matches of big linking datasets (see Linker.search)
+LINKER_SEARCH_PROCESSES = int(config.get("LINKER_SEARCH_PROCESSES", os.cpu_count()))
@@ -0,0 +1,22 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+
+# Project
+from recoleccion.components.linkers import Linker
+from recoleccion.models import Party, Person
+
+
+class BenchmarkLinkersTestCase(TestCase):
+    def tearDown(self):
+        Linker.default_engine = None
+
+    def test_benchmark_reports_every_linker_and_rolls_back_its_data(self):
+        output = StringIO()
+        call_command("benchmark_linkers", persons=30, parties=5, linker_engine="trigram", stdout=output)
+        report = output.getvalue()
+        self.assertIn("PersonLinker (trigram): 93 records", report)
+        self.assertIn("PartyLinker (trigram)", report)
+        self.assertEqual(report.count("precision"), 2)
+        self.assertFalse(Person.objects.exists())
+        self.assertFalse(Party.objects.exists())
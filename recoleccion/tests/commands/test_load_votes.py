@@ -0,0 +1,61 @@
+from types import SimpleNamespace
+from unittest import skipIf
+import pandas as pd
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+
+# Project
+from recoleccion.components.data_sources.votes_source import DatasetVotesSource
+from recoleccion.components.linkers import Linker, PersonLinker
+from recoleccion.components.writers.votes_copy_writer import VotesCopyWriter
+from recoleccion.components.writers.votes_writer import VotesWriter
+from recoleccion.management.commands import load_votes
+from recoleccion.models import Person
+import recoleccion.tests.test_helpers.mocks as mck
+
+
+class LoadVotesTestCase(TestCase):
+    def link_persons(self, data: pd.DataFrame, unique_names=False):
+        return data.assign(person_id=None)
+
+    @skipIf(connection.vendor == "postgresql", "COPY loading is available on Postgres")
+    def test_copy_loading_raises_on_other_databases(self):
+        with self.assertRaises(CommandError):
+            call_command("load_votes", copy=True)
+
+    def test_copy_loading_writes_the_whole_dataset_at_once(self):
+        pages = [pd.DataFrame({"name": ["Juan"] * 3, "last_name": ["Perez"] * 3}) for _ in range(3)]
+        with (
+            mck.mock_class_attribute(load_votes, "connection", SimpleNamespace(vendor="postgresql")),
+            mck.mock_method(DatasetVotesSource, "iter_data", return_value=iter(pages)),
+            mck.mock_method_side_effect(PersonLinker, "link_persons", self.link_persons, autospec=False),
+            mck.mock_method(VotesCopyWriter, "write") as copy_write,
+        ):
+            call_command("load_votes", copy=True, chunk_size=2)
+        copy_write.assert_called_once()
+        self.assertEqual(len(copy_write.call_args.args[0]), 9)
+
+
+class LoadVotesPipelineTestCase(TransactionTestCase):
+    # The pipeline links and writes in its own threads, so the data of the test has to be committed
+
+    def tearDown(self):
+        Linker.default_engine = None
+
+    def test_votes_are_searched_in_processes_inside_the_pipeline(self):
+        names = [("Juan Carlos", "Perez"), ("Ana Maria", "Gomez"), ("Pedro", "Rodriguez"), ("Luisa", "Fernandez")]
+        persons = {last_name: Person.objects.create(name=name, last_name=last_name).pk for name, last_name in names}
+        votes = pd.DataFrame({"name": ["Juan C.", "Ana M.", "Pedro A.", "Luisa B."], "last_name": list(persons)})
+        with (
+            override_settings(LINKER_SEARCH_PROCESSES=2),
+            mck.mock_class_attribute(PersonLinker, "SEARCH_SHARD_MIN_SIZE", 2),
+            mck.mock_method(DatasetVotesSource, "iter_data", return_value=iter([votes])),
+            mck.mock_method_side_effect(Linker, "search_in_processes", Linker.search_in_processes) as search,
+            mck.mock_method(VotesWriter, "write") as write,
+        ):
+            call_command("load_votes", linker_engine="trigram")
+        self.assertEqual(search.call_args.args[2], 2)  # the records were searched in two processes
+        linked_votes = write.call_args.args[0]
+        self.assertEqual(dict(zip(linked_votes["last_name"], linked_votes["person_id"])), persons)
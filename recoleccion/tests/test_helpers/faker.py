@@ -1,6 +1,7 @@
 import random
 import pandas as pd
 from faker import Faker
+from unidecode import unidecode
 
 fake = Faker("es_AR")
 
@@ -81,3 +82,65 @@ def create_fake_value(column_type: str, n: int, **kwargs):
         return parties_copy.pop(0)
     else:
         raise ValueError(f"Column type {column_type} not supported")
+
+
+# Synthetic linking data, used by the benchmark_linkers command
+party_suffixes = [" - Distrito {province}", " ({province})", " (Bloque)", " - Interbloque", " Federal"]
+
+
+def create_fake_person_names(n: int) -> list:
+    """Returns n distinct (name, last_name) pairs, some of them with a middle name"""
+    person_names = set()
+    while len(person_names) < n:
+        name = fake.first_name()
+        if random.random() < 0.5:
+            name = f"{name} {fake.first_name()}"
+        person_names.add((name, fake.last_name()))
+    return list(person_names)
+
+
+def add_typo(text: str) -> str:
+    # Swaps two adjacent letters, not the first one (it is rarely wrong in the sources)
+    if len(text) < 4:
+        return text
+    position = random.randint(1, len(text) - 2)
+    return text[:position] + text[position + 1] + text[position] + text[position + 2 :]
+
+
+def create_messy_person_name(name: str, last_name: str) -> str:
+    """
+    Returns a messy "Apellido Nombre" full name of the person, like the ones of the sources:
+    without accents, without the middle name or with its initial, with typos or as "APELLIDO, Nombre"
+    """
+    first_name, *middle_names = name.split()
+    if middle_names and random.random() < 0.3:
+        name = first_name
+    elif middle_names and random.random() < 0.3:
+        name = f"{first_name} {middle_names[0][0]}."
+    if random.random() < 0.5:
+        name, last_name = unidecode(name), unidecode(last_name)
+    if random.random() < 0.2:
+        last_name = add_typo(last_name)
+    if random.random() < 0.2:
+        return f"{last_name.upper()}, {name}"
+    return f"{last_name} {name}"
+
+
+def create_fake_party_names(n: int) -> list:
+    """Returns n distinct party denominations, starting with the real ones"""
+    party_names = dict.fromkeys(parties[:n])
+    while len(party_names) < n:
+        party_type = random.choice(["Partido", "Frente", "Movimiento", "Alianza"])
+        party_names[f"{party_type} {random.choice([fake.last_name(), fake.city()])}"] = None
+    return list(party_names)
+
+
+def create_messy_party_denomination(denomination: str) -> str:
+    """Returns the denomination of a sub-party or bloc of the party, sometimes without accents or in uppercase"""
+    if random.random() < 0.7:
+        denomination += random.choice(party_suffixes).format(province=random.choice(provinces))
+    if random.random() < 0.3:
+        denomination = unidecode(denomination)
+    if random.random() < 0.2:
+        denomination = denomination.upper()
+    return denomination
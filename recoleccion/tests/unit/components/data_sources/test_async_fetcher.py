@@ -0,0 +1,46 @@
+import random
+import threading
+import time
+from django.test import TestCase
+
+# Project
+from recoleccion.components.data_sources.async_fetcher import AsyncFetcher
+
+
+class FakeSession:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = self.max_running = 0
+        self.running_by_host = {}
+        self.max_running_by_host = {}
+
+    def get(self, url: str):
+        host = url.split("/")[2]
+        with self.lock:
+            self.running += 1
+            self.running_by_host[host] = self.running_by_host.get(host, 0) + 1
+            self.max_running = max(self.max_running, self.running)
+            self.max_running_by_host[host] = max(self.max_running_by_host.get(host, 0), self.running_by_host[host])
+        time.sleep(random.uniform(0.001, 0.02))
+        with self.lock:
+            self.running -= 1
+            self.running_by_host[host] -= 1
+        return url
+
+
+class AsyncFetcherTestCase(TestCase):
+    def test_responses_keep_the_order_of_the_urls(self):
+        urls = [f"https://host-{i % 3}.com/page/{i}" for i in range(30)] + [None]
+        session = FakeSession()
+        fetcher = AsyncFetcher(session, max_concurrency=6, max_concurrency_per_host=2, host_delay=0)
+        responses = fetcher.fetch_all(urls)
+        self.assertEqual(responses, urls)
+        self.assertLessEqual(session.max_running, 6)
+        self.assertTrue(all(running <= 2 for running in session.max_running_by_host.values()))
+
+    def test_requests_to_the_same_host_are_spaced(self):
+        session = FakeSession()
+        fetcher = AsyncFetcher(session, max_concurrency=4, max_concurrency_per_host=4, host_delay=0.05)
+        start = time.monotonic()
+        fetcher.fetch_all([f"https://host.com/page/{i}" for i in range(5)])
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
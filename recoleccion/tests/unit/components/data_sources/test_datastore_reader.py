@@ -0,0 +1,47 @@
+from unittest.mock import MagicMock
+from django.test import TestCase
+
+# Project
+from recoleccion.components.data_sources.datastore_reader import DatastoreReader
+
+
+class FakeDatastoreSession:
+    def __init__(self, records: list):
+        self.records = records
+        self.requested_params = []
+
+    def get(self, url: str, params: dict):
+        self.requested_params.append(params)
+        page = self.records[params["offset"] : params["offset"] + params["limit"]]
+        response = MagicMock()
+        response.json.return_value = {"result": {"records": page}}
+        return response
+
+
+class DatastoreReaderTestCase(TestCase):
+    def setUp(self):
+        self.records = [
+            {"_id": i, "acta_id": i, "bloque": f"Bloque {i % 3}", "voto": "SI" if i % 2 else "NO"} for i in range(25)
+        ]
+        self.session = FakeDatastoreSession(self.records)
+
+    def test_chunks_are_read_with_offset_and_limit(self):
+        reader = DatastoreReader("resource", self.session, columns=["acta_id", "bloque"], page_size=10)
+        chunks = list(reader.iter_chunks())
+        self.assertEqual([len(chunk) for chunk in chunks], [10, 10, 5])
+        self.assertEqual([params["offset"] for params in self.session.requested_params], [0, 10, 20])
+        self.assertEqual(self.session.requested_params[0]["fields"], "acta_id,bloque")
+        self.assertTrue(all(params["sort"] == "_id" for params in self.session.requested_params))
+        self.assertEqual(list(chunks[0].columns), ["acta_id", "bloque"])
+
+    def test_read_keeps_categorical_dtypes(self):
+        reader = DatastoreReader("resource", self.session, dtypes={"bloque": "category"}, page_size=10)
+        data = reader.read(chunk_filter=lambda chunk: chunk[chunk["voto"] == "SI"])
+        self.assertEqual(len(data), 12)
+        self.assertEqual(data["bloque"].dtype, "category")
+        self.assertEqual(set(data["bloque"].cat.categories), {"Bloque 0", "Bloque 1", "Bloque 2"})
+        self.assertNotIn("_id", data.columns)
+
+    def test_exact_pages_end_with_an_empty_page(self):
+        reader = DatastoreReader("resource", FakeDatastoreSession(self.records[:20]), page_size=10)
+        self.assertEqual(len(reader.read()), 20)
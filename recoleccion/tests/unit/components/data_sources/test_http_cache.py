@@ -0,0 +1,102 @@
+import tempfile
+from unittest.mock import patch
+import requests
+from django.test import TestCase, override_settings
+
+# Project
+from recoleccion.components.data_sources.http_cache import CachedSession, HTTPCache, OfflineCacheMiss
+
+
+def build_response(request: requests.PreparedRequest, status_code: int = 200, content: bytes = b"", headers={}):
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers)
+    response._content = content
+    response.url = request.url
+    response.request = request
+    return response
+
+
+@override_settings(HTTP_CACHE_ENABLED=True)
+class HTTPCacheTestCase(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = HTTPCache(self.directory.name, max_size=1024, default_ttl=60)
+        self.instance_patcher = patch.object(HTTPCache, "_instance", self.cache)
+        self.instance_patcher.start()
+        self.sent_requests = []
+
+    def tearDown(self):
+        self.instance_patcher.stop()
+        self.directory.cleanup()
+
+    def mock_send(self, *responses):
+        responses = list(responses)
+
+        def send(session, request, **kwargs):
+            self.sent_requests.append(request)
+            status_code, content, headers = responses.pop(0)
+            return build_response(request, status_code, content, headers)
+
+        return patch.object(requests.Session, "send", autospec=True, side_effect=send)
+
+    def test_fresh_responses_are_answered_from_the_cache(self):
+        with self.mock_send((200, b"first", {})):
+            first_response = CachedSession().get("https://example.com/data", params={"page": 1})
+            second_response = CachedSession().get("https://example.com/data", params={"page": 1})
+        self.assertEqual(len(self.sent_requests), 1)
+        self.assertEqual(first_response.content, b"first")
+        self.assertEqual(second_response.content, b"first")
+        self.assertTrue(second_response.from_cache)
+
+    def test_post_requests_are_not_cached(self):
+        with self.mock_send((200, b"2020", {}), (200, b"2020 updated", {})):
+            CachedSession().post("https://example.com/search", data={"year": 2020})
+            response = CachedSession().post("https://example.com/search", data={"year": 2020})
+        self.assertEqual(len(self.sent_requests), 2)
+        self.assertEqual(response.content, b"2020 updated")
+        self.cache.offline = True
+        with self.assertRaises(OfflineCacheMiss):
+            CachedSession().post("https://example.com/search", data={"year": 2020})
+
+    @override_settings(HTTP_CACHE_ENABLED=False)
+    def test_disabled_cache_always_fetches_unless_offline(self):
+        with self.mock_send((200, b"first", {}), (200, b"second", {})):
+            CachedSession().get("https://example.com/data")
+            response = CachedSession().get("https://example.com/data")
+        self.assertEqual(response.content, b"second")
+        self.assertIsNone(self.cache.get(self.cache.get_key(self.sent_requests[0])))
+        self.cache.offline = True
+        with self.assertRaises(OfflineCacheMiss):
+            CachedSession().get("https://example.com/data")
+
+    def test_stale_responses_are_revalidated(self):
+        with self.mock_send((200, b"content", {"ETag": '"v1"'}), (304, b"", {})):
+            CachedSession(ttl=0).get("https://example.com/data")
+            response = CachedSession(ttl=0).get("https://example.com/data")
+        self.assertEqual(self.sent_requests[1].headers["If-None-Match"], '"v1"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b"content")
+
+    def test_offline_mode_only_uses_the_cache(self):
+        with self.mock_send((200, b"content", {})):
+            CachedSession(ttl=0).get("https://example.com/data")
+        self.cache.offline = True
+        with self.mock_send():
+            response = CachedSession(ttl=0).get("https://example.com/data")
+            with self.assertRaises(OfflineCacheMiss):
+                CachedSession().get("https://example.com/other")
+        self.assertEqual(response.content, b"content")
+        self.assertEqual(len(self.sent_requests), 1)
+
+    def test_least_recently_used_responses_are_evicted(self):
+        with self.mock_send((200, b"a" * 400, {}), (200, b"b" * 400, {}), (200, b"c" * 400, {}), (200, b"a" * 400, {})):
+            session = CachedSession()
+            session.get("https://example.com/a")
+            session.get("https://example.com/b")
+            session.get("https://example.com/a")  # from the cache, b is now the least recently used
+            session.get("https://example.com/c")
+            session.get("https://example.com/a")
+            self.assertEqual(len(self.sent_requests), 3)
+            session.get("https://example.com/b")
+        self.assertEqual(len(self.sent_requests), 4)
@@ -1,3 +1,4 @@
+from types import SimpleNamespace
 from django.test import TestCase
 from recoleccion.components.data_sources.votes_source import (
     SenateVotesSource,
@@ -6,6 +7,7 @@ from recoleccion.components.data_sources.votes_source import (
     VoteChoices,
 )
 from bs4 import BeautifulSoup
+import recoleccion.tests.test_helpers.mocks as mck
 
 
 class DeputyVotesSourceTestCase(TestCase):
@@ -141,6 +143,50 @@ class DeputyVotesSourceTestCase(TestCase):
         self.assertEqual(vote["party_name"], "Frente De Todos")
         self.assertEqual(vote["province"].label, "La Rioja")
 
+    def test_get_year_info_only_fetches_the_pdfs_of_the_votes_without_projects(self):
+        rows = """
+            <tr><th>Header</th></tr>
+            <tr>
+                <td><span>368-D-2020</span></td>
+                <td><a title="Ver detalle" href="/votacion/1">Detalle</a><a title="Ver PDF" href="/pdf/1">PDF</a></td>
+            </tr>
+            <tr>
+                <td><span>Orden del dia</span></td>
+                <td><a title="Ver detalle" href="/votacion/2">Detalle</a><a title="Ver PDF" href="/pdf/2">PDF</a></td>
+            </tr>
+        """
+        fetched_urls = []
+
+        class FakeSession:
+            def post(self, url, body):
+                return mck.FakeResponse({"content": f'<table id="table-data">{rows}</table>'})
+
+            def get(self, url):
+                fetched_urls.append(url)
+                return SimpleNamespace(text="", content=b"")
+
+        vote_info = {"date": "01/05/2020", "name": "Juan", "last_name": "Perez", "vote": "POSITIVE"}
+        with (
+            mck.mock_class_attribute(DeputyVotesSource, "session", FakeSession()),
+            mck.mock_class_attribute(DeputyVotesSource, "FETCH_HOST_DELAY", 0),
+            mck.mock_method_side_effect(
+                DeputyVotesSource, "parse_project_votes_info", lambda link, text: [vote_info.copy()], autospec=False
+            ),
+            mck.mock_method(
+                DeputyVotesSource, "parse_references_from_pdf", return_value={"project_ids": [], "day_orders": ["15"]}
+            ),
+        ):
+            year_info = DeputyVotesSource.get_year_info(1900)
+
+        base_url = "https://votaciones.hcdn.gob.ar"
+        self.assertEqual(
+            sorted(fetched_urls), [f"{base_url}/pdf/2", f"{base_url}/votacion/1", f"{base_url}/votacion/2"]
+        )
+        self.assertEqual(
+            [(info.get("deputies_project_id"), info.get("day_order")) for info in year_info],
+            [("368-D-2020", None), (None, 15)],
+        )
+
 
 class SenateVotesSourceTestCase(TestCase):
     def test_get_vote_info_parses_vote_correctly_for_afirmative_votes(self):
@@ -0,0 +1,63 @@
+from django.test import TestCase
+from django.utils import timezone
+
+# Project
+from recoleccion.components.linkers import PartyLinker, PersonLinker
+from recoleccion.components.linkers.canonical_snapshot import PartyCanonicalSnapshot, PersonCanonicalSnapshot
+from recoleccion.models import Person
+from recoleccion.models.party import Party, PartyDenomination
+
+
+class CanonicalSnapshotTestCase(TestCase):
+    def setUp(self):
+        self.person_snapshot = PersonCanonicalSnapshot.get_instance()
+        self.party_snapshot = PartyCanonicalSnapshot.get_instance()
+        self.person = Person.objects.create(name="Juan Carlos", last_name="Pérez")
+
+    def get_full_names(self):
+        return sorted(record["full_name"] for record in self.person_snapshot.get_records().values())
+
+    def test_snapshot_is_shared_by_every_linker(self):
+        self.assertIs(PersonLinker().get_canonical_data(), PersonLinker().get_canonical_data())
+        self.assertIs(PersonCanonicalSnapshot.get_instance(), self.person_snapshot)
+
+    def test_records_are_normalized(self):
+        self.assertEqual(self.get_full_names(), ["Perez Juan Carlos"])
+
+    def test_saved_and_deleted_persons_are_updated_incrementally(self):
+        self.person_snapshot.get_records()
+        other_person = Person.objects.create(name="Ana", last_name="Gómez")
+        self.person.last_name = "Pereyra"
+        self.person.save()
+        with self.assertNumQueries(2):  # the changed persons and the up to date check
+            self.assertEqual(self.get_full_names(), ["Gomez Ana", "Pereyra Juan Carlos"])
+        other_person.delete()
+        self.assertEqual(self.get_full_names(), ["Pereyra Juan Carlos"])
+
+    def test_returned_records_are_not_modified_by_later_changes(self):
+        records = self.person_snapshot.get_records()
+        Person.objects.create(name="Ana", last_name="Gómez")
+        self.assertEqual(len(self.person_snapshot.get_records()), 2)
+        self.assertEqual(len(records), 1)
+
+    def test_changes_without_signals_are_detected(self):
+        self.person_snapshot.get_records()
+        Person.objects.bulk_create([Person(name="Ana", last_name="Gómez")])
+        self.assertEqual(self.get_full_names(), ["Gomez Ana", "Perez Juan Carlos"])
+
+    def test_updates_without_signals_are_detected(self):
+        self.person_snapshot.get_records()
+        Person.objects.filter(pk=self.person.pk).update(
+            normalized_full_name="Pereyra Juan Carlos", modified_at=timezone.now()
+        )
+        self.assertEqual(self.get_full_names(), ["Pereyra Juan Carlos"])
+
+    def test_party_denominations_are_loaded_with_a_single_query(self):
+        parties = [Party.objects.create(main_denomination=f"Partido {number}") for number in range(3)]
+        PartyDenomination.objects.create(party=parties[0], denomination="Unión Cívica")
+        self.party_snapshot.invalidate()
+        with self.assertNumQueries(1):
+            records = self.party_snapshot.get_records()
+        self.assertEqual(len(records), 4)
+        self.assertIn({"denomination": "Union Civica", "party_id": parties[0].pk}, records.values())
+        self.assertIs(PartyLinker().get_canonical_data(), records)
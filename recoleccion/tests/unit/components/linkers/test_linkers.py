@@ -1,10 +1,18 @@
+import os
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+import pandas as pd
 from django.conf import settings
+from django.test import TestCase, override_settings
 from dedupe import Gazetteer
 
 # Project
 
 import recoleccion.tests.test_helpers.utils as ut
-from recoleccion.components.linkers import PartyLinker, PersonLinker
+from recoleccion.components.linkers import Linker, PartyLinker, PersonLinker
+from recoleccion.models import Authorship, DeputySeat, Vote
 from recoleccion.models.linking.person_linking import PersonLinkingDecision
 from recoleccion.models.party import Party
 from recoleccion.models.person import Person
@@ -268,6 +276,155 @@ class PersonLinkerTestCase(LinkingTestCase):
         id_value = row["person_id"].values[0]
         self.assertEqual(id_value, EXPECTED_ID)
 
+    def test_unique_names_linking_broadcasts_results_to_every_record(self):
+        EXPECTED_ID = 2
+        REPETITIONS = 5
+
+        canonical_record = {
+            "full_name": "Perez Juan",
+            "id": EXPECTED_ID,
+        }
+        updated_record = {
+            "name": "Juan",
+            "last_name": "Pérez",
+            "province": "Córdoba",
+            "start_of_term": "2019-01-10",
+            "end_of_term": "2023-01-02",
+        }
+
+        canonical_data: dict = create_fake_df(self.canonical_columns, n=10)
+        canonical_data[len(canonical_data) + 1] = canonical_record
+        updated_data = create_fake_df(self.messy_columns, n=8, as_dict=False, dates_as_str=False)
+        for _ in range(REPETITIONS):
+            updated_data.loc[len(updated_data)] = updated_record
+        with mck.mock_method(PersonLinker, "get_canonical_data", return_value=canonical_data):
+            linker = PersonLinker()
+            linked_data = linker.link_persons(updated_data, unique_names=True)
+        self.assertEqual(len(linked_data), len(updated_data))
+        self.assertListEqual(list(linked_data.index), list(updated_data.index))
+        rows = linked_data[linked_data["name"] == "Juan"]
+        self.assertEqual(len(rows), REPETITIONS)
+        self.assertListEqual(list(rows["person_id"].values), [EXPECTED_ID] * REPETITIONS)
+
+    def test_trained_gazetteer_is_reused_by_new_linkers(self):
+        canonical_data: dict = create_fake_df(self.canonical_columns, n=10)
+        updated_data = create_fake_df(self.messy_columns, n=8, as_dict=False, dates_as_str=False)
+        with mck.mock_method(PersonLinker, "get_canonical_data", return_value=canonical_data):
+            first_linker = PersonLinker()
+            first_linker.link_persons(updated_data)
+            second_linker = PersonLinker()
+            second_linker.link_persons(updated_data)
+        self.assertIs(first_linker.gazetteer, second_linker.gazetteer)
+        self.assertTrue(os.path.exists(second_linker.get_settings_file_path()))
+
+    def test_parallel_search_returns_the_same_matches_in_order(self):
+        canonical_data: dict = create_fake_df(self.canonical_columns, n=10)
+        updated_data = create_fake_df(self.messy_columns, n=8, as_dict=False, dates_as_str=False)
+        with mck.mock_method(PersonLinker, "get_canonical_data", return_value=canonical_data):
+            linker = PersonLinker()
+            linker.link_persons(updated_data)
+        messy_data = {index: {"full_name": record["full_name"]} for index, record in canonical_data.items()}
+        messy_data = dict(reversed(messy_data.items()))
+        single_process_mappings = linker.search(messy_data)
+        with override_settings(LINKER_SEARCH_PROCESSES=3), patch.object(PersonLinker, "SEARCH_SHARD_MIN_SIZE", 2):
+            parallel_mappings = linker.search(messy_data)
+        self.assertEqual(parallel_mappings, single_process_mappings)
+        self.assertEqual([messy_data_index for messy_data_index, _ in parallel_mappings], list(messy_data))
+
+    def test_gazetteer_without_stored_settings_is_searched_in_the_current_process(self):
+        canonical_data: dict = create_fake_df(self.canonical_columns, n=10)
+        updated_data = create_fake_df(self.messy_columns, n=8, as_dict=False, dates_as_str=False)
+        with mck.mock_method(PersonLinker, "get_canonical_data", return_value=canonical_data):
+            linker = PersonLinker()
+            linker.link_persons(updated_data)
+        Linker._indexed_gazetteers.pop("PersonLinker")  # like a gazetteer trained with active learning
+        messy_data = {index: {"full_name": record["full_name"]} for index, record in canonical_data.items()}
+        with (
+            override_settings(LINKER_SEARCH_PROCESSES=3),
+            patch.object(PersonLinker, "SEARCH_SHARD_MIN_SIZE", 2),
+            patch("recoleccion.components.linkers.linker.ProcessPoolExecutor") as process_pool,
+        ):
+            mappings = linker.search(messy_data)
+        process_pool.assert_not_called()
+        self.assertEqual([messy_data_index for messy_data_index, _ in mappings], list(messy_data))
+
+
+class KnownPersonsTestCase(LinkingTestCase):
+    def setUp(self):
+        self.juan = Person.objects.create(name="Juan Carlos", last_name="Perez")
+        self.ana = Person.objects.create(name="Ana", last_name="Gomez")
+        self.other_ana = Person.objects.create(name="Ana", last_name="Gómez Ruiz")
+        Vote.objects.create(person=self.juan, person_name="Juan C.", person_last_name="Pérez", reference="1")
+        Vote.objects.create(person=self.juan, person_name="Juan C", person_last_name="Perez", reference="2")
+        Vote.objects.create(person_name="Pedro", person_last_name="Rodriguez", reference="3")
+        Authorship.objects.create(person=self.ana, person_name="A.", person_last_name="Gomez", reference="1")
+        Authorship.objects.create(person=self.other_ana, person_name="A.", person_last_name="Gomez", reference="2")
+
+    def test_known_persons_come_from_the_linked_votes_and_authorships(self):
+        # "A. Gomez" was linked to two different persons, so it is linked again
+        self.assertEqual(PersonLinker.get_known_persons(), {"perez juan c": self.juan.pk})
+
+    def test_known_persons_include_the_persons_of_the_deputy_seats(self):
+        DeputySeat.objects.create(
+            person=self.ana, district="Salta", party_name="X", start_of_term="2019-12-10", end_of_term="2023-12-09"
+        )
+        known_persons = PersonLinker.get_known_persons()
+        self.assertEqual(known_persons, {"perez juan c": self.juan.pk, "gomez ana": self.ana.pk})
+
+    def test_known_persons_are_not_linked_again(self):
+        data = pd.DataFrame({"name": ["Juan C.", "Juan C."], "last_name": ["Pérez", "Perez"]})
+        linker = PersonLinker(known_persons=PersonLinker.get_known_persons())
+        with patch.object(PersonLinker, "train", side_effect=AssertionError("Known persons should not be linked")):
+            linked_data = linker.link_persons(data, unique_names=True)
+        self.assertListEqual(list(linked_data["person_id"]), [self.juan.pk, self.juan.pk])
+
+
+class TrainingPersistenceTestCase(TestCase):
+    def setUp(self):
+        self.training_dir = tempfile.TemporaryDirectory()
+        patcher = patch.object(PersonLinker, "TRAINING_DIR", self.training_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.training_dir.cleanup)
+        self.linker = PersonLinker()
+
+    def create_pairs(self, names: list) -> list:
+        return [({"full_name": messy}, {"full_name": canonical, "id": 1}) for messy, canonical in names]
+
+    def create_gazetteer(self, distinct=(), match=()):
+        training_pairs = {"distinct": self.create_pairs(distinct), "match": self.create_pairs(match)}
+        return SimpleNamespace(training_pairs=training_pairs)
+
+    def test_training_is_only_written_when_there_are_new_labels(self):
+        gazetteer = self.create_gazetteer(distinct=[("Perez Ana", "Perez Juan")], match=[("Perez J", "Perez Juan")])
+        self.assertTrue(self.linker.save_training(gazetteer))
+        training_hash = self.linker.get_training_hash()
+        self.assertFalse(self.linker.save_training(self.create_gazetteer(match=[("Perez J", "Perez Juan")])))
+        self.assertEqual(self.linker.get_training_hash(), training_hash)
+
+    def test_repeated_pairs_keep_their_first_label(self):
+        gazetteer = self.create_gazetteer(
+            distinct=[("Perez Ana", "Perez Juan"), ("Perez Ana", "Perez Juan")],
+            match=[("Perez Ana", "Perez Juan"), ("Perez J", "Perez Juan")],
+        )
+        self.linker.save_training(gazetteer)
+        training = self.linker.read_training()
+        self.assertEqual(len(training["distinct"]), 1)
+        self.assertEqual([messy["full_name"] for messy, _ in training["match"]], ["Perez J"])
+
+    def test_concurrent_saves_keep_every_label(self):
+        names = [(f"Perez {number}", "Perez Juan") for number in range(8)]
+        threads = [
+            threading.Thread(target=self.linker.save_training, args=(self.create_gazetteer(match=[name]),))
+            for name in names
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        training = self.linker.read_training()
+        self.assertEqual(sorted(messy["full_name"] for messy, _ in training["match"]), sorted(n for n, _ in names))
+
 
 class PartyLinkerTestCase(LinkingTestCase):
     def setUp(self):
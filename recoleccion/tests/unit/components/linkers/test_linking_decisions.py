@@ -1,4 +1,5 @@
 import random
+from unittest.mock import patch
 from django.core.management import call_command
 from dedupe import Gazetteer
 from django.conf import settings
@@ -11,6 +12,7 @@ from recoleccion.models import (
     Authorship,
     DeputySeat,
     LawProject,
+    LinkingResolution,
     Party,
     PartyDenomination,
     PartyLinkingDecision,
@@ -257,7 +259,7 @@ class PartyLinkingDecisionsTestCase(LinkingTestCase):
             Vote.objects.create(
                 person_name="Nombre", person_last_name="Apellido", party_name=messy_parties[i], project=projects[i]
             )
-        queryset = Vote.objects.values("party_name", "id")
+        queryset = Vote.objects.values("party_name", "id").order_by("id")
         messy_data = pd.DataFrame(list(queryset))
         with mck.mock_method_side_effect(Gazetteer, "search", side_effect=mck.mock_linking_results):
             linked_data = linker.link_parties(messy_data)
@@ -288,7 +290,7 @@ class PartyLinkingDecisionsTestCase(LinkingTestCase):
             Vote.objects.create(
                 person_name="Nombre", person_last_name="Apellido", party_name=messy_parties[i], project=projects[i]
             )
-        queryset = Vote.objects.values("party_name", "id")
+        queryset = Vote.objects.values("party_name", "id").order_by("id")
         messy_data = pd.DataFrame(list(queryset))
         with mck.mock_method_side_effect(Gazetteer, "search", side_effect=mck.mock_linking_results):
             linked_data = linker.link_parties(messy_data)
@@ -326,7 +328,7 @@ class PartyLinkingDecisionsTestCase(LinkingTestCase):
                 party_name=messy_parties[i]["party_name"],
                 project=projects[i],
             )
-        queryset = Vote.objects.values("party_name", "id")
+        queryset = Vote.objects.values("party_name", "id").order_by("id")
         messy_data = pd.DataFrame(list(queryset))
         with mck.mock_method_side_effect(Gazetteer, "search", side_effect=mck.mock_linking_results):
             with mck.mock_method_side_effect(PartyLinker, "load_exact_matches", mck.mock_load_exact_matches):
@@ -366,3 +368,139 @@ class PartyLinkingDecisionsTestCase(LinkingTestCase):
         authorship.refresh_from_db()
         self.assertEqual(vote.party.pk, party.pk)
         self.assertEqual(authorship.party.pk, party.pk)
+
+
+class FakeGazetteer:
+    def __init__(self, possible_mappings):
+        self.possible_mappings = possible_mappings
+
+    def search(self, messy_data, n_matches=1):
+        return self.possible_mappings
+
+
+class LinkingDecisionsBatchTestCase(LinkingTestCase):
+    def setUp(self):
+        self.juan = Person.objects.create(name="Juan", last_name="Perez")
+        self.ana = Person.objects.create(name="Ana", last_name="Gomez")
+        self.approved_decision = PersonLinkingDecision.objects.create(
+            person=self.juan, messy_name="Perez Juan C", decision=LinkingDecisionOptions.APPROVED
+        )
+        self.linker = PersonLinker()
+
+    def get_canonical_index(self, person: Person) -> int:
+        return next(index for index, record in self.linker.canonical_data.items() if record["id"] == person.pk)
+
+    def test_decisions_are_fetched_and_created_in_bulk(self):
+        keys = {(self.juan.pk, "Perez Juan C"), (self.ana.pk, "Gomez Ana M"), (self.juan.pk, "Gomez Ana M")}
+        with self.assertNumQueries(2):  # one query for the existing decisions, one for the new ones
+            decisions = self.linker.get_or_save_pending_linking_decisions(keys)
+        self.assertEqual(decisions[(self.juan.pk, "Perez Juan C")], (self.approved_decision, False))
+        new_decision, created = decisions[(self.ana.pk, "Gomez Ana M")]
+        self.assertTrue(created)
+        self.assertEqual(new_decision.decision, LinkingDecisionOptions.PENDING)
+        self.assertEqual(PersonLinkingDecision.objects.count(), 3)
+
+    def test_classify_uses_the_existing_decisions(self):
+        juan_index, ana_index = self.get_canonical_index(self.juan), self.get_canonical_index(self.ana)
+        messy_data = {
+            0: {"full_name": "Perez Juan C"},
+            1: {"full_name": "Gomez Ana M"},
+            2: {"full_name": "Gomez Ana M"},
+            3: {"full_name": "Perez Juan Carlos"},
+        }
+        self.linker.gazetteer = FakeGazetteer(
+            [(0, [(juan_index, 0.5)]), (1, [(ana_index, 0.5)]), (2, [(ana_index, 0.5)]), (3, [(juan_index, 0.95)])]
+        )
+        certain, dubious, distinct = self.linker.classify(messy_data)
+        self.assertEqual(certain, [(0, juan_index), (3, juan_index)])
+        pending_decision = PersonLinkingDecision.objects.get(person=self.ana, messy_name="Gomez Ana M")
+        self.assertEqual(dubious, [(1, ana_index, pending_decision.uuid), (2, ana_index, pending_decision.uuid)])
+        self.assertEqual(distinct, [])
+
+    def test_certain_matches_are_resolved_without_the_gazetteer_next_time(self):
+        juan_index, ana_index = self.get_canonical_index(self.juan), self.get_canonical_index(self.ana)
+        messy_data = {0: {"full_name": "Perez Juan C"}, 1: {"full_name": "Gomez Ana Maria"}}
+        self.linker.gazetteer = FakeGazetteer([(0, [(juan_index, 0.5)]), (1, [(ana_index, 0.95)])])
+        self.linker.classify(messy_data)
+        resolutions = LinkingResolution.objects.filter(linker="PersonLinker")
+        self.assertEqual(
+            sorted(resolutions.values_list("messy_key", "person_id", "resolved_by")),
+            [("gomez ana maria", self.ana.pk, "GAZETTEER"), ("perez juan c", self.juan.pk, "APPROVED_DECISION")],
+        )
+        data = pd.DataFrame({"full_name": ["Gómez Ana María", "Pérez Juan C.", "Perez Juan"]})
+        with patch.object(PersonLinker, "train", side_effect=AssertionError("The Gazetteer should not be used")):
+            linked_data = PersonLinker().link_persons(data)
+        self.assertEqual(sorted(linked_data["person_id"]), sorted([self.ana.pk, self.juan.pk, self.juan.pk]))
+
+    def test_resolutions_are_deleted_with_their_person(self):
+        LinkingResolution.objects.create(
+            linker="PersonLinker", messy_key="gomez ana m", person=self.ana, resolved_by="GAZETTEER"
+        )
+        self.ana.delete()
+        self.assertFalse(LinkingResolution.objects.exists())
+
+    def test_resolutions_are_deleted_when_their_decision_is_denied(self):
+        LinkingResolution.objects.create(
+            linker="PersonLinker", messy_key="perez juan c", person=self.juan, resolved_by="APPROVED_DECISION"
+        )
+        party = Party.objects.create(main_denomination="UCR")
+        LinkingResolution.objects.create(linker="PartyLinker", messy_key="perez juan c", party=party, resolved_by="GAZETTEER")
+        self.approved_decision.decision = LinkingDecisionOptions.DENIED
+        self.approved_decision.save()
+        self.approved_decision.unlink_related_records()
+        self.assertEqual(list(LinkingResolution.objects.values_list("linker", flat=True)), ["PartyLinker"])
+
+
+class BulkLinkingDecisionsTestCase(LinkingTestCase):
+    def setUp(self):
+        self.juan = Person.objects.create(name="Juan", last_name="Perez")
+        self.ana = Person.objects.create(name="Ana", last_name="Gomez")
+        self.messy_person = Person.objects.create(name="Juan C", last_name="Perez")
+        self.juan_decision = PersonLinkingDecision.objects.create(person=self.juan, messy_name="Juan C Perez")
+        self.ana_decision = PersonLinkingDecision.objects.create(person=self.ana, messy_name="Ana M Gomez")
+        self.juan_votes = [
+            Vote.objects.create(person_name="Juan C", person_last_name="Perez", reference=str(number))
+            for number in range(3)
+        ]
+        self.ana_authorship = Authorship.objects.create(person_name="Ana M", person_last_name="Gomez")
+        Vote.objects.filter(pk__in=[vote.pk for vote in self.juan_votes]).update(linking_id=self.juan_decision.uuid)
+        Authorship.objects.filter(pk=self.ana_authorship.pk).update(linking_id=self.ana_decision.uuid)
+
+    def test_decisions_are_applied_to_every_related_record(self):
+        updated_records = PersonLinkingDecision.apply_decisions([self.juan_decision, self.ana_decision])
+        self.assertEqual(updated_records, 4)
+        self.assertEqual(Vote.objects.filter(person=self.juan).count(), 3)
+        self.assertEqual(Authorship.objects.get(pk=self.ana_authorship.pk).person_id, self.ana.pk)
+
+    def test_duplicated_records_are_updated_decision_by_decision(self):
+        DeputySeat.objects.create(
+            person=self.juan, district="Córdoba", party_name="UCR", start_of_term="2019-12-10", end_of_term="2023-12-10"
+        )
+        messy_seat = DeputySeat.objects.create(
+            person=self.messy_person,
+            district="Córdoba",
+            party_name="UCR",
+            start_of_term="2019-12-10",
+            end_of_term="2023-12-10",
+        )
+        DeputySeat.objects.filter(pk=messy_seat.pk).update(linking_id=self.juan_decision.uuid)
+        PersonLinkingDecision.apply_decisions([self.juan_decision])
+        self.assertEqual(DeputySeat.objects.filter(person=self.juan).count(), 1)
+        self.assertFalse(DeputySeat.objects.filter(pk=messy_seat.pk).exists())
+        self.assertEqual(Vote.objects.filter(person=self.juan).count(), 3)
+
+    def test_batch_mode_saves_every_decision_at_once(self):
+        LinkingResolution.objects.create(
+            linker="PersonLinker", messy_key="ana m gomez", person=self.ana, resolved_by="GAZETTEER"
+        )
+        responses = [LinkingDecisionOptions.APPROVED, LinkingDecisionOptions.DENIED]
+        with patch.object(Command, "ask_for_user_decision", side_effect=responses):
+            call_command("define_dubious_records", batch=True)
+        self.juan_decision.refresh_from_db()
+        self.ana_decision.refresh_from_db()
+        self.assertEqual(self.juan_decision.decision, LinkingDecisionOptions.APPROVED)
+        self.assertEqual(self.ana_decision.decision, LinkingDecisionOptions.DENIED)
+        self.assertEqual(Vote.objects.filter(person=self.juan, linking_id=self.juan_decision.uuid).count(), 3)
+        ana_authorship = Authorship.objects.get(pk=self.ana_authorship.pk)
+        self.assertEqual((ana_authorship.person_id, ana_authorship.linking_id), (None, None))
+        self.assertFalse(LinkingResolution.objects.exists())
@@ -0,0 +1,70 @@
+from unittest.mock import patch
+from django.test import TestCase
+import pandas as pd
+
+# Project
+from recoleccion.components.linkers import PersonLinker
+from recoleccion.components.linkers.linker import Linker
+from recoleccion.components.linkers.trigram_matcher import TrigramMatcher, get_trigrams, jaro_winkler_similarity
+from recoleccion.models import Person
+
+
+class TrigramMatcherTestCase(TestCase):
+    def setUp(self):
+        self.canonical_data = {
+            0: {"full_name": "Perez Juan Carlos"},
+            1: {"full_name": "Perez Julio"},
+            2: {"full_name": "Gomez Ana Maria"},
+            3: {"full_name": "Rodriguez Pedro"},
+        }
+        self.matcher = TrigramMatcher("full_name")
+        self.matcher.index(self.canonical_data)
+
+    def test_trigrams_are_padded(self):
+        self.assertEqual(get_trigrams("Ana"), {"  a", " an", "ana", "na "})
+
+    def test_jaro_winkler_similarity(self):
+        self.assertAlmostEqual(jaro_winkler_similarity("martha", "marhta"), 0.961, places=3)
+        self.assertAlmostEqual(jaro_winkler_similarity("dwayne", "duane"), 0.84, places=3)
+        self.assertEqual(jaro_winkler_similarity("perez", "perez"), 1.0)
+        self.assertEqual(jaro_winkler_similarity("abc", "xyz"), 0.0)
+
+    def test_search_ranks_the_most_similar_name_first(self):
+        messy_data = {"a": {"full_name": "Perez Juan C"}, "b": {"full_name": "Gómez Ana M"}}
+        results = dict(self.matcher.search(messy_data, n_matches=2))
+        self.assertEqual([key for key, _ in results["a"]], [0, 1])
+        self.assertEqual(results["b"][0][0], 2)
+        self.assertGreater(results["a"][0][1], results["a"][1][1])
+
+    def test_search_without_shared_trigrams_has_no_matches(self):
+        self.assertEqual(self.matcher.search({0: {"full_name": "xyz"}}), [(0, ())])
+
+    def test_search_is_deterministic(self):
+        messy_data = {index: {"full_name": name} for index, name in enumerate(["Perez Juan", "Perez", "Ana"])}
+        reversed_matcher = TrigramMatcher("full_name")
+        reversed_matcher.index(dict(reversed(list(self.canonical_data.items()))))
+        self.assertEqual(self.matcher.search(messy_data), self.matcher.search(messy_data))
+        self.assertEqual(self.matcher.search(messy_data), reversed_matcher.search(messy_data))
+
+
+class TrigramEngineTestCase(TestCase):
+    def setUp(self):
+        self.juan = Person.objects.create(name="Juan Carlos", last_name="Perez")
+        self.ana = Person.objects.create(name="Ana Maria", last_name="Gomez")
+
+    def tearDown(self):
+        Linker.default_engine = None
+
+    def test_persons_are_linked_without_training(self):
+        data = pd.DataFrame({"full_name": ["Perez Juan Carlos", "Perez Juan Karlos", "Gomez Ana Marta"]})
+        with patch.object(PersonLinker, "_train", side_effect=AssertionError("dedupe should not be trained")):
+            linked_data = PersonLinker(engine=Linker.TRIGRAM_ENGINE).link_persons(data)
+        self.assertEqual(
+            linked_data.sort_values("full_name")["person_id"].tolist(), [self.ana.pk, self.juan.pk, self.juan.pk]
+        )
+
+    def test_default_engine_is_used_when_the_linker_has_none(self):
+        self.assertEqual(PersonLinker().get_engine(), Linker.DEDUPE_ENGINE)
+        Linker.default_engine = Linker.TRIGRAM_ENGINE
+        self.assertEqual(PersonLinker().get_engine(), Linker.TRIGRAM_ENGINE)
+        self.assertEqual(PersonLinker(engine=Linker.DEDUPE_ENGINE).get_engine(), Linker.DEDUPE_ENGINE)
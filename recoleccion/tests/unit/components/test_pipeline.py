@@ -0,0 +1,62 @@
+import pandas as pd
+from django.test import TestCase
+
+# Project
+from recoleccion.components.pipeline import Pipeline
+from recoleccion.models import Party
+
+
+def get_source(*sizes: int):
+    start = 0
+    for size in sizes:
+        yield pd.DataFrame({"value": range(start, start + size)})
+        start += size
+
+
+class PipelineTestCase(TestCase):
+    def setUp(self):
+        self.written_chunks = []
+
+    def link(self, data: pd.DataFrame) -> pd.DataFrame:
+        return data.assign(linked_value=data["value"] * 2)
+
+    def write(self, data: pd.DataFrame):
+        self.written_chunks.append(data)
+
+    def test_every_row_is_linked_and_written_in_order(self):
+        pipeline = Pipeline(get_source(7, 3), self.link, self.write, chunk_size=4)
+        stats = pipeline.run()
+        written_data = pd.concat(self.written_chunks)
+        self.assertEqual(written_data["value"].tolist(), list(range(10)))
+        self.assertEqual(written_data["linked_value"].tolist(), [value * 2 for value in range(10)])
+        self.assertEqual([len(chunk) for chunk in self.written_chunks], [4, 3, 3])
+        for stage_stats in stats.values():
+            self.assertEqual(stage_stats.rows, 10)
+            self.assertEqual(stage_stats.chunks, 3)
+
+    def test_empty_source(self):
+        stats = Pipeline(get_source(), self.link, self.write).run()
+        self.assertEqual(self.written_chunks, [])
+        self.assertEqual(stats["write"].rows, 0)
+
+    def test_linking_error_stops_the_pipeline(self):
+        def link(data: pd.DataFrame):
+            raise ValueError("Linking error")
+
+        pipeline = Pipeline(get_source(*[10] * 20), link, self.write, chunk_size=5, queue_size=1)
+        with self.assertRaisesMessage(ValueError, "Linking error"):
+            pipeline.run()
+        self.assertEqual(self.written_chunks, [])
+
+    def test_writing_error_only_rolls_back_its_chunk(self):
+        def write(data: pd.DataFrame):
+            for value in data["value"]:
+                Party.objects.create(main_denomination=f"Partido {value}")
+            if data["value"].iloc[0] > 0:
+                raise ValueError("Writing error")
+
+        pipeline = Pipeline(get_source(6), self.link, write, chunk_size=3)
+        with self.assertRaisesMessage(ValueError, "Writing error"):
+            pipeline.run()
+        denominations = Party.objects.values_list("main_denomination", flat=True)
+        self.assertEqual(sorted(denominations), ["Partido 0", "Partido 1", "Partido 2"])
@@ -1,5 +1,24 @@
+import pandas as pd
+import uuid
+from decimal import Decimal
+from unittest import skipUnless
+from django.db import connection
 from django.test import TestCase
-from recoleccion.models import LawProject
+from django.test.utils import CaptureQueriesContext
+from recoleccion.components.writers.affidavits_writer import AffidavitsWriter
+from recoleccion.components.writers.law_projects_writer import LawProjectsWriter
+from recoleccion.components.writers.laws_writer import LawsWriter
+from recoleccion.components.writers.parties_writer import PartiesWriter
+from recoleccion.components.writers.persons_writer import PersonsWriter
+from recoleccion.components.writers.project_index import ProjectIndex
+from recoleccion.components.writers.votes_copy_writer import VotesCopyWriter
+from recoleccion.components.writers.votes_writer import VotesWriter
+import recoleccion.tests.test_helpers.mocks as mck
+from recoleccion.models import AffidavitEntry, Law, LawProject, Party, Person, SocialData, Vote
+from recoleccion.utils.enums.affidavit import AffidevitType
+from recoleccion.utils.enums.project_chambers import ProjectChambers
+from recoleccion.utils.enums.project_status import ProjectStatus
+from recoleccion.utils.enums.vote_types import VoteTypes
 
 
 class LawsProjectWriter(TestCase):
@@ -93,7 +112,461 @@ class LawsProjectWriter(TestCase):
             year_formatted = LawProject.format_year(year_str)
             self.assertEqual(year_formatted, year)
 
+    def test_projects_without_source_are_written(self):
+        data = pd.DataFrame({"deputies_project_id": ["70-21", "3042-D-21"], "title": ["Sin origen", "Con origen"]})
+        written = LawProjectsWriter.write(data)
+        self.assertEqual(len(written), 2)
+        project = LawProject.objects.get(deputies_number=70)
+        self.assertEqual((project.deputies_year, project.deputies_source), (2021, None))
+        self.assertEqual(project.deputies_project_id, "70-2021")
+        # Written again, the project without source is updated, not duplicated
+        LawProjectsWriter.write(pd.DataFrame({"deputies_project_id": ["70-21"], "title": ["Actualizado"]}))
+        titles = LawProject.objects.filter(deputies_number=70).values_list("title", flat=True)
+        self.assertEqual(list(titles), ["Actualizado"])
+
 
 class AuthorsWriter(TestCase):
     def test_bulk_creation_when_no_authors_are_present(self):
         pass
+
+
+class VotesWriterTestCase(TestCase):
+    def setUp(self):
+        self.person = Person.objects.create(name="Juan", last_name="Perez")
+        self.project = LawProject.objects.create(
+            deputies_project_id="368-D-2020",
+            deputies_number=368,
+            deputies_source="D",
+            deputies_year=2020,
+            deputies_day_order=15,
+            title="Proyecto",
+            origin_chamber=ProjectChambers.DEPUTIES,
+        )
+        self.law = Law.objects.create(law_number=27000, title="Ley", summary="Resumen")
+
+    def create_vote_row(self, **kwargs) -> dict:
+        row = {
+            "name": "Juan",
+            "last_name": "Perez",
+            "person_id": self.person.pk,
+            "chamber": ProjectChambers.DEPUTIES,
+            "date": "2020-05-01",
+            "vote": "Afirmativo",
+            "vote_type": VoteTypes.OTHER,
+        }
+        row.update(kwargs)
+        return row
+
+    def test_write_resolves_projects_laws_and_references(self):
+        data = pd.DataFrame(
+            [
+                self.create_vote_row(deputies_project_id="368-D-20"),
+                self.create_vote_row(day_order=15),
+                self.create_vote_row(law=27000),
+                self.create_vote_row(deputies_project_id="9999-D-2020"),
+                self.create_vote_row(person_id=None, name="Ana", last_name="Gomez", deputies_project_id="368-D-2020"),
+            ]
+        )
+        VotesWriter().write(data)
+        linked_vote = Vote.objects.get(project=self.project, person=self.person)
+        self.assertEqual((linked_vote.person_name, linked_vote.person_last_name), ("Juan", "Perez"))
+        self.assertEqual(Vote.objects.filter(law=self.law).count(), 1)
+        self.assertTrue(Vote.objects.filter(reference="9999-D-2020", project__isnull=True).exists())
+        unlinked_vote = Vote.objects.get(person__isnull=True)
+        self.assertEqual((unlinked_vote.person_name, unlinked_vote.person_last_name), ("Ana", "Gomez"))
+        self.assertEqual(unlinked_vote.vote, "POSITIVE")
+        self.assertEqual(Vote.objects.count(), 4)  # the day order resolves to the same project
+
+    def test_write_updates_existing_votes_instead_of_duplicating_them(self):
+        data = pd.DataFrame([self.create_vote_row(deputies_project_id="368-D-2020")])
+        VotesWriter().write(data)
+        data = pd.DataFrame([self.create_vote_row(deputies_project_id="368-D-2020", vote="Negativo")])
+        VotesWriter().write(data)
+        vote = Vote.objects.get()
+        self.assertEqual(vote.vote, "NEGATIVE")
+
+    def test_general_votes_are_only_overwritten_by_general_votes(self):
+        general_row = self.create_vote_row(deputies_project_id="368-D-2020", vote_type=VoteTypes.GENERAL)
+        particular_row = self.create_vote_row(
+            deputies_project_id="368-D-2020", vote="Negativo", vote_type=VoteTypes.PARTICULAR
+        )
+        VotesWriter(batch_size=1).write(pd.DataFrame([general_row, particular_row]))
+        vote = Vote.objects.get()
+        self.assertEqual((vote.vote, vote.vote_type), ("POSITIVE", VoteTypes.GENERAL))
+
+        VotesWriter().write(pd.DataFrame([particular_row, general_row]))
+        vote = Vote.objects.get()
+        self.assertEqual((vote.vote, vote.vote_type), ("POSITIVE", VoteTypes.GENERAL))
+
+    def test_only_the_inserted_votes_are_returned(self):
+        Vote.objects.create(person=self.person, chamber=ProjectChambers.DEPUTIES, law=self.law, vote="NEGATIVE")
+        data = pd.DataFrame([self.create_vote_row(law=27000), self.create_vote_row(deputies_project_id="368-D-2020")])
+        # The existing vote is not found, as if it was written by another thread after the votes were fetched
+        with mck.mock_method(VotesWriter, "get_existing_votes", return_value={}):
+            written = VotesWriter().write(data)
+        self.assertEqual(len(written), 1)
+        self.assertEqual(written[0].pk, Vote.objects.get(project=self.project).pk)
+        self.assertEqual(Vote.objects.get(law=self.law).vote, "NEGATIVE")
+
+    def test_votes_of_different_chambers_are_not_merged(self):
+        deputies_row = self.create_vote_row(person_id=None, law=27000)
+        senate_row = self.create_vote_row(person_id=None, law=27000, chamber=ProjectChambers.SENATORS, vote="Negativo")
+        written = VotesWriter().write(pd.DataFrame([deputies_row, senate_row]))
+        self.assertEqual(len(written), 2)
+        self.assertEqual(
+            set(Vote.objects.values_list("chamber", "vote")),
+            {(ProjectChambers.DEPUTIES, "POSITIVE"), (ProjectChambers.SENATORS, "NEGATIVE")},
+        )
+        VotesWriter().write(pd.DataFrame([{**senate_row, "vote": "Afirmativo"}]))
+        self.assertEqual(
+            set(Vote.objects.values_list("chamber", "vote")),
+            {(ProjectChambers.DEPUTIES, "POSITIVE"), (ProjectChambers.SENATORS, "POSITIVE")},
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY loading is only available on Postgres")
+class VotesCopyWriterTestCase(TestCase):
+    setUp = VotesWriterTestCase.setUp
+    create_vote_row = VotesWriterTestCase.create_vote_row
+
+    def test_copy_load_inserts_updates_and_skips_votes(self):
+        general_row = self.create_vote_row(deputies_project_id="368-D-2020", vote_type=VoteTypes.GENERAL)
+        data = pd.DataFrame(
+            [
+                general_row,
+                self.create_vote_row(law=27000),
+                self.create_vote_row(person_id=None, name="Ana", last_name="Gomez", deputies_project_id="1-D-2020"),
+                self.create_vote_row(),
+            ]
+        )
+        report = VotesCopyWriter().write(data)
+        self.assertEqual(report, {"inserted": 4, "updated": 0, "skipped": 0})
+        self.assertTrue(Vote.objects.filter(project=self.project, person=self.person).exists())
+        self.assertTrue(Vote.objects.filter(person_name="Ana", reference="1-D-2020").exists())
+
+        particular_row = self.create_vote_row(
+            deputies_project_id="368-D-2020", vote="Negativo", vote_type=VoteTypes.PARTICULAR
+        )
+        data = pd.DataFrame([particular_row, self.create_vote_row(law=27000, vote="Negativo"), self.create_vote_row()])
+        report = VotesCopyWriter().write(data)
+        self.assertEqual(report, {"inserted": 0, "updated": 1, "skipped": 2})
+        self.assertEqual(Vote.objects.get(project=self.project).vote, "POSITIVE")
+        self.assertEqual(Vote.objects.get(law=self.law).vote, "NEGATIVE")
+        self.assertEqual(Vote.objects.count(), 4)
+
+    def test_copy_load_keeps_the_linking_ids(self):
+        targeted_linking_id, untargeted_linking_id = uuid.uuid4(), uuid.uuid4()
+        data = pd.DataFrame(
+            [
+                self.create_vote_row(person_id=None, deputies_project_id="368-D-2020", linking_id=targeted_linking_id),
+                self.create_vote_row(person_id=None, name="Ana", last_name="Gomez", linking_id=untargeted_linking_id),
+            ]
+        )
+        report = VotesCopyWriter().write(data)
+        self.assertEqual(report, {"inserted": 2, "updated": 0, "skipped": 0})
+        self.assertEqual(Vote.objects.get(project=self.project).linking_id, targeted_linking_id)
+        self.assertEqual(Vote.objects.get(person_name="Ana").linking_id, untargeted_linking_id)
+
+        # Upserted again, the vote takes the new pending decision
+        new_linking_id = uuid.uuid4()
+        data = pd.DataFrame(
+            [self.create_vote_row(person_id=None, deputies_project_id="368-D-2020", linking_id=new_linking_id)]
+        )
+        report = VotesCopyWriter().write(data)
+        self.assertEqual(report, {"inserted": 0, "updated": 1, "skipped": 0})
+        self.assertEqual(Vote.objects.get(project=self.project).linking_id, new_linking_id)
+
+
+
+@skipUnless(connection.vendor != "postgresql", "COPY loading is available on Postgres")
+class VotesCopyWriterUnavailableTestCase(TestCase):
+    def test_copy_load_raises_on_other_databases(self):
+        with self.assertRaises(RuntimeError):
+            VotesCopyWriter().write(pd.DataFrame([{"name": "Juan", "last_name": "Perez"}]))
+
+
+class ProjectIndexTestCase(TestCase):
+    def setUp(self):
+        self.project = LawProject.objects.create(
+            deputies_project_id="368-D-2020",
+            deputies_number=368,
+            deputies_source="D",
+            deputies_year=2020,
+            senate_project_id="12/20",
+            senate_number=12,
+            senate_year=2020,
+            senate_day_order=40,
+            title="Proyecto",
+            origin_chamber=ProjectChambers.DEPUTIES,
+        )
+        self.law = Law.objects.create(law_number=27000, title="Ley", summary="Resumen")
+
+    def test_index_resolves_references_without_queries(self):
+        project_index = ProjectIndex()
+        with self.assertNumQueries(0):
+            self.assertEqual(project_index.get_project_id("368-D-20", ProjectChambers.DEPUTIES), self.project.pk)
+            self.assertEqual(project_index.get_project_id("12/20", ProjectChambers.SENATORS), self.project.pk)
+            self.assertEqual(project_index.get_project_id_from_day_order(40, ProjectChambers.SENATORS), self.project.pk)
+            self.assertEqual(project_index.get_law_id("27000"), self.law.pk)
+            self.assertIsNone(project_index.get_project_id("368-D-20", ProjectChambers.SENATORS))
+            self.assertIsNone(project_index.get_project_id("invalid", ProjectChambers.DEPUTIES))
+
+    def test_refresh_loads_new_projects(self):
+        project_index = ProjectIndex()
+        self.assertIsNone(project_index.get_law_id(27001))
+        law = Law.objects.create(law_number=27001, title="Otra ley", summary="Resumen")
+        project_index.refresh()
+        self.assertEqual(project_index.get_law_id(27001), law.pk)
+
+
+class BulkWritersTestCase(TestCase):
+    def create_affidavit_row(self, index: int, **kwargs) -> dict:
+        row = {
+            "full_name": f"Perez Juan {index}",
+            "year": 2020,
+            "affidavit_type": AffidevitType.ANUAL,
+            "value": "1.500,25",
+            "source": "Affidavit-2020",
+        }
+        row.update(kwargs)
+        return row
+
+    def test_affidavits_are_written_with_a_constant_amount_of_queries(self):
+        AffidavitEntry.objects.create(person_full_name="Perez Juan 0", year=2020, affidavit_type="Anual", value=1)
+        data = pd.DataFrame([self.create_affidavit_row(index) for index in range(50)])
+        with CaptureQueriesContext(connection) as queries:
+            written = AffidavitsWriter.write(data)
+        self.assertLess(len(queries), 10)
+        self.assertEqual(len(written), 49)
+        self.assertEqual(AffidavitEntry.objects.count(), 50)
+        self.assertEqual(AffidavitEntry.objects.get(person_full_name="Perez Juan 0").value, Decimal("1500.25"))
+
+    def test_affidavits_year_depends_on_the_type_and_nulls_do_not_overwrite(self):
+        data = pd.DataFrame(
+            [
+                self.create_affidavit_row(0, affidavit_type=AffidevitType.INITIAL),
+                self.create_affidavit_row(1, affidavit_type=AffidevitType.FINAL),
+            ]
+        )
+        AffidavitsWriter.write(data, batch_size=1)
+        self.assertEqual(
+            list(AffidavitEntry.objects.order_by("year").values_list("person_full_name", "year")),
+            [("Perez Juan 0", 2019), ("Perez Juan 1", 2021)],
+        )
+        data = pd.DataFrame([self.create_affidavit_row(0, affidavit_type=AffidevitType.INITIAL, source=None)])
+        self.assertEqual(AffidavitsWriter.write(data), [])
+        self.assertEqual(AffidavitEntry.objects.get(person_full_name="Perez Juan 0").source, "Affidavit-2020")
+
+    def test_law_projects_are_identified_by_the_file_of_their_chamber(self):
+        project = LawProject.objects.create(
+            senate_project_id="12-S-2020", senate_number=12, senate_source="S", senate_year=2020, title="Proyecto"
+        )
+        law = Law.objects.create(law_number=27000, title="Ley", summary="Resumen")
+        data = pd.DataFrame(
+            [
+                {"senate_project_id": "12/S/20", "title": "Proyecto del senado", "source": "Senado", "law": 27000},
+                {"deputies_project_id": "368-d-20", "title": "Proyecto de diputados", "source": "HCDN"},
+                {"deputies_project_id": "invalido", "title": "Proyecto sin expediente", "source": "HCDN"},
+            ]
+        )
+        written = LawProjectsWriter.write(data)
+        self.assertEqual([project.deputies_project_id for project in written], ["368-D-2020"])
+        project.refresh_from_db()
+        self.assertEqual(project.title, "Proyecto del senado")
+        self.assertEqual(LawProject.objects.count(), 2)
+        law.refresh_from_db()
+        self.assertEqual(law.associated_project, project)
+
+    def test_law_projects_are_matched_by_the_file_of_the_other_chamber(self):
+        project = LawProject.objects.create(
+            senate_project_id="12-S-2020", senate_number=12, senate_source="S", senate_year=2020, title="Proyecto"
+        )
+        data = pd.DataFrame(
+            [
+                {
+                    "deputies_project_id": "368-D-20",
+                    "senate_project_id": "12-S-20",
+                    "title": "Proyecto en diputados",
+                    "source": "HCDN",
+                }
+            ]
+        )
+        self.assertEqual(LawProjectsWriter.write(data), [])
+        project.refresh_from_db()
+        self.assertEqual((project.deputies_project_id, project.title), ("368-D-2020", "Proyecto en diputados"))
+        self.assertEqual(LawProject.objects.count(), 1)
+
+    def test_laws_are_associated_to_the_projects_of_their_initial_files(self):
+        project = LawProject.objects.create(deputies_project_id="368-D-2020", title="Proyecto")
+        data = pd.DataFrame(
+            [
+                {"law_number": 27000, "title": "Ley", "summary": "Resumen", "initial_file": "368-D-2020", "veto": "1"},
+                {"law_number": 27001, "title": "Ley", "summary": "Resumen", "initial_file": "NULL", "veto": None},
+            ]
+        )
+        LawsWriter().write(data)
+        law, other_law = Law.objects.order_by("law_number")
+        self.assertEqual((law.associated_project, law.vetoed), (project, True))
+        self.assertEqual((other_law.associated_project, other_law.vetoed), (None, False))
+
+    def test_law_projects_upsert_keeps_the_values_missing_in_the_data(self):
+        data = pd.DataFrame(
+            [
+                {
+                    "deputies_project_id": "368-D-20",
+                    "title": "Proyecto",
+                    "publication_date": "2020-05-01",
+                    "source": "HCDN",
+                }
+            ]
+        )
+        self.assertEqual(len(LawProjectsWriter.write(data)), 1)
+        data = pd.DataFrame([{"deputies_project_id": "368-D-2020", "title": "Proyecto modificado", "source": "HCDN"}])
+        self.assertEqual(LawProjectsWriter.write(data), [])
+        project = LawProject.objects.get()
+        self.assertEqual((project.title, str(project.publication_date)), ("Proyecto modificado", "2020-05-01"))
+        self.assertEqual(project.status, ProjectStatus.ORIGIN_CHAMBER_COMISSION)
+
+
+class LawProjectsUpdatesTestCase(TestCase):
+    def setUp(self):
+        self.project = LawProject.objects.create(
+            deputies_project_id="368-D-2020", deputies_number=368, deputies_source="D", deputies_year=2020
+        )
+        self.other_project = LawProject.objects.create(
+            deputies_project_id="12-PE-2019", deputies_number=12, deputies_source="PE", deputies_year=2019
+        )
+
+    def test_day_orders_are_updated_with_a_single_update_and_anti_join(self):
+        data = pd.DataFrame(
+            {"project_id": ["368-D-20", "0012-PE-2019", "1-D-2020", "invalido"], "day_order": [15, 40, 2, 3]}
+        )
+        with self.assertNumQueries(2):
+            updated, not_found = LawProjectsWriter.update_by_deputies_file(data, "day_order", "deputies_day_order")
+        self.assertEqual(updated, 2)
+        self.assertEqual(not_found, ["invalido", "1-D-2020"])
+        self.project.refresh_from_db()
+        self.other_project.refresh_from_db()
+        self.assertEqual((self.project.deputies_day_order, self.other_project.deputies_day_order), (15, 40))
+
+    def test_files_without_source_match_the_projects_without_source(self):
+        sourceless_project = LawProject.objects.create(
+            deputies_project_id="70-2021", deputies_number=70, deputies_source=None, deputies_year=2021
+        )
+        sourced_project = LawProject.objects.create(
+            deputies_project_id="70-D-2021", deputies_number=70, deputies_source="D", deputies_year=2021
+        )
+        data = pd.DataFrame({"project_id": ["70-21", "71-21"], "day_order": [8, 9]})
+        updated, not_found = LawProjectsWriter.update_by_deputies_file(data, "day_order", "deputies_day_order")
+        self.assertEqual(updated, 1)
+        self.assertEqual(not_found, ["71-2021"])
+        sourceless_project.refresh_from_db()
+        sourced_project.refresh_from_db()
+        self.assertEqual((sourceless_project.deputies_day_order, sourced_project.deputies_day_order), (8, None))
+
+    def test_projects_status_are_updated(self):
+        statuses = [ProjectStatus.APPROVED, ProjectStatus.REJECTED]
+        data = pd.DataFrame({"project_id": ["368-D-2020", "368-D-20"], "project_status": statuses})
+        LawProjectsWriter.update_projects_status(data)
+        self.project.refresh_from_db()
+        self.other_project.refresh_from_db()
+        self.assertEqual(self.project.status, ProjectStatus.REJECTED)
+        self.assertEqual(self.other_project.status, ProjectStatus.ORIGIN_CHAMBER_COMISSION)
+
+
+class PartiesWriterTestCase(TestCase):
+    def test_parties_are_assigned_by_name_with_a_single_update(self):
+        party = Party.objects.create(main_denomination="Partido Justicialista")
+        for party_name in ["Part. Justicialista", "Part. Justicialista", "Frente Grande", "Otro"]:
+            Vote.objects.create(person_name="Juan", person_last_name="Perez", party_name=party_name)
+        self.assertEqual(
+            PartiesWriter.count_by_party_name(Vote), {"Part. Justicialista": 2, "Frente Grande": 1, "Otro": 1}
+        )
+        linked_data = pd.DataFrame(
+            {"denomination": ["Part. Justicialista", "Frente Grande", "Otro"], "party_id": [party.pk, 0, None]}
+        )
+        with self.assertNumQueries(1):
+            updated = PartiesWriter.assign_parties(Vote, PartiesWriter.get_party_ids(linked_data))
+        self.assertEqual(updated, 3)
+        self.assertEqual(
+            set(Vote.objects.values_list("party_name", "party_id")),
+            {("Part. Justicialista", party.pk), ("Frente Grande", None), ("Otro", None)},
+        )
+        self.assertEqual(PartiesWriter.count_by_party_name(Vote), {"Frente Grande": 1, "Otro": 1})
+
+
+class PersonsWriterTestCase(TestCase):
+    def test_persons_are_created_and_updated_in_bulk(self):
+        existing = Person.objects.create(name="Juan", last_name="Perez", last_seat="DEPUTY", is_active=True)
+        data = pd.DataFrame(
+            {
+                "person_id": [existing.pk, None, None],
+                "name": ["Juan Carlos", "María", "María"],
+                "last_name": ["Pérez", "Gómez", "Gómez"],
+                "gender": ["M", "F", "F"],
+                "twitter": [None, "@maria", "@maria"],
+            }
+        )
+        # savepoint, insert of the persons, insert of their social data, select and update of the existing ones, release
+        with self.assertNumQueries(6):
+            written = PersonsWriter.write(data, add_social_data=True)
+        self.assertEqual(len(written), 2)
+        self.assertTrue(all(person.pk for person in written))
+        existing.refresh_from_db()
+        self.assertEqual((existing.name, existing.sex, existing.last_seat), ("Juan Carlos", "M", "DEPUTY"))
+        self.assertEqual(existing.normalized_full_name, Person.normalize_full_name("Juan Carlos", "Pérez"))
+        created = Person.objects.get(name="María")
+        self.assertEqual(created.normalized_full_name, Person.normalize_full_name("María", "Gómez"))
+        self.assertEqual(created.social_data.twitter, "@maria")
+
+    def test_missing_persons_are_deactivated_with_a_single_update(self):
+        kept = Person.objects.create(name="Juan", last_name="Perez", last_seat="SENATOR", is_active=True)
+        gone = Person.objects.create(name="Ana", last_name="Lopez", last_seat="SENATOR", is_active=True)
+        deputy = Person.objects.create(name="Luis", last_name="Diaz", last_seat="DEPUTY", is_active=True)
+        with self.assertNumQueries(1):
+            PersonsWriter.update_active_persons([kept], "SENATOR")
+        self.assertEqual(
+            dict(Person.objects.values_list("id", "is_active")), {kept.pk: True, gone.pk: False, deputy.pk: True}
+        )
+
+    def test_update_active_persons_activates_the_written_persons(self):
+        inactive = Person.objects.create(name="Juan", last_name="Perez", last_seat="DEPUTY", is_active=False)
+        replaced = Person.objects.create(name="Ana", last_name="Lopez", last_seat="SENATOR", is_active=True)
+        data = pd.DataFrame(
+            {
+                "person_id": [inactive.pk, None],
+                "name": ["Juan", "Luis"],
+                "last_name": ["Perez", "Diaz"],
+                "seat_type": ["SENATOR", "SENATOR"],
+                "is_active": [True, True],
+            }
+        )
+        PersonsWriter.write(data, update_active_persons=True)
+        self.assertEqual(
+            set(Person.objects.values_list("name", "last_seat", "is_active")),
+            {("Juan", "SENATOR", True), ("Ana", "SENATOR", False), ("Luis", "SENATOR", True)},
+        )
+
+    def test_social_data_is_upserted_on_the_person(self):
+        person = Person.objects.create(name="Juan", last_name="Perez")
+        other_person = Person.objects.create(name="Ana", last_name="Lopez")
+        SocialData.objects.create(person=person, twitter="@juan", picture_url="old.jpg")
+        data = pd.DataFrame(
+            {
+                "index": [0, 1, 2],
+                "full_name": ["Juan Perez", "Ana Lopez", "Luis Diaz"],
+                "name": ["Juan", "Ana", "Luis"],
+                "last_name": ["Perez", "Lopez", "Diaz"],
+                "person_id": [person.pk, other_person.pk, None],
+                "picture_url": ["new.jpg", "ana.jpg", "luis.jpg"],
+            }
+        )
+        PersonsWriter.update_social_data(data)
+        self.assertEqual(
+            set(SocialData.objects.values_list("person_id", "person_name", "twitter", "picture_url")),
+            {
+                (person.pk, "Juan", "@juan", "new.jpg"),
+                (other_person.pk, "Ana", None, "ana.jpg"),
+                (None, "Luis", None, "luis.jpg"),
+            },
+        )
@@ -0,0 +1,41 @@
+from django.test import TestCase
+from recoleccion.components.linkers import PartyLinker, PersonLinker
+from recoleccion.models.party import Party, PartyDenomination
+from recoleccion.models.person import Person
+
+
+class NormalizedNamesTestCase(TestCase):
+    def test_person_normalized_full_name_is_updated_on_save(self):
+        person = Person.objects.create(name="josé  maría", last_name="Núñez-Pérez")
+        self.assertEqual(Person.objects.get(pk=person.pk).normalized_full_name, "Nunez Perez Jose Maria")
+        person.last_name = "Gómez"
+        person.save(update_fields=["last_name"])
+        self.assertEqual(Person.objects.get(pk=person.pk).normalized_full_name, "Gomez Jose Maria")
+
+    def test_person_without_name_has_no_empty_parts(self):
+        person = Person.objects.create(name="", last_name="Núñez")
+        self.assertEqual(Person.objects.get(pk=person.pk).normalized_full_name, "Nunez")
+        self.assertEqual(Person.normalize_full_name("José", None), "Jose")
+
+    def test_party_normalized_denomination_is_updated_on_save(self):
+        party = Party.objects.create(main_denomination="Unión Cívica Radical")
+        denomination = PartyDenomination.objects.get(party=party)
+        self.assertEqual(denomination.normalized_denomination, "union civica radical")
+
+    def test_party_exact_matches_use_the_normalized_denomination(self):
+        party = Party.objects.create(main_denomination="Unión Cívica Radical")
+        linker = PartyLinker()
+        messy_data = {0: {"denomination": "Union Civica Radical", "record_id": 1}}
+        matched_data, unmatched_data = linker.load_exact_matches(messy_data)
+        self.assertEqual(matched_data["party_id"].tolist(), [party.pk])
+        self.assertEqual(unmatched_data, {})
+
+    def test_person_exact_matches_use_the_normalized_full_name(self):
+        person = Person.objects.create(name="José María", last_name="Núñez")
+        Person.objects.create(name="José", last_name="Núñez")
+        linker = PersonLinker()
+        messy_data = {0: {"full_name": "Nunez Jose Maria"}, 1: {"full_name": "Nunez Maria"}}
+        with self.assertNumQueries(1):
+            matched_data, unmatched_data = linker.load_exact_matches(messy_data)
+        self.assertEqual(matched_data["person_id"].tolist(), [person.pk])
+        self.assertEqual(list(unmatched_data), [1])
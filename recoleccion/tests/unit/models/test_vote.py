@@ -1,4 +1,4 @@
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 from recoleccion.components.data_sources.senate_source import SenateHistory, CurrentSenate
 from recoleccion.models.law_project import LawProject
@@ -84,6 +84,23 @@ class VoteConstraint(TestCase):
                 vote=vote,
             )
 
+    def test_vote_constraint_works_with_bulk_create(self):
+        law_project = LawProject.objects.first()
+        person = Person.objects.first()
+        chamber = "SENATORS"
+        date = "2020-01-01"
+        vote = "POSITIVE"
+        Vote.objects.create(chamber=chamber, date=date, person=person, project=law_project, vote=vote)
+        with self.assertRaises(IntegrityError):
+            with transaction.atomic():
+                Vote.objects.bulk_create(
+                    [Vote(chamber=chamber, date=date, person=person, project=law_project, vote=vote)]
+                )
+        Vote.objects.bulk_create(
+            [Vote(chamber=chamber, date=date, person=person, project=law_project, vote=vote)], ignore_conflicts=True
+        )
+        self.assertEqual(Vote.objects.count(), 1)
+
 
 class VoteBulkOperations(TestCase):
     fixtures = ["person.json", "law_project.json"]
@@ -6,10 +6,52 @@ import logging
 
 # Project
 from django.core.management.base import BaseCommand, CommandParser
+from recoleccion.components.data_sources.http_cache import HTTPCache
+from recoleccion.components.linkers.linker import Linker
 from recoleccion.models.missing_record import MissingRecord
 
 
-class CustomCommand(BaseCommand):
+class DataSourceCommand(BaseCommand):
+    """
+    Base command for the commands that fetch data from the sources
+    Adds the --offline option, to replay the responses of the HTTP cache without using the network
+    """
+
+    def create_parser(self, prog_name: str, subcommand: str, **kwargs) -> CommandParser:
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            "--offline", action="store_true", help="Only use the cached responses of the sources (no network)"
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        if options.get("offline"):
+            HTTPCache.set_offline(True)
+        return super().execute(*args, **options)
+
+
+class LinkingCommand(BaseCommand):
+    """
+    Base command for the commands that link persons or parties
+    Adds the --linker-engine option, to choose the engine of every linker used by the command
+    """
+
+    def create_parser(self, prog_name: str, subcommand: str, **kwargs) -> CommandParser:
+        parser = super().create_parser(prog_name, subcommand, **kwargs)
+        parser.add_argument(
+            "--linker-engine",
+            choices=Linker.ENGINES,
+            help="Linking engine of the linkers (settings.LINKER_ENGINE by default)",
+        )
+        return parser
+
+    def execute(self, *args, **options):
+        if options.get("linker_engine"):
+            Linker.default_engine = options["linker_engine"]
+        return super().execute(*args, **options)
+
+
+class CustomCommand(DataSourceCommand):
     logger = logging.getLogger(__name__)
     THREAD_AMOUNT = 8
     index_name = None
@@ -0,0 +1,6 @@
+from django.db import models
+
+
+class LinkingResolutionSources(models.TextChoices):
+    GAZETTEER = "GAZETTEER", "Gazetteer"
+    APPROVED_DECISION = "APPROVED_DECISION", "Decisión aprobada"